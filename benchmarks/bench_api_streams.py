@@ -0,0 +1,139 @@
+"""
+Benchmark: thousands of concurrent idle SSE streams on one API server worker
+
+Starts the fake LLM server with a long time-to-first-token, runs the API
+server (python -m api.server) in a subprocess pointed at it, opens N
+streaming chat completions at once and holds them while only keepalive
+comments flow. Reports how many streams connected, the server's memory and
+CPU per stream, /health latency under that load, and whether every upstream
+request was released once the clients disconnected.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Tuple
+
+import httpx
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from api.server import raise_open_file_limit  # noqa: E402
+from core.mock_backend import SAMPLE_ANSWER, start_server  # noqa: E402
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_usage(pid: int) -> Tuple[float, float]:
+    """(RSS in MB, CPU seconds) of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) / 1024
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return rss, cpu
+    except (OSError, StopIteration, ValueError):
+        return float("nan"), float("nan")
+
+def start_api_server(port: int, backend_url: str, keepalive: float) -> subprocess.Popen:
+    env = dict(os.environ, LOCAL_LLM_URL=backend_url, GROQ_API_KEY="", GROQ_API_KEYS="", LLM_BACKENDS="",
+               RATE_LIMIT_RPM="0", RESPONSE_CACHE_ENABLED="false", API_SERVER_KEEPALIVE=str(keepalive),
+               API_SERVER_KEY="")
+    return subprocess.Popen([sys.executable, "-m", "api.server", "--port", str(port)],
+                            cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL)
+
+async def wait_healthy(base: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("❌ API server did not start")
+
+async def open_stream(client: httpx.AsyncClient, base: str, i: int, stats: dict):
+    payload = {"stream": True, "messages": [{"role": "user", "content": f"Question {i}: how do Java records work?"}]}
+    async with client.stream("POST", f"{base}/v1/chat/completions", json=payload) as response:
+        stats["connected"] += response.status_code == 200
+        async for line in response.aiter_lines():
+            if line.startswith(": keepalive"):
+                stats["keepalives"] += 1
+            elif line.startswith("data: {"):
+                stats["chunks"] += 1
+
+async def run(args):
+    raise_open_file_limit()
+    backend = start_server(answer=SAMPLE_ANSWER, token_rate=args.token_rate, ttft=args.hold * 2)
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = start_api_server(port, backend.url, args.keepalive)
+    try:
+        await wait_healthy(base)
+        rss_before, cpu_before = process_usage(server.pid)
+        stats = {"connected": 0, "keepalives": 0, "chunks": 0}
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+        async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(None, connect=30)) as client:
+            started = time.monotonic()
+            tasks = [asyncio.create_task(open_stream(client, base, i, stats)) for i in range(args.streams)]
+            while stats["connected"] < args.streams and time.monotonic() - started < args.hold:
+                await asyncio.sleep(0.05)
+            connect_seconds = time.monotonic() - started
+            await asyncio.sleep(max(0.0, args.hold - connect_seconds))
+
+            rss_held, cpu_held = process_usage(server.pid)
+            health_started = time.perf_counter()
+            await client.get(f"{base}/health")
+            health_ms = (time.perf_counter() - health_started) * 1000
+            held = {"connected": stats["connected"], "keepalives": stats["keepalives"]}
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # The server notices a disconnect on its next write (at most one keepalive interval)
+            released = time.monotonic()
+            while True:
+                metrics = (await client.get(f"{base}/metrics")).json()
+                in_flight = metrics["backends"]["backends"]["local"]["in_flight"]
+                if (metrics["streams"]["active"] == 0 and in_flight == 0) \
+                        or time.monotonic() - released > args.keepalive * 5:
+                    break
+                await asyncio.sleep(0.1)
+            released = time.monotonic() - released
+
+        streams = max(held["connected"], 1)
+        print(f"{held['connected']}/{args.streams} streams connected in {connect_seconds:.2f}s, "
+              f"{held['keepalives']} keepalives received while idle")
+        print(f"server RSS {rss_before:.1f} → {rss_held:.1f} MB "
+              f"({(rss_held - rss_before) * 1024 / streams:.1f} KB/stream), "
+              f"CPU {(cpu_held - cpu_before) * 1000 / streams:.2f} ms/stream over {args.hold:.0f}s")
+        print(f"/health under load: {health_ms:.1f} ms")
+        print(f"after disconnect: {metrics['streams']['active']} active streams, "
+              f"{metrics['server']['streams_disconnected']} cancelled, "
+              f"{in_flight} upstream requests in flight after {released:.1f}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        backend.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--hold", type=float, default=10.0, help="Seconds to hold the streams open")
+    parser.add_argument("--keepalive", type=float, default=2.0, help="Server keepalive interval in seconds")
+    parser.add_argument("--token-rate", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: throughput vs. number of backends in the pool
+
+Each backend is a fake server with its own requests-per-minute limit, like
+one API key. A burst of streams runs for a fixed window and the number of
+completed answers is compared for pools of 1..N backends.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.backends import build_backend_pool  # noqa: E402
+from core.engine import ChatEngine  # noqa: E402
+from core.transport import close_async_client  # noqa: E402
+from fake_llm_server import start_server  # noqa: E402
+
+PAYLOAD = {"model": "fake", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 50, "stream": True}
+
+async def drain(engine, completed):
+    async for _ in engine.astream(PAYLOAD):
+        pass
+    completed.append(time.perf_counter())
+
+async def run_pool(servers, args) -> dict:
+    specs = [{"name": f"fake-{i + 1}", "base_url": s.url, "api_key": f"key-{i + 1}",
+              "requests_per_minute": 0} for i, s in enumerate(servers)]
+    pool = build_backend_pool(specs, args.strategy)
+    engine = ChatEngine(pool=pool)
+    completed = []
+    tasks = [asyncio.create_task(drain(engine, completed)) for _ in range(args.requests)]
+    await asyncio.wait(tasks, timeout=args.duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_async_client()
+    return {"completed": len(completed), "stats": pool.stats()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", type=int, default=3)
+    parser.add_argument("--server-rpm", type=int, default=10, help="Rate limit of each fake backend")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measurement window in seconds")
+    parser.add_argument("--strategy", default="least_loaded", choices=["least_loaded", "weighted_round_robin"])
+    args = parser.parse_args()
+
+    for count in range(1, args.backends + 1):
+        # Fresh servers per run so earlier runs do not eat into the rate limits
+        servers = [start_server(tokens=20, rate_limit_rpm=args.server_rpm) for _ in range(count)]
+        result = asyncio.run(run_pool(servers, args))
+        for server in servers:
+            server.shutdown()
+        per_backend = {name: b["requests"] for name, b in result["stats"]["backends"].items()}
+        print(f"{count} backend(s): {result['completed']:3d} answers in {args.duration:.0f}s "
+              f"({result['completed'] / args.duration:.1f}/s)  requests per backend: {per_backend}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: bytes written per turn when saving a growing conversation
+
+Compares the legacy save (pretty-printed JSON rewrite of the whole transcript
+on every save) with the append-only JSON Lines journal.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.config import FILE_CONFIG  # noqa: E402
+from utils.history_store import HistoryStore  # noqa: E402
+
+ANSWER = ("Here is an enterprise-grade answer with code.\n```java\n"
+          + "public class Example { /* ... */ }\n" * 200 + "```\n")
+
+def legacy_save(history_dir: str, turn: int, chat_history: list) -> int:
+    filepath = os.path.join(history_dir, f"legacy_{turn}.json")
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump({"question": "q", "display_name": "q", "timestamp": "t", "chat_history": chat_history},
+                  f, indent=2, ensure_ascii=False)
+    return os.path.getsize(filepath)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=40, help="Question/answer pairs per conversation")
+    parser.add_argument("--no-fsync", action="store_true", help="Skip fsync to measure pure write cost")
+    args = parser.parse_args()
+    FILE_CONFIG["fsync"] = not args.no_fsync
+
+    with tempfile.TemporaryDirectory() as history_dir:
+        chat_history = []
+        legacy_bytes = 0
+        start = time.perf_counter()
+        for turn in range(args.turns):
+            chat_history += [{"role": "user", "content": f"Question {turn}?"},
+                             {"role": "assistant", "content": ANSWER}]
+            legacy_bytes += legacy_save(history_dir, turn, chat_history)
+        legacy_time = time.perf_counter() - start
+
+        store = HistoryStore(history_dir)
+        filepath = os.path.join(history_dir, "journal.jsonl")
+        chat_history = []
+        start = time.perf_counter()
+        for turn in range(args.turns):
+            chat_history += [{"role": "user", "content": f"Question {turn}?"},
+                             {"role": "assistant", "content": ANSWER}]
+            if turn == 0:
+                store.create(filepath, "q", "t", chat_history)
+            else:
+                store.append_turns(filepath, chat_history)
+        journal_time = time.perf_counter() - start
+        store.close()
+
+    print(f"{args.turns} saves of a growing conversation")
+    print(f"  legacy json   {legacy_bytes / args.turns:12,.0f} bytes/turn  {legacy_time * 1000:8.1f} ms total")
+    print(f"  jsonl journal {store.bytes_written / args.turns:12,.0f} bytes/turn  {journal_time * 1000:8.1f} ms total")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: request scheduler against a rate-limited, flaky fake server
+
+Fires a burst of interactive and background streams through the engine at a
+fake server that answers 429 above its requests-per-minute limit and fails a
+fraction of requests with 503. Reports per-priority latency, retries and the
+queue depth observed while the burst drains.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# The local limiter starts unlimited so rate limits are learned from the server
+os.environ.setdefault("RATE_LIMIT_RPM", "0")
+
+from core.engine import ChatEngine, ChatEngineError  # noqa: E402
+from core.scheduler import BACKGROUND, INTERACTIVE, get_scheduler  # noqa: E402
+from core.transport import close_async_client  # noqa: E402
+from fake_llm_server import start_server  # noqa: E402
+
+PAYLOAD = {"model": "fake", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 50, "stream": True}
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+async def one_request(engine, priority, results):
+    start = time.perf_counter()
+    try:
+        async for _ in engine.astream(PAYLOAD, priority):
+            pass
+        results[priority]["ok"].append(time.perf_counter() - start)
+    except (ChatEngineError, Exception) as e:
+        results[priority]["errors"].append(type(e).__name__)
+
+async def sample_depth(samples, stop):
+    scheduler = get_scheduler()
+    while not stop.is_set():
+        samples.append(scheduler.metrics()["queue_depth"])
+        await asyncio.sleep(0.25)
+
+async def run(args):
+    server = start_server(tokens=args.tokens, rate_limit_rpm=args.server_rpm, error_rate=args.error_rate)
+    engine = ChatEngine("fake-key", server.url)
+    results = {p: {"ok": [], "errors": []} for p in (INTERACTIVE, BACKGROUND)}
+    depth_samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_depth(depth_samples, stop))
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(args.requests):
+        priority = BACKGROUND if i % 2 else INTERACTIVE
+        tasks.append(asyncio.create_task(one_request(engine, priority, results)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    await close_async_client()
+    server.shutdown()
+
+    print(f"{args.requests} requests in {elapsed:.1f}s "
+          f"(server: {server.stats['rate_limited']} x 429, {server.stats['errors']} x 503)")
+    for priority, name in ((INTERACTIVE, "interactive"), (BACKGROUND, "background")):
+        ok = results[priority]["ok"]
+        print(f"  {name:11s} ok={len(ok):3d} errors={len(results[priority]['errors']):3d} "
+              f"p50={percentile(ok, 0.5):6.2f}s p95={percentile(ok, 0.95):6.2f}s "
+              f"mean={statistics.mean(ok) if ok else 0:6.2f}s")
+    peak = max(depth_samples, key=lambda d: sum(d.values()), default={})
+    print(f"  peak queue depth: {peak}")
+    print(f"  scheduler: {get_scheduler().metrics()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--server-rpm", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: markdown/code segmentation throughput on large answers
+
+Compares the single-pass StreamingSegmenter (whole answer and fed token by
+token, as during streaming) with the previous pair of DOTALL regex passes
+(extract_code_blocks + the re.sub in display_chat_history), and lists the
+fences the regexes missed.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.segments import StreamingSegmenter, parse_segments  # noqa: E402
+
+PROSE = ("Spring Boot auto-configures a `DataSource` when a driver is on the classpath, "
+         "so most applications only need connection properties. ")
+CODE = "\n".join(f"    private final String field{i} = \"value {i}\";" for i in range(12))
+FENCES = ["```java\n{code}\n```", "```c++\n{code}\n```", "~~~xml\n{code}\n~~~", "```java \n{code}\n```"]
+
+def make_answer(target_chars: int, seed: int = 7) -> str:
+    """Prose paragraphs interleaved with fenced blocks of several styles"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < target_chars:
+        part = PROSE * rng.randint(2, 6) if rng.random() < 0.6 else rng.choice(FENCES).format(code=CODE)
+        parts.append(part)
+        size += len(part) + 2
+    return "\n\n".join(parts)
+
+def legacy(answer: str):
+    """The previous extract_code_blocks regex plus the display re.sub"""
+    blocks = re.findall(r'```(\w+)?\n(.*?)```', answer, re.DOTALL)
+    text = re.sub(r'```(\w+)?\n(.*?)```', '\n[CODE BLOCK BELOW]\n', answer, flags=re.DOTALL)
+    return blocks, text
+
+def streamed(answer: str, delta_chars: int = 4):
+    """Feed the answer in token-sized deltas, as the renderer does while streaming"""
+    segmenter = StreamingSegmenter()
+    for i in range(0, len(answer), delta_chars):
+        segmenter.feed(answer[i:i + delta_chars])
+    segmenter.close()
+    return segmenter.segments
+
+def bench(func, answer: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(answer)
+    elapsed = time.perf_counter() - start
+    return len(answer) * repeat / elapsed / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="8000,32000,128000", help="Answer sizes in characters")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        answer = make_answer(size)
+        fences = len(re.findall(r"^(?:```|~~~)\S", answer, re.MULTILINE))
+        legacy_blocks = len(legacy(answer)[0])
+        code_segments = sum(1 for s in parse_segments(answer) if s.kind == "code")
+        print(f"{len(answer):7d} chars, {fences} fenced blocks:")
+        print(f"  legacy regex x2      {bench(legacy, answer, args.repeat):8.1f} MB/s  "
+              f"({legacy_blocks} blocks found)")
+        print(f"  segmenter (whole)    {bench(parse_segments, answer, args.repeat):8.1f} MB/s  "
+              f"({code_segments} blocks found)")
+        print(f"  segmenter (streamed) {bench(streamed, answer, max(1, args.repeat // 5)):8.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: SSE parsing throughput (tokens/sec) replaying recorded captures
+
+Compares the incremental SSEDecoder + parse_delta fast path against the
+previous line-by-line json.loads / string concatenation loop.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.sse import DONE_MARKER, SSEDecoder, parse_delta  # noqa: E402
+
+CAPTURE_DIR = os.path.join(os.path.dirname(__file__), "captures")
+
+def chunked(data: bytes, size: int):
+    """Split a capture into network-sized chunks, ignoring line boundaries"""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def parse_legacy(chunks) -> Tuple[str, int]:
+    """The original stream_response loop (single-line data only)"""
+    full_response = ""
+    tokens = 0
+    for line in b"".join(chunks).splitlines():
+        if line:
+            line = line.decode("utf-8")
+            if line.startswith("data: "):
+                data = line[6:]
+                if data.strip() == DONE_MARKER:
+                    break
+                try:
+                    json_data = json.loads(data)
+                    if "choices" in json_data and len(json_data["choices"]) > 0:
+                        delta = json_data["choices"][0].get("delta", {})
+                        if "content" in delta:
+                            full_response += delta["content"]
+                            tokens += 1
+                except json.JSONDecodeError:
+                    continue
+    return full_response, tokens
+
+def parse_incremental(chunks) -> Tuple[str, int]:
+    """SSEDecoder + parse_delta with list accumulation"""
+    decoder = SSEDecoder()
+    parts = []
+    for chunk in chunks:
+        for event in decoder.feed(chunk):
+            if event.data == DONE_MARKER:
+                return "".join(parts), len(parts)
+            content = parse_delta(event.data)
+            if content:
+                parts.append(content)
+    return "".join(parts), len(parts)
+
+def bench(func, chunks, repeat: int) -> Tuple[float, str, int]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text, tokens = func(chunks)
+    elapsed = time.perf_counter() - start
+    return tokens * repeat / elapsed, text, tokens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("captures", nargs="*", help="SSE capture files (default: benchmarks/captures/*.sse)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    args = parser.parse_args()
+
+    paths = args.captures or sorted(glob.glob(os.path.join(CAPTURE_DIR, "*.sse")))
+    for path in paths:
+        with open(path, "rb") as f:
+            chunks = chunked(f.read(), args.chunk_size)
+
+        legacy_rate, legacy_text, legacy_tokens = bench(parse_legacy, chunks, args.repeat)
+        new_rate, new_text, new_tokens = bench(parse_incremental, chunks, args.repeat)
+
+        print(f"{os.path.basename(path)}")
+        print(f"  legacy       {legacy_rate:12,.0f} tokens/s  ({legacy_tokens} tokens recovered)")
+        print(f"  incremental  {new_rate:12,.0f} tokens/s  ({new_tokens} tokens recovered)")
+        if legacy_text != new_text:
+            print(f"  ⚠️ legacy parser lost {new_tokens - legacy_tokens} tokens on this capture")
+
+if __name__ == "__main__":
+    main()
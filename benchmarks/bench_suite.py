@@ -0,0 +1,341 @@
+"""
+Benchmark suite: end-to-end numbers to compare between versions
+
+Runs offline against the fake OpenAI-compatible SSE server (in a subprocess,
+so its CPU is not counted) and measures:
+
+  streaming   time-to-first-token, tokens/sec and client CPU per stream,
+              with and without injected 503s and dropped streams
+  sessions    memory held per UI session (chatbot + transcript)
+  histories   load_saved_histories latency against N saved history files
+  rerun       display_chat_history rerun time against long transcripts
+
+Results are written as JSON; pass --compare with an earlier file to see
+what changed.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --output new.json --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from bench_segmenter import make_answer  # noqa: E402
+from core.backends import Backend, BackendPool  # noqa: E402
+from core.batch import answer_one, percentile  # noqa: E402
+from core.chat import GroqJavaChatbot  # noqa: E402
+from core.engine import ChatEngine  # noqa: E402
+from core.scheduler import RequestScheduler  # noqa: E402
+from core.transport import close_async_client  # noqa: E402
+from utils import history_store  # noqa: E402
+from utils.config import CACHE_CONFIG, FILE_CONFIG  # noqa: E402
+
+# --- fake backend ---------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_fake_server(tokens: int, token_chars: int, token_rate: float, ttft: float,
+                      error_rate: float = 0.0, drop_rate: float = 0.0) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "core.mock_backend", "--port", str(port), "--tokens", str(tokens),
+         "--token-chars", str(token_chars), "--token-rate", str(token_rate), "--ttft", str(ttft),
+         "--error-rate", str(error_rate), "--drop-rate", str(drop_rate)],
+        cwd=SRC_DIR, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process, f"http://127.0.0.1:{port}/v1/chat/completions"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise SystemExit("❌ Fake server did not start")
+
+def fake_engine(url: str, concurrency: int) -> ChatEngine:
+    """Engine on one unthrottled fake backend"""
+    scheduler = RequestScheduler({"requests_per_minute": 0, "tokens_per_minute": 0, "max_concurrent": concurrency})
+    return ChatEngine(pool=BackendPool([Backend("fake", url, "fake", scheduler=scheduler)]))
+
+# --- streaming ------------------------------------------------------------
+
+async def _answer_all(engine: ChatEngine, streams: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> dict:
+        async with semaphore:
+            # Distinct questions, so nothing is coalesced
+            return await answer_one(GroqJavaChatbot(engine=engine),
+                                    {"id": str(i), "question": f"Question {i}: how do Java records work?"})
+
+    try:
+        return await asyncio.gather(*(one(i) for i in range(streams)))
+    finally:
+        await close_async_client()
+
+def bench_streaming(args, error_rate: float = 0.0, drop_rate: float = 0.0) -> dict:
+    process, url = start_fake_server(args.tokens, args.token_chars, args.token_rate, args.ttft,
+                                     error_rate, drop_rate)
+    try:
+        engine = fake_engine(url, args.concurrency)
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        records = asyncio.run(_answer_all(engine, args.streams, args.concurrency))
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+    finally:
+        process.terminate()
+        process.wait()
+
+    ok = [r for r in records if r["status"] == "ok"]
+    ttfts = [r["ttft_ms"] for r in ok if r["ttft_ms"] is not None]
+    rates = [r["tokens"] / ((r["latency_ms"] - r["ttft_ms"]) / 1000) for r in ok
+             if r["ttft_ms"] is not None and r["latency_ms"] > r["ttft_ms"]]
+    tokens = sum(r["tokens"] for r in records)
+    scheduler = engine.pool.backends[0].scheduler.metrics()
+    return {
+        "streams": len(records),
+        "succeeded": len(ok),
+        "ttft_ms": {f"p{p}": percentile(ttfts, p) for p in (50, 90, 99)},
+        "tokens_per_second_per_stream": round(statistics.median(rates), 1) if rates else None,
+        "tokens_per_second_total": round(tokens / wall, 1),
+        "cpu_ms_per_stream": round(cpu * 1000 / len(records), 2),
+        "cpu_us_per_token": round(cpu * 1e6 / tokens, 2) if tokens else None,
+        "retries": scheduler["retries"],
+        "wall_seconds": round(wall, 2)
+    }
+
+# --- sessions -------------------------------------------------------------
+
+def make_transcript(turns: int, answer_chars: int, seed: int) -> list:
+    transcript = []
+    for turn in range(turns):
+        transcript.append({"role": "user", "content": f"Question {seed}.{turn}: how do I secure a REST API?"})
+        transcript.append({"role": "assistant", "content": make_answer(answer_chars, seed=seed * 1000 + turn)})
+    return transcript
+
+def bench_sessions(args) -> dict:
+    """Memory a UI session keeps alive: its chatbot and its transcript"""
+    engine = fake_engine("http://127.0.0.1:9/v1/chat/completions", 1)
+    GroqJavaChatbot(engine=engine)  # load shared prompts and tokenizers outside the measurement
+    transcripts = [make_transcript(args.session_turns, args.answer_chars, seed) for seed in range(args.sessions)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    chatbots = [GroqJavaChatbot(engine=engine) for _ in range(args.sessions)]
+    chatbot_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    transcript_bytes = sum(sys.getsizeof(message["content"]) for t in transcripts for message in t)
+    del chatbots
+    return {
+        "sessions": args.sessions,
+        "turns": args.session_turns,
+        "chatbot_kb_per_session": round(chatbot_bytes / args.sessions / 1024, 2),
+        "transcript_kb_per_session": round(transcript_bytes / args.sessions / 1024, 2)
+    }
+
+# --- saved histories ------------------------------------------------------
+
+def _use_history_dir(directory: str):
+    """Point the process-wide store at another directory (benchmark only)"""
+    if history_store._store is not None:
+        history_store._store.close()
+    history_store._store = None
+    FILE_CONFIG["history_dir"] = directory
+
+def _median_ms(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+def bench_histories(args) -> dict:
+    from ui.sidebar import load_saved_histories, search_saved_histories
+
+    results = {}
+    original_dir, original_fsync = FILE_CONFIG["history_dir"], FILE_CONFIG["fsync"]
+    FILE_CONFIG["fsync"] = False  # generating thousands of files should not wait on the disk
+    try:
+        for count in args.history_counts:
+            directory = tempfile.mkdtemp(prefix="bench-histories-")
+            try:
+                builder = history_store.HistoryStore(directory)
+                for i in range(count):
+                    transcript = make_transcript(args.history_turns, args.answer_chars // 4, i)
+                    builder.create(os.path.join(directory, f"history_{i:06d}.jsonl"),
+                                   transcript[0]["content"], f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+                                   transcript)
+                builder.close()
+                index = os.path.join(directory, FILE_CONFIG["history_index"])
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(index + suffix):
+                        os.remove(index + suffix)
+
+                # First start on existing files: the index is built from the journals
+                _use_history_dir(directory)
+                started = time.perf_counter()
+                page = load_saved_histories()
+                first_ms = (time.perf_counter() - started) * 1000
+
+                # Restart with the index in place
+                _use_history_dir(directory)
+                started = time.perf_counter()
+                load_saved_histories()
+                restart_ms = (time.perf_counter() - started) * 1000
+
+                results[str(count)] = {
+                    "first_load_ms": round(first_ms, 2),
+                    "restart_load_ms": round(restart_ms, 2),
+                    "page_ms": _median_ms(load_saved_histories, args.repeat),
+                    "search_ms": _median_ms(lambda: search_saved_histories("secure REST"), args.repeat),
+                    "page_size": len(page)
+                }
+            finally:
+                _use_history_dir(original_dir)
+                shutil.rmtree(directory, ignore_errors=True)
+    finally:
+        FILE_CONFIG["fsync"] = original_fsync
+    return results
+
+# --- chat history rerun ---------------------------------------------------
+
+def _chat_history_app():
+    from ui.chat_interface import display_chat_history, initialize_session_state
+
+    initialize_session_state()
+    display_chat_history()
+
+def bench_rerun(args) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for turns in args.rerun_turns:
+        app = AppTest.from_function(_chat_history_app, default_timeout=120)
+        app.session_state["chat_history"] = make_transcript(turns, args.answer_chars, seed=100000 + turns)
+        app.session_state["current_chat_saved"] = True
+        started = time.perf_counter()
+        app.run()
+        first_ms = (time.perf_counter() - started) * 1000
+        if app.exception:
+            raise SystemExit(f"❌ display_chat_history failed: {app.exception[0].message}")
+        results[str(turns)] = {
+            "first_run_ms": round(first_ms, 1),
+            "rerun_ms": _median_ms(app.run, args.repeat),
+            "elements": len(app.markdown) + len(app.code)
+        }
+    return results
+
+# --- results --------------------------------------------------------------
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=SRC_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Numeric leaves keyed by their dotted path"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+def compare(current: dict, baseline: dict):
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"\nChanges since {baseline['meta'].get('revision') or baseline['meta']['timestamp']}:")
+    for path in sorted(old.keys() & new.keys()):
+        if old[path] == new[path]:
+            continue
+        change = f"{(new[path] - old[path]) / old[path] * 100:+.1f}%" if old[path] else "n/a"
+        print(f"  {path:60s} {old[path]:>12} → {new[path]:<12} {change}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    parser.add_argument("--only", help="Comma-separated subset: streaming,errors,sessions,histories,rerun")
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens per fake answer")
+    parser.add_argument("--token-chars", type=int, default=6, help="Characters per fake token")
+    parser.add_argument("--token-rate", type=float, default=200, help="Fake tokens per second per stream")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Fake seconds before the first token")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="503s in the errors run")
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="Streams cut off in the errors run")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--session-turns", type=int, default=10)
+    parser.add_argument("--answer-chars", type=int, default=4000)
+    parser.add_argument("--history-counts", default="100,1000")
+    parser.add_argument("--history-turns", type=int, default=6)
+    parser.add_argument("--rerun-turns", default="10,50")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    args.history_counts = [int(n) for n in args.history_counts.split(",")]
+    args.rerun_turns = [int(n) for n in args.rerun_turns.split(",")]
+    selected = set(args.only.split(",")) if args.only else {"streaming", "errors", "sessions", "histories", "rerun"}
+
+    # Every question is distinct, and cached answers would hide the streaming path
+    CACHE_CONFIG["enabled"] = False
+
+    benches = [
+        ("streaming", lambda: bench_streaming(args)),
+        ("errors", lambda: bench_streaming(args, args.error_rate, args.drop_rate)),
+        ("sessions", lambda: bench_sessions(args)),
+        ("histories", lambda: bench_histories(args)),
+        ("rerun", lambda: bench_rerun(args))
+    ]
+    results = {}
+    for name, bench in benches:
+        if name not in selected:
+            continue
+        print(f"⏱️ {name}...")
+        results[name] = bench()
+        print(json.dumps(results[name], indent=2))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        },
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
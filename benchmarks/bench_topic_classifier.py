@@ -0,0 +1,93 @@
+"""
+Benchmark: topic classification throughput (queries/sec) over a query corpus
+
+Compares the precompiled TopicClassifier against the previous substring
+scans in detect_java_topic, and reports how often the two disagree.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.chat import JavaChatbot  # noqa: E402
+from core.topics import get_topic_classifier  # noqa: E402
+from utils.config import SAMPLE_QUESTIONS  # noqa: E402
+
+EXTRA_QUERIES = [
+    "What is the difference between an abstract class and an interface?",
+    "How do I avoid a deadlock when two threads need the same locks?",
+    "When should I use CompletableFuture instead of an ExecutorService?",
+    "How do virtual threads change thread pool sizing?",
+    "Which garbage collector should I use for a 32GB heap?",
+    "How to read a heap dump after an OutOfMemoryError?",
+    "Tune Metaspace and -Xmx for a containerized JVM",
+    "Write a JUnit 5 test with Mockito for a service class",
+    "How to use Testcontainers with PostgreSQL in integration tests?",
+    "What does @MockBean do in a @WebMvcTest?",
+    "How to fix the N+1 select problem with Hibernate lazy loading?",
+    "Should I use Flyway or Liquibase for database migrations?",
+    "How does @Transactional propagation work with JPA repositories?",
+    "Is my interest in learning Java streams worth it?",
+    "How to sort an ArrayList of records by two fields?",
+    "Explain generics wildcards with examples",
+]
+
+def legacy_detect(query: str) -> str:
+    """The original detect_java_topic substring scan"""
+    query_lower = query.lower()
+    spring_keywords = [
+        "spring", "boot", "annotation", "controller", "service", "repository",
+        "autowired", "component", "restcontroller", "requestmapping",
+        "jpa", "hibernate", "entity", "configuration", "profile", "security",
+        "authentication", "authorization", "jwt", "oauth", "rest", "api"
+    ]
+    core_keywords = [
+        "class", "object", "inheritance", "polymorphism", "interface",
+        "abstract", "exception", "collection", "arraylist", "hashmap",
+        "thread", "lambda", "stream", "generic", "enum", "serialization"
+    ]
+    spring_matches = sum(1 for keyword in spring_keywords if keyword in query_lower)
+    core_matches = sum(1 for keyword in core_keywords if keyword in query_lower)
+    return "spring_boot" if spring_matches > core_matches else "core_java"
+
+def build_corpus(size: int) -> list:
+    base = list(SAMPLE_QUESTIONS) + EXTRA_QUERIES
+    for questions in JavaChatbot.get_sample_questions().values():
+        base.extend(questions)
+    rng = random.Random(7)
+    return [rng.choice(base) for _ in range(size)]
+
+def bench(func, corpus) -> Tuple[float, list]:
+    start = time.perf_counter()
+    labels = [func(query) for query in corpus]
+    return len(corpus) / (time.perf_counter() - start), labels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=50000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.queries)
+    classifier = get_topic_classifier()
+    classifier.classify("warm up the regex")
+
+    legacy_rate, legacy_labels = bench(legacy_detect, corpus)
+    new_rate, new_labels = bench(lambda q: classifier.classify(q).topic, corpus)
+
+    print(f"corpus: {len(corpus)} queries")
+    print(f"  legacy substring scan  {legacy_rate:12,.0f} queries/s  labels={dict(Counter(legacy_labels))}")
+    print(f"  TopicClassifier        {new_rate:12,.0f} queries/s  labels={dict(Counter(new_labels))}")
+
+    print("\nPer-query comparison (unique queries):")
+    for query in dict.fromkeys(EXTRA_QUERIES):
+        match = classifier.classify(query)
+        print(f"  {legacy_detect(query):12} -> {match.topic:12} {match.confidence:5.2f}  {query}")
+
+if __name__ == "__main__":
+    main()
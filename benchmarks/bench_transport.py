@@ -0,0 +1,56 @@
+"""
+Benchmark: time-to-first-token with the shared pooled transport vs. a fresh
+connection per request, against the local fake LLM server
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.transport import stream_post  # noqa: E402
+from fake_llm_server import start_server  # noqa: E402
+
+PAYLOAD = {"model": "fake", "messages": [{"role": "user", "content": "hi"}], "stream": True}
+
+def first_line_latency(response, start: float) -> float:
+    lines = response.iter_lines()
+    next(lines)
+    first = time.perf_counter() - start
+    for _ in lines:
+        pass
+    return first
+
+def ttft_pooled(url: str) -> float:
+    start = time.perf_counter()
+    with stream_post(url, {}, PAYLOAD, timeout=30) as response:
+        return first_line_latency(response, start)
+
+def ttft_fresh(url: str) -> float:
+    start = time.perf_counter()
+    with httpx.Client() as client:
+        with client.stream("POST", url, json=PAYLOAD, timeout=30) as response:
+            return first_line_latency(response, start)
+
+def run(label, func, url, requests=200, concurrency=16):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda _: func(url), range(requests)))
+    print(f"{label:8s} p50={statistics.median(samples) * 1000:.2f}ms "
+          f"p95={sorted(samples)[int(len(samples) * 0.95)] * 1000:.2f}ms")
+
+def main():
+    server = start_server(tokens=20)
+    run("fresh", ttft_fresh, server.url)
+    fresh_connections = server.stats["connections"]
+    run("pooled", ttft_pooled, server.url)
+    print(f"connections opened: fresh={fresh_connections} "
+          f"pooled={server.stats['connections'] - fresh_connections}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
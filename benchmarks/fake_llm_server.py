@@ -0,0 +1,14 @@
+"""
+Fake OpenAI-compatible chat completions server for local testing and benchmarks
+The implementation lives in core.mock_backend so offline batch runs can use it too.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.mock_backend import FakeLLMServer, main, start_server  # noqa: E402,F401
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""
+HTTP API for the Java Expert Chatbot
+A lightweight ASGI service around GroqJavaChatbot: OpenAI-compatible chat
+completions (streamed as SSE), CRUD over the saved histories, health and
+metrics. Every stream is a coroutine on one event loop, so idle streams only
+cost a socket and a little memory.
+
+    cd src && python -m api.server --port 8080
+    cd src && python -m api.server --mock   # offline, against a local mock backend
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+import httpx
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from core import lifecycle
+from core.backends import NoBackendError
+from core.cache import get_response_cache
+from core.cancellation import CancellationToken, get_stream_registry
+from core.chat import GroqJavaChatbot
+from core.coalesce import get_single_flight
+from core.engine import ChatEngineError, build_engine
+from core.progress import StreamProgress
+from core.scheduler import CircuitOpenError, QueueTimeoutError
+from core.segments import get_segment_cache
+from core.transport import close_async_client
+from utils.config import SERVER_CONFIG
+from utils.history_store import get_history_store, new_history_path
+
+_counters = {"requests": 0, "completions": 0, "streams_started": 0, "streams_completed": 0,
+             "streams_disconnected": 0, "errors": 0, "unauthorized": 0}
+
+# --- helpers --------------------------------------------------------------
+
+def _error(status: int, message: str, error_type: str = "invalid_request_error") -> JSONResponse:
+    """Error body in the OpenAI format"""
+    return JSONResponse({"error": {"message": message, "type": error_type, "code": status}}, status_code=status)
+
+def _engine_error(e: Exception) -> JSONResponse:
+    """Map an engine failure to the status a client should act on"""
+    _counters["errors"] += 1
+    if isinstance(e, (QueueTimeoutError, CircuitOpenError, NoBackendError)):
+        return _error(503, str(e) or type(e).__name__, "server_busy")
+    if isinstance(e, ChatEngineError) and e.status_code == 429:
+        return _error(429, str(e), "rate_limit_exceeded")
+    return _error(502, str(e) or type(e).__name__, "upstream_error")
+
+def _message_text(content) -> str:
+    """Message content as text (OpenAI clients may send a list of content parts)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content
+                       if isinstance(part, dict) and part.get("type") == "text")
+    return ""
+
+def parse_messages(messages) -> Tuple[str, List[dict]]:
+    """
+    Split OpenAI messages into the question (the last user message) and the
+    prior user/assistant turns. Client system prompts are ignored: the
+    chatbot routes every question to its own prompts.
+    """
+    if not isinstance(messages, list) or not messages:
+        raise ValueError("'messages' must be a non-empty list")
+    turns = [{"role": m["role"], "content": _message_text(m.get("content"))}
+             for m in messages if isinstance(m, dict) and m.get("role") in ("user", "assistant")]
+    if not turns or turns[-1]["role"] != "user" or not turns[-1]["content"].strip():
+        raise ValueError("The last message must be a non-empty user message")
+    return turns[-1]["content"], turns[:-1]
+
+async def _read_json(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ValueError("Request body must be JSON") from None
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    return body
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+async def with_keepalive(stream: AsyncIterator[str], interval: float) -> AsyncIterator[Optional[str]]:
+    """
+    Yield items from `stream`, and None after every `interval` seconds
+    without one. The pending read is never cancelled by the timeout, only
+    when the consumer goes away.
+    """
+    iterator = stream.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            task, pending = pending, None
+            try:
+                item = task.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        await iterator.aclose()
+
+class EventStreamResponse(StreamingResponse):
+    """SSE response that always closes its generator, so the upstream stream ends with the client"""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content: AsyncIterator[str]):
+        super().__init__(content, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        except (ClientDisconnect, OSError):
+            pass  # the generator saw the disconnect and cancelled its stream
+        finally:
+            await self.body_iterator.aclose()
+
+# --- chat completions -----------------------------------------------------
+
+async def _completion_events(request: Request, question: str, history: List[dict]) -> AsyncIterator[str]:
+    """OpenAI chat.completion.chunk events for one streamed answer"""
+    engine = request.app.state.engine
+    chatbot = GroqJavaChatbot(engine=engine)
+    progress = StreamProgress()
+    token = CancellationToken()
+    registry = get_stream_registry()
+    loop = asyncio.get_running_loop()
+    current = asyncio.current_task()
+    closing = False
+
+    def on_cancel():
+        # Shutdown cancels registered tokens from another thread
+        if not closing:
+            loop.call_soon_threadsafe(current.cancel)
+
+    token.on_cancel(on_cancel)
+    registry.register(token)
+    _counters["streams_started"] += 1
+
+    chunk = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk",
+             "created": int(time.time()), "model": engine.pool.backends[0].model or "java-expert"}
+    events = with_keepalive(chatbot.astream_response(question, history or None, progress=progress),
+                            SERVER_CONFIG["keepalive_interval"])
+    finished = False
+    try:
+        first = True
+        try:
+            async for content in events:
+                if content is None:
+                    yield ": keepalive\n\n"
+                    continue
+                if first:
+                    if chatbot.last_route:
+                        chunk["model"] = chatbot.last_route.model
+                    delta = {"role": "assistant", "content": content}
+                    first = False
+                else:
+                    delta = {"content": content}
+                progress.token()
+                registry.record_tokens(token)
+                yield _sse(dict(chunk, choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+        except (ChatEngineError, httpx.TransportError, QueueTimeoutError, CircuitOpenError, NoBackendError) as e:
+            # Headers are already sent, so the failure goes into the stream
+            _counters["errors"] += 1
+            yield _sse({"error": {"message": str(e) or type(e).__name__, "type": "upstream_error"}})
+            yield "data: [DONE]\n\n"
+            finished = True
+            return
+        progress.finish()
+        yield _sse(dict(chunk, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        yield "data: [DONE]\n\n"
+        finished = True
+        _counters["streams_completed"] += 1
+    finally:
+        closing = True
+        if not finished:
+            _counters["streams_disconnected"] += 1
+            token.cancel("client_gone")
+        # Closes the upstream request if the client left mid-answer
+        await events.aclose()
+        token.finish()
+        registry.unregister(token)
+
+async def chat_completions(request: Request) -> Response:
+    try:
+        body = await _read_json(request)
+        question, history = parse_messages(body.get("messages"))
+    except ValueError as e:
+        return _error(400, str(e))
+    _counters["completions"] += 1
+
+    if body.get("stream"):
+        return EventStreamResponse(_completion_events(request, question, history))
+
+    chatbot = GroqJavaChatbot(engine=request.app.state.engine)
+    progress = StreamProgress()
+    parts = []
+    try:
+        async for content in chatbot.astream_response(question, history or None, progress=progress):
+            progress.token()
+            parts.append(content)
+    except (ChatEngineError, httpx.TransportError, QueueTimeoutError, CircuitOpenError, NoBackendError) as e:
+        return _engine_error(e)
+    progress.finish()
+    return JSONResponse({
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": chatbot.last_route.model if chatbot.last_route else "java-expert",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(parts)},
+                     "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": chatbot.last_prompt_tokens, "completion_tokens": progress.tokens,
+                  "total_tokens": chatbot.last_prompt_tokens + progress.tokens}
+    })
+
+# --- histories ------------------------------------------------------------
+
+def _history_entry(row: dict) -> dict:
+    return {key: row[key] for key in ("id", "question", "display_name", "timestamp", "size", "turns")}
+
+def _history_turns(messages) -> List[dict]:
+    if not isinstance(messages, list) or not all(
+            isinstance(m, dict) and m.get("role") in ("user", "assistant") for m in messages):
+        raise ValueError("'messages' must be a list of user/assistant messages")
+    return [{"role": m["role"], "content": _message_text(m.get("content"))} for m in messages]
+
+async def list_histories(request: Request) -> Response:
+    store = get_history_store()
+    try:
+        offset = max(0, int(request.query_params.get("offset", 0)))
+        limit = min(SERVER_CONFIG["max_page_size"], max(1, int(request.query_params.get("limit", 20))))
+    except ValueError:
+        return _error(400, "'offset' and 'limit' must be integers")
+    query = request.query_params.get("q")
+    if query:
+        rows = await run_in_threadpool(store.search, query, limit)
+    else:
+        rows = await run_in_threadpool(store.list_page, offset, limit)
+    total = await run_in_threadpool(store.count)
+    return JSONResponse({"object": "list", "total": total,
+                         "data": [dict(_history_entry(row), **({"snippet": row["snippet"]} if query else {}))
+                                  for row in rows]})
+
+async def create_history(request: Request) -> Response:
+    try:
+        body = await _read_json(request)
+        turns = _history_turns(body.get("messages"))
+    except ValueError as e:
+        return _error(400, str(e))
+    question = next((turn["content"] for turn in turns if turn["role"] == "user"), None)
+    if not question:
+        return _error(400, "A history needs at least one user message")
+
+    def create():
+        store = get_history_store()
+        filepath = store.create(new_history_path(question), question, datetime.now().isoformat(), turns)
+        if body.get("name"):
+            filepath = store.rename(filepath, str(body["name"]))
+        return store.get(filepath)
+
+    return JSONResponse(_history_entry(await run_in_threadpool(create)), status_code=201)
+
+async def get_history(request: Request) -> Response:
+    store = get_history_store()
+    row = await run_in_threadpool(store.get, request.path_params["history_id"])
+    if row is None:
+        return _error(404, "History not found", "not_found")
+    try:
+        messages = await run_in_threadpool(store.load_transcript, row["filepath"])
+    except (OSError, ValueError) as e:
+        return _error(500, f"Could not read history: {e}", "server_error")
+    return JSONResponse(dict(_history_entry(row), messages=messages))
+
+async def update_history(request: Request) -> Response:
+    """Rename a history and/or append turns (the full transcript so far, as the UI saves it)"""
+    store = get_history_store()
+    row = await run_in_threadpool(store.get, request.path_params["history_id"])
+    if row is None:
+        return _error(404, "History not found", "not_found")
+    try:
+        body = await _read_json(request)
+        turns = _history_turns(body["messages"]) if "messages" in body else None
+    except ValueError as e:
+        return _error(400, str(e))
+
+    def update():
+        filepath = row["filepath"]
+        if turns is not None:
+            filepath = store.append_turns(filepath, turns)
+        if body.get("name"):
+            filepath = store.rename(filepath, str(body["name"]))
+        return store.get(filepath)
+
+    return JSONResponse(_history_entry(await run_in_threadpool(update)))
+
+async def delete_history(request: Request) -> Response:
+    store = get_history_store()
+    row = await run_in_threadpool(store.get, request.path_params["history_id"])
+    if row is None:
+        return _error(404, "History not found", "not_found")
+
+    def delete():
+        if os.path.exists(row["filepath"]):
+            os.remove(row["filepath"])
+        store.remove(row["filepath"])
+
+    await run_in_threadpool(delete)
+    return JSONResponse({"id": row["id"], "deleted": True})
+
+# --- health and metrics ---------------------------------------------------
+
+async def health(request: Request) -> Response:
+    backends = request.app.state.engine.pool.backends
+    healthy = [backend.name for backend in backends if backend.healthy]
+    status = "ok" if healthy else "unavailable"
+    return JSONResponse({"status": status, "backends": len(backends), "healthy": healthy},
+                        status_code=200 if healthy else 503)
+
+async def metrics(request: Request) -> Response:
+    pool = request.app.state.engine.pool
+    cache = get_response_cache()
+    return JSONResponse({
+        "uptime_seconds": round(time.monotonic() - request.app.state.started, 1),
+        "server": dict(_counters),
+        "streams": get_stream_registry().stats(),
+        "backends": pool.stats(),
+        "schedulers": {backend.name: backend.scheduler.metrics() for backend in pool.backends},
+        "single_flight": get_single_flight().stats(),
+        "response_cache": cache.stats() if cache else None,
+        "segment_cache": get_segment_cache().stats()
+    })
+
+# --- application ----------------------------------------------------------
+
+class BearerAuth:
+    """Require the configured API key on everything but /health"""
+
+    def __init__(self, app, api_key: Optional[str]):
+        self.app = app
+        self.expected = f"Bearer {api_key}".encode() if api_key else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            _counters["requests"] += 1
+            if self.expected and scope["path"] != "/health" and not hmac.compare_digest(
+                    dict(scope["headers"]).get(b"authorization", b""), self.expected):
+                _counters["unauthorized"] += 1
+                await _error(401, "Invalid API key", "invalid_api_key")(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+def create_app(mock: bool = False, api_key: Optional[str] = None):
+    """ASGI app; the engine is built when the server starts, on its event loop"""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.engine = build_engine(mock)
+        app.state.started = time.monotonic()
+        yield
+        await close_async_client()
+        await run_in_threadpool(lifecycle.shutdown)
+
+    app = Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/histories", list_histories, methods=["GET"]),
+        Route("/v1/histories", create_history, methods=["POST"]),
+        Route("/v1/histories/{history_id}", get_history, methods=["GET"]),
+        Route("/v1/histories/{history_id}", update_history, methods=["PATCH"]),
+        Route("/v1/histories/{history_id}", delete_history, methods=["DELETE"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"])
+    ], lifespan=lifespan)
+    return BearerAuth(app, api_key if api_key is not None else SERVER_CONFIG["api_key"])
+
+def raise_open_file_limit() -> Optional[int]:
+    """Every stream holds a socket: lift the soft descriptor limit to the hard one"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            return hard
+        except (ValueError, OSError):
+            pass
+    return soft
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the chatbot over an OpenAI-compatible HTTP API")
+    parser.add_argument("--host", default=SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"])
+    parser.add_argument("--mock", action="store_true", help="Use a local mock backend (no API calls)")
+    args = parser.parse_args()
+
+    limit = raise_open_file_limit()
+    print(f"🚀 Serving on http://{args.host}:{args.port} (open file limit {limit})")
+    uvicorn.run(create_app(args.mock), host=args.host, port=args.port, backlog=SERVER_CONFIG["backlog"],
+                timeout_graceful_shutdown=5, log_level="warning")
+
+if __name__ == "__main__":
+    main()
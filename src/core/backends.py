@@ -0,0 +1,277 @@
+"""
+Backend pool for the Java Expert Chatbot
+Several API keys and OpenAI-compatible endpoints behind one selection policy,
+each with its own rate limits, health and latency tracking
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from core.scheduler import RequestScheduler, get_scheduler
+from utils.config import API_CONFIG, BACKEND_CONFIG
+
+# Errors caused by the request itself: another backend would reject it too
+CLIENT_ERRORS = (400, 413, 422)
+
+class NoBackendError(Exception):
+    """Raised when the pool has no backend configured"""
+
+class Backend:
+    """One credential + endpoint, with live load, health and latency stats"""
+
+    def __init__(self, name: str, base_url: str, api_key: str, weight: float = 1.0,
+                 model: Optional[str] = None, scheduler: Optional[RequestScheduler] = None):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.weight = max(float(weight), 0.01)
+        self.model = model  # serve every request with this model (e.g. a local server)
+        self.scheduler = scheduler or RequestScheduler()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.ttft = None  # EWMA seconds to first token
+        self.latency = None  # EWMA seconds per completed request
+        self.last_error = None
+        self.current_weight = 0.0  # smooth weighted round-robin state
+
+    def headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def prepare(self, payload: dict) -> dict:
+        """Payload as this backend should receive it"""
+        return dict(payload, model=self.model) if self.model else payload
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until and self.scheduler.breaker.state != "open"
+
+    def load(self) -> float:
+        """Queued plus in-flight requests, relative to the backend's weight"""
+        metrics = self.scheduler.metrics()
+        queued = sum(metrics["queue_depth"].values())
+        return (self.in_flight + queued + (1 if metrics["paused_for"] else 0)) / self.weight
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ttft_ms": round(self.ttft * 1000) if self.ttft is not None else None,
+            "latency_ms": round(self.latency * 1000) if self.latency is not None else None,
+            "cooldown_for": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "last_error": self.last_error
+        }
+
+def _ewma(previous: Optional[float], sample: float) -> float:
+    alpha = BACKEND_CONFIG["latency_ewma_alpha"]
+    return sample if previous is None else alpha * sample + (1 - alpha) * previous
+
+class BackendPool:
+    """Pick a backend per request (least loaded or weighted round-robin) and track outcomes"""
+
+    def __init__(self, backends: List[Backend], strategy: Optional[str] = None):
+        if not backends:
+            raise NoBackendError("No API backend configured")
+        self.backends = backends
+        self.strategy = strategy or BACKEND_CONFIG["strategy"]
+        self.lock = threading.Lock()
+        self.failovers = 0
+
+    @classmethod
+    def single(cls, api_key: str, base_url: Optional[str] = None) -> "BackendPool":
+        """A pool of one backend sharing the process-wide scheduler"""
+        return cls([Backend("default", base_url or API_CONFIG["base_url"], api_key, scheduler=get_scheduler())])
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def _least_loaded(self, candidates: List[Backend]) -> Backend:
+        return min(candidates, key=lambda b: (b.load(), b.ttft if b.ttft is not None else 0.0))
+
+    def _weighted_round_robin(self, candidates: List[Backend]) -> Backend:
+        # Smooth WRR (as in nginx): spreads picks evenly in proportion to weight
+        total = sum(b.weight for b in candidates)
+        for backend in candidates:
+            backend.current_weight += backend.weight
+        chosen = max(candidates, key=lambda b: b.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    def select(self, exclude: Optional[set] = None) -> Backend:
+        """Choose a backend, preferring healthy ones not already tried for this request"""
+        exclude = exclude or set()
+        with self.lock:
+            candidates = [b for b in self.backends if b.name not in exclude]
+            healthy = [b for b in candidates if b.healthy]
+            if healthy:
+                candidates = healthy
+            elif not candidates:
+                candidates = self.backends
+            if self.strategy == "weighted_round_robin":
+                backend = self._weighted_round_robin(candidates)
+            else:
+                backend = self._least_loaded(candidates)
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def has_alternative(self, exclude: set) -> bool:
+        return any(b.name not in exclude for b in self.backends)
+
+    def record_first_token(self, backend: Backend, seconds: float):
+        with self.lock:
+            backend.ttft = _ewma(backend.ttft, seconds)
+
+    def record_success(self, backend: Backend, seconds: float):
+        with self.lock:
+            backend.in_flight -= 1
+            backend.consecutive_failures = 0
+            backend.latency = _ewma(backend.latency, seconds)
+
+    def record_failure(self, backend: Backend, error: str, status_code: Optional[int] = None):
+        """Count a failure and keep the backend out of rotation for a growing cooldown"""
+        with self.lock:
+            backend.in_flight -= 1
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            backend.last_error = error[:200]
+            if status_code in CLIENT_ERRORS:
+                backend.consecutive_failures = 0
+                return
+            if status_code in (401, 403):
+                cooldown = BACKEND_CONFIG["auth_failure_cooldown"]
+            else:
+                cooldown = min(BACKEND_CONFIG["max_cooldown"],
+                               BACKEND_CONFIG["failure_cooldown"] * 2 ** (backend.consecutive_failures - 1))
+            backend.cooldown_until = time.monotonic() + cooldown
+
+    def record_cancelled(self, backend: Backend):
+        with self.lock:
+            backend.in_flight -= 1
+
+    def failover(self, backend: Backend, tried: set, status_code: Optional[int] = None) -> bool:
+        """Mark the backend as tried; True if the request should move to another one"""
+        tried.add(backend.name)
+        if status_code in CLIENT_ERRORS:
+            return False
+        if len(tried) > BACKEND_CONFIG["max_failovers"] or not self.has_alternative(tried):
+            return False
+        with self.lock:
+            self.failovers += 1
+        return True
+
+    def call(self, send: Callable[[Backend], httpx.Response]) -> httpx.Response:
+        """Run a blocking request on a selected backend, failing over on errors"""
+        tried = set()
+        while True:
+            backend = self.select(tried)
+            started = time.monotonic()
+            try:
+                response = send(backend)
+            except Exception as e:
+                self.record_failure(backend, str(e) or type(e).__name__)
+                if not self.failover(backend, tried):
+                    raise
+                continue
+            if response.status_code == 200:
+                self.record_success(backend, time.monotonic() - started)
+                return response
+            self.record_failure(backend, f"HTTP {response.status_code}", response.status_code)
+            if not self.failover(backend, tried, response.status_code):
+                return response
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "strategy": self.strategy,
+                "failovers": self.failovers,
+                "backends": {b.name: b.stats() for b in self.backends}
+            }
+
+def load_backend_specs(lookup: Optional[Callable[[str], Optional[str]]] = None) -> List[Dict]:
+    """
+    Collect backend definitions from secrets/environment. `lookup` is tried
+    first for each name (e.g. Streamlit secrets), then os.environ.
+    """
+    def get(name: str) -> Optional[str]:
+        value = None
+        if lookup is not None:
+            try:
+                value = lookup(name)
+            except Exception:
+                value = None
+        return value or os.getenv(name)
+
+    keys = [k.strip() for k in (get("GROQ_API_KEYS") or "").split(",") if k.strip()]
+    for name in ["GROQ_API_KEY"] + [f"GROQ_API_KEY_{i}" for i in range(2, 10)]:
+        key = get(name)
+        if key and key not in keys:
+            keys.append(key)
+
+    specs = [{"name": f"groq-{i + 1}", "base_url": API_CONFIG["base_url"], "api_key": key}
+             for i, key in enumerate(keys)]
+
+    local_url = get("LOCAL_LLM_URL")
+    if local_url:
+        specs.append({
+            "name": "local",
+            "base_url": local_url,
+            "api_key": get("LOCAL_LLM_API_KEY") or BACKEND_CONFIG["local_api_key"],
+            "weight": float(get("LOCAL_LLM_WEIGHT") or 1),
+            "model": get("LOCAL_LLM_MODEL")
+        })
+
+    extra = get("LLM_BACKENDS")
+    if extra:
+        for i, spec in enumerate(json.loads(extra)):
+            spec = dict(spec)
+            spec.setdefault("name", f"backend-{i + 1}")
+            if "api_key_env" in spec:
+                spec["api_key"] = get(spec.pop("api_key_env"))
+            if spec.get("api_key"):
+                specs.append(spec)
+    return specs
+
+def build_backend_pool(specs: List[Dict], strategy: Optional[str] = None) -> BackendPool:
+    """Create a pool; a lone backend shares the global scheduler, several get one each"""
+    if len(specs) == 1:
+        spec = specs[0]
+        backend = Backend(spec["name"], spec["base_url"], spec["api_key"], spec.get("weight", 1.0),
+                          spec.get("model"), scheduler=get_scheduler())
+        return BackendPool([backend], strategy)
+    overrides = {"max_retries": BACKEND_CONFIG["retries_per_backend"]}
+    backends = []
+    for spec in specs:
+        limits = {key: spec[key] for key in ("requests_per_minute", "tokens_per_minute") if key in spec}
+        backends.append(Backend(spec["name"], spec["base_url"], spec["api_key"], spec.get("weight", 1.0),
+                                spec.get("model"), scheduler=RequestScheduler(dict(overrides, **limits))))
+    return BackendPool(backends, strategy)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_backend_pool(specs: Optional[List[Dict]] = None) -> BackendPool:
+    """
+    Return the process-wide backend pool, built on first use from `specs`
+    (or the environment). Later calls return the same pool.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = build_backend_pool(specs if specs is not None else load_backend_specs())
+    return _pool
@@ -0,0 +1,197 @@
+"""
+Headless batch mode for the Java Expert Chatbot
+Answers a JSONL file of questions with bounded concurrency through the chat
+engine. Results are streamed to a JSONL file that doubles as the checkpoint:
+re-running the same command skips questions that already have an answer.
+
+    cd src && python -m core.batch questions.jsonl answers.jsonl --concurrency 8
+    cd src && python -m core.batch questions.jsonl answers.jsonl --mock   # offline
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+from core.chat import GroqJavaChatbot
+from core.engine import ChatEngine, build_engine
+from core.progress import StreamProgress
+from core.scheduler import BACKGROUND
+from core.transport import close_async_client
+from utils.config import BATCH_CONFIG
+
+def read_questions(path: str) -> Iterator[dict]:
+    """Yield {"id", "question"} records; ids default to the line number"""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"⚠️ Skipping line {number}: not valid JSON")
+                continue
+            if isinstance(record, str):
+                record = {"question": record}
+            question = record.get("question") or record.get("query")
+            if not question:
+                print(f"⚠️ Skipping line {number}: no question")
+                continue
+            yield {"id": str(record.get("id", f"line-{number}")), "question": question}
+
+def read_checkpoint(path: str, retry_failed: bool = True) -> set:
+    """Ids already answered in an existing output file (a torn last line is ignored)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(str(record.get("id")))
+    return done
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+class BatchWriter:
+    """Append results as JSON lines, flushed one by one so a crash loses at most one line"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        torn = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self.file = open(path, "a", encoding="utf-8")
+        if torn:
+            # Start on a fresh line if the previous run died mid-write
+            self.file.write("\n")
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+async def answer_one(chatbot: GroqJavaChatbot, item: dict) -> dict:
+    """Stream one answer and measure it"""
+    progress = StreamProgress()
+    parts = []
+    record = {"id": item["id"], "question": item["question"]}
+    try:
+        async for content in chatbot.astream_response(item["question"], priority=BACKGROUND, progress=progress):
+            progress.token()
+            parts.append(content)
+        progress.finish()
+        record.update(status="ok", answer="".join(parts))
+    except Exception as e:
+        progress.finish()
+        record.update(status="error", error=str(e) or type(e).__name__, answer="".join(parts) or None)
+    route = chatbot.last_route
+    record.update(
+        model=route.model if route else None,
+        route=route.name if route else None,
+        cached=chatbot.last_cache_hit,
+        tokens=progress.tokens,
+        ttft_ms=round(progress.ttft * 1000, 1) if progress.ttft is not None else None,
+        latency_ms=round(progress.elapsed * 1000, 1)
+    )
+    return record
+
+async def run_batch(items: List[dict], writer: BatchWriter, engine: ChatEngine,
+                    concurrency: int) -> Dict:
+    """Answer items with at most `concurrency` streams in flight"""
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    results = []
+    started = time.monotonic()
+
+    async def worker():
+        # One chatbot per worker: its per-request state is never shared between streams
+        chatbot = GroqJavaChatbot(engine=engine)
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await answer_one(chatbot, item)
+            writer.write(record)
+            results.append(record)
+            if len(results) % BATCH_CONFIG["progress_every"] == 0 or len(results) == len(items):
+                print(f"  {len(results)}/{len(items)} answered "
+                      f"({len(results) / (time.monotonic() - started):.2f}/s)")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        await close_async_client()
+    return summarize(results, time.monotonic() - started)
+
+def summarize(results: List[dict], elapsed: float) -> Dict:
+    latencies = [r["latency_ms"] for r in results if r["status"] == "ok"]
+    ttfts = [r["ttft_ms"] for r in results if r["status"] == "ok" and r["ttft_ms"] is not None]
+    tokens = sum(r["tokens"] for r in results)
+    return {
+        "answered": len(latencies),
+        "failed": len(results) - len(latencies),
+        "cached": sum(1 for r in results if r["cached"]),
+        "elapsed_seconds": round(elapsed, 2),
+        "answers_per_second": round(len(results) / elapsed, 3) if elapsed else 0.0,
+        "tokens_per_second": round(tokens / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {f"p{p}": percentile(latencies, p) for p in (50, 90, 99)},
+        "ttft_ms": {f"p{p}": percentile(ttfts, p) for p in (50, 90, 99)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions")
+    parser.add_argument("input", help='JSONL with one {"id": ..., "question": ...} per line')
+    parser.add_argument("output", help="JSONL results; also the checkpoint to resume from")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONFIG["concurrency"])
+    parser.add_argument("--limit", type=int, default=0, help="Answer at most N new questions")
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry questions that failed before")
+    parser.add_argument("--mock", action="store_true", help="Use a local mock backend (no API calls)")
+    parser.add_argument("--report", help="Also write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    done = read_checkpoint(args.output, retry_failed=not args.skip_failed)
+    items = [item for item in read_questions(args.input) if item["id"] not in done]
+    if args.limit:
+        items = items[:args.limit]
+    print(f"📋 {len(items)} questions to answer ({len(done)} already in {args.output})")
+    if not items:
+        return
+
+    engine = build_engine(args.mock)
+    writer = BatchWriter(args.output)
+    try:
+        summary = asyncio.run(run_batch(items, writer, engine, args.concurrency))
+    finally:
+        writer.close()
+
+    print(f"✅ {summary['answered']} answered, {summary['failed']} failed, {summary['cached']} from cache "
+          f"in {summary['elapsed_seconds']}s ({summary['answers_per_second']} answers/s, "
+          f"{summary['tokens_per_second']} tokens/s)")
+    print(f"⏱️ latency p50/p90/p99: {summary['latency_ms']['p50']}/{summary['latency_ms']['p90']}/"
+          f"{summary['latency_ms']['p99']} ms, first token p50/p90/p99: {summary['ttft_ms']['p50']}/"
+          f"{summary['ttft_ms']['p90']}/{summary['ttft_ms']['p99']} ms")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Response cache for the Java Expert Chatbot
+In-memory LRU in front of an on-disk tier, with an optional near-duplicate tier
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from utils.config import CACHE_CONFIG
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"[a-z0-9+#@]+")
+_STOPWORDS = frozenset(
+    "a an and are can do does for how i in is it my of on or should the to what when where which why with you".split()
+)
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse whitespace. Case is kept: it matters for Java identifiers and code,
+    so this is shared by the cache key and the request coalescing key.
+    """
+    return " ".join(text.split())
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and drop trailing punctuation"""
+    return normalize_text(query).rstrip(" ?!.")
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def cache_scope(model: str, system_prompt: str, temperature: float) -> str:
+    """Everything except the query that changes the answer"""
+    return f"{model}|{prompt_hash(system_prompt)}|{temperature}"
+
+def cache_key(query: str, model: str, system_prompt: str, temperature: float) -> str:
+    raw = f"{cache_scope(model, system_prompt, temperature)}|{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class MinHashIndex:
+    """Tiny MinHash index for near-duplicate question lookup"""
+
+    def __init__(self, num_perm: int, threshold: float):
+        rng = random.Random(1337)
+        self.permutations = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+        self.threshold = threshold
+        self.entries = {}  # scope -> {key: signature}
+
+    def signature(self, text: str) -> List[int]:
+        shingles = {w for w in _WORD_RE.findall(normalize_query(text).lower()) if w not in _STOPWORDS} or {""}
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+                  for s in shingles]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self.permutations]
+
+    def add(self, scope: str, key: str, query: str):
+        self.entries.setdefault(scope, {})[key] = self.signature(query)
+
+    def remove(self, key: str):
+        for entries in self.entries.values():
+            entries.pop(key, None)
+
+    def query(self, scope: str, query: str) -> Optional[str]:
+        """Return the key of the most similar cached question above the threshold"""
+        candidates = self.entries.get(scope)
+        if not candidates:
+            return None
+        signature = self.signature(query)
+        best_key, best_score = None, 0.0
+        for key, other in candidates.items():
+            score = sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key if best_score >= self.threshold else None
+
+class ResponseCache:
+    """Two-tier (memory LRU + disk) response cache with hit/miss counters"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None, max_disk_bytes: Optional[int] = None,
+                 semantic: Optional[bool] = None):
+        self.cache_dir = cache_dir or CACHE_CONFIG["disk_dir"]
+        self.max_entries = max_entries or CACHE_CONFIG["memory_max_entries"]
+        self.ttl = ttl or CACHE_CONFIG["ttl_seconds"]
+        self.max_disk_bytes = max_disk_bytes or CACHE_CONFIG["disk_max_bytes"]
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+
+        use_semantic = CACHE_CONFIG["semantic_enabled"] if semantic is None else semantic
+        self.semantic = (MinHashIndex(CACHE_CONFIG["semantic_num_perm"], CACHE_CONFIG["semantic_threshold"])
+                         if use_semantic else None)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self.semantic is not None:
+            self._load_semantic_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, entry: dict) -> bool:
+        return time.time() - entry["created"] > self.ttl
+
+    def _remember(self, key: str, entry: dict):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry):
+            self._delete(key)
+            return None
+        return entry
+
+    def _delete(self, key: str):
+        self.memory.pop(key, None)
+        if self.semantic is not None:
+            self.semantic.remove(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _lookup(self, key: str) -> Tuple[Optional[dict], Optional[str]]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            if not self._expired(entry):
+                self.memory.move_to_end(key)
+                return entry, "memory_hits"
+            self._delete(key)
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+            return entry, "disk_hits"
+        return None, None
+
+    def get(self, query: str, model: str, system_prompt: str, temperature: float) -> Optional[str]:
+        """Return a cached response for the request, or None"""
+        key = cache_key(query, model, system_prompt, temperature)
+        with self.lock:
+            entry, tier = self._lookup(key)
+            if entry is None and self.semantic is not None:
+                similar = self.semantic.query(cache_scope(model, system_prompt, temperature), query)
+                if similar is not None:
+                    entry, _ = self._lookup(similar)
+                    tier = "semantic_hits"
+            self.counters[tier if entry is not None else "misses"] += 1
+            return entry["response"] if entry is not None else None
+
+    def put(self, query: str, model: str, system_prompt: str, temperature: float, response: str):
+        """Store a completed response in both tiers"""
+        key = cache_key(query, model, system_prompt, temperature)
+        scope = cache_scope(model, system_prompt, temperature)
+        entry = {"query": query, "scope": scope, "created": time.time(), "response": response}
+        with self.lock:
+            self._remember(key, entry)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+            if self.semantic is not None:
+                self.semantic.add(scope, key, query)
+            self.counters["stores"] += 1
+            self._evict_disk()
+
+    def invalidate(self, scope: Optional[str] = None):
+        """Drop every entry, or only those cached under the given scope"""
+        with self.lock:
+            for filename in os.listdir(self.cache_dir):
+                if not filename.endswith(".json"):
+                    continue
+                key = filename[:-5]
+                if scope is not None:
+                    entry = self._read_disk(key)
+                    if entry is None or entry.get("scope") != scope:
+                        continue
+                self._delete(key)
+
+    def _evict_disk(self):
+        """Remove expired files, then the oldest until under the size budget"""
+        files = []
+        total = 0
+        now = time.time()
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl:
+                self._delete(entry.name[:-5])
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.name[:-5]))
+            total += stat.st_size
+        files.sort()
+        for _, size, key in files:
+            if total <= self.max_disk_bytes:
+                break
+            self._delete(key)
+            total -= size
+
+    def _load_semantic_index(self):
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".json"):
+                entry = self._read_disk(filename[:-5])
+                if entry is not None:
+                    self.semantic.add(entry["scope"], filename[:-5], entry["query"])
+
+    def stats(self) -> dict:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["semantic_hits"]
+        lookups = hits + self.counters["misses"]
+        return dict(self.counters, hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                    memory_entries=len(self.memory))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled"""
+    global _cache
+    if not CACHE_CONFIG["enabled"]:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+def iter_cached_chunks(response: str, chunk_chars: Optional[int] = None):
+    """Split a cached answer into chunks so it replays through the streaming path"""
+    size = chunk_chars or CACHE_CONFIG["replay_chunk_chars"]
+    for i in range(0, len(response), size):
+        yield response[i:i + size]
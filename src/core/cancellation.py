@@ -0,0 +1,172 @@
+"""
+Stream cancellation for the Java Expert Chatbot
+Cancellation tokens passed from the UI down to the HTTP stream, a registry of
+active streams, and a reaper for streams whose session has gone away
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from core.lifecycle import on_shutdown
+from utils.config import CANCEL_CONFIG
+
+class StreamCancelled(Exception):
+    """Raised in the consumer when its stream was cancelled"""
+
+class CancellationToken:
+    """Thread-safe flag that runs registered callbacks once when cancelled"""
+
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.reason = None
+        self.finished = False
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel once; returns False if already cancelled or finished"""
+        with self._lock:
+            if self._event.is_set() or self.finished:
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run callback on cancellation (immediately if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def finish(self):
+        """Mark the work as complete so later cancels are no-ops"""
+        with self._lock:
+            self.finished = True
+            self._callbacks = []
+
+class _ActiveStream:
+    __slots__ = ("token", "started", "tokens_received")
+
+    def __init__(self, token: CancellationToken):
+        self.token = token
+        self.started = time.monotonic()
+        self.tokens_received = 0
+
+class StreamRegistry:
+    """Active streams by token, with counters for what cancellation saved"""
+
+    def __init__(self):
+        self.active: Dict[int, _ActiveStream] = {}
+        self.lock = threading.Lock()
+        self.completed_tokens = []  # recent completed stream lengths, for the savings estimate
+        self.counters = {"completed": 0, "cancelled": 0, "reaped": 0,
+                         "tokens_received_before_cancel": 0, "tokens_saved_estimate": 0}
+        self.cancel_reasons: Dict[str, int] = {}
+
+    def register(self, token: CancellationToken):
+        with self.lock:
+            self.active[id(token)] = _ActiveStream(token)
+
+    def record_tokens(self, token: CancellationToken, count: int = 1):
+        stream = self.active.get(id(token))
+        if stream is not None:
+            stream.tokens_received += count
+
+    def expected_tokens(self) -> float:
+        if not self.completed_tokens:
+            return CANCEL_CONFIG["default_expected_tokens"]
+        return sum(self.completed_tokens) / len(self.completed_tokens)
+
+    def unregister(self, token: CancellationToken):
+        """Account a finished or cancelled stream"""
+        with self.lock:
+            stream = self.active.pop(id(token), None)
+            if stream is None:
+                return
+            if token.cancelled:
+                self.counters["cancelled"] += 1
+                self.counters["tokens_received_before_cancel"] += stream.tokens_received
+                self.counters["tokens_saved_estimate"] += int(max(0.0, self.expected_tokens() - stream.tokens_received))
+                self.cancel_reasons[token.reason] = self.cancel_reasons.get(token.reason, 0) + 1
+            else:
+                self.counters["completed"] += 1
+                self.completed_tokens.append(stream.tokens_received)
+                del self.completed_tokens[:-CANCEL_CONFIG["expected_tokens_window"]]
+
+    def reap(self, is_session_alive: Callable[[str], bool]) -> int:
+        """Cancel streams whose session is gone or that outlived the maximum age"""
+        now = time.monotonic()
+        with self.lock:
+            streams = list(self.active.values())
+        reaped = 0
+        for stream in streams:
+            token = stream.token
+            orphaned = token.session_id is not None and not is_session_alive(token.session_id)
+            if orphaned or now - stream.started > CANCEL_CONFIG["max_stream_age"]:
+                if token.cancel("session_gone" if orphaned else "max_age"):
+                    reaped += 1
+        with self.lock:
+            self.counters["reaped"] += reaped
+        return reaped
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.counters, active=len(self.active), reasons=dict(self.cancel_reasons),
+                        expected_tokens=round(self.expected_tokens()))
+
+_registry = None
+_registry_lock = threading.Lock()
+_reaper_thread = None
+_reaper_stop = threading.Event()
+
+def get_stream_registry() -> StreamRegistry:
+    """Return the process-wide registry of active streams"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = StreamRegistry()
+    return _registry
+
+def _reaper_loop(is_session_alive: Callable[[str], bool]):
+    registry = get_stream_registry()
+    while not _reaper_stop.wait(CANCEL_CONFIG["reaper_interval"]):
+        try:
+            reaped = registry.reap(is_session_alive)
+        except Exception as e:
+            print(f"⚠️ Stream reaper error: {e}")
+            continue
+        if reaped:
+            print(f"🧹 Reaped {reaped} orphaned stream(s)")
+
+def start_stream_reaper(is_session_alive: Callable[[str], bool]) -> bool:
+    """Start the reaper thread once per process; returns True if it was started now"""
+    global _reaper_thread
+    with _registry_lock:
+        if _reaper_thread is not None:
+            return False
+        _reaper_thread = threading.Thread(target=_reaper_loop, args=(is_session_alive,),
+                                          name="stream-reaper", daemon=True)
+        _reaper_thread.start()
+    on_shutdown("stream reaper", stop_stream_reaper)
+    return True
+
+def stop_stream_reaper():
+    """Stop the reaper and cancel every stream still running"""
+    _reaper_stop.set()
+    registry = get_stream_registry()
+    with registry.lock:
+        tokens = [stream.token for stream in registry.active.values()]
+    for token in tokens:
+        token.cancel("shutdown")
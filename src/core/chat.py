@@ -1,361 +1,121 @@
-import requests
+import httpx
 import json
 import os
-from typing import Dict, List, Optional
+import time
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
+from core.backends import Backend, BackendPool
+from core.cancellation import CancellationToken, StreamCancelled, get_stream_registry
+from core.cache import get_response_cache, iter_cached_chunks
+from core.context import ConversationContext, count_message_tokens
+from core.progress import StreamProgress
+from core.prompts import get_prompt
+from core.engine import ChatEngine, ChatEngineError, get_engine_loop
+from core.render import RenderScheduler
+from core.router import Route, get_model_router
+from core.scheduler import INTERACTIVE
+from core.topics import TopicMatch, get_topic_classifier, topic_label
+from core.transport import post_json
+from utils.config import API_CONFIG, RENDER_CONFIG, TOPIC_CONFIG
 
 class JavaChatbot:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 pool: Optional[BackendPool] = None):
         """
-        Initialize the Java Chatbot with Groq API key
+        Initialize the Java Chatbot with a Groq API key, or a pool of backends
         """
-        self.api_key = api_key
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.pool = pool or BackendPool.single(api_key, base_url)
+        self.api_key = self.pool.backends[0].api_key
+        self.base_url = self.pool.backends[0].base_url
         self.conversation_history = []
+        self.context = ConversationContext()
+        self.last_prompt_tokens = 0
+        self.last_route = None
         
-        # Define knowledge base for Java topics
-        self.java_topics = {
-            "core_java": [
-                "variables", "data types", "operators", "control structures",
-                "loops", "arrays", "methods", "classes", "objects", "inheritance",
-                "polymorphism", "encapsulation", "abstraction", "interfaces",
-                "exceptions", "collections", "generics", "threads", "lambda expressions"
-            ],
-            "spring_boot": [
-                "annotations", "dependency injection", "rest controllers", "jpa",
-                "hibernate", "configuration", "profiles", "actuator", "security",
-                "testing", "microservices", "data access", "web mvc"
-            ]
-        }
-
-    def create_system_prompt(self) -> str:
-        return """
-        You are a highly skilled Java and Spring Boot mentor. 
-        Your task is to generate clear, structured, and enterprise-grade explanations 
-        for any question about Java, Core Java, or Spring Boot.
-
-        Follow this response structure every time:
-
-        🤖 Secure & MVC-Compliant Response:
-        -------------------------------------
-        # Concept Explanation
-        - Explain the concept in simple, beginner-friendly terms.
-        - Use short examples where necessary.
-
-        # Security Considerations
-        - Explain how the concept should be applied securely in enterprise systems.
-        - Cover validation, data protection, authentication, and safe coding practices.
-
-        # Full Code Example (Enterprise Package Structure)
-        - Provide a runnable Spring Boot example with correct package structure.
-        - Include DTOs, Service, Repository, Controller, Config, Exception handling.
-        - Ensure the code follows SOLID principles and is security-aware.
-        - Always show `application.yml` for relevant configs.
-
-        # Step-by-Step Explanation
-        - Walk through how each part of the code works and why it's important.
-
-        # Best Practices & Performance Tips
-        - List modern Java + Spring Boot best practices.
-        - Emphasize secure, scalable, and maintainable design.
-
-        # Common Mistakes to Avoid
-        - Show common pitfalls and why they should be avoided.
-
-        # Related Concepts
-        - Provide links to related Java/Spring Boot topics (conceptual references).
-
-        # Testing Example
-        - Provide JUnit/MockMvc/DataJpaTest snippets to validate correctness.
-
-        # Summary
-        - End with a short recap of what was explained.
-
-        MANDATORY REQUIREMENTS:
-
-        1. SECURITY FIRST:
-        - Always validate inputs (Bean Validation, regex, sanitization).
-        - Use strong password handling (BCrypt, never plain text).
-        - Prevent SQL Injection (use JPA, parameterized queries).
-        - Implement CSRF protection in web apps.
-        - Apply authentication & authorization (JWT/OAuth2/Role-based).
-        - Never expose sensitive data in logs or responses.
-        - Include audit logging for critical events.
-
-        2. MVC ARCHITECTURE COMPLIANCE:
-        - Model: Entities with JPA + validation annotations.
-        - DTOs: Separate request/response models (never expose entities directly).
-        - Repository: Data access only.
-        - Service: Business logic with @Transactional.
-        - Controller: REST endpoints, validation, proper HTTP status codes.
-        - Configuration: Proper use of application.yml and profiles.
-
-        3. ENTERPRISE STANDARDS:
-        - Use Java conventions, SOLID principles, and design patterns.
-        - Include logging, exception handling, and comprehensive testing.
-        - Show proper equals(), hashCode(), and builder patterns where needed.
-        - Provide complete runnable code with package structure and imports.
-        - Use correct annotations (@RestController, @Service, @Repository).
-        - Show dependency injection with constructor injection (preferred).
-        - Include actuator monitoring and transaction management.
-
-        4. ADVANCED ENTERPRISE PATTERNS (MANDATORY):
-        
-        A. DTO ↔ Entity Mapping:
-        - NEVER use manual mapping in services (avoid repetitive mapping code)
-        - ALWAYS use MapStruct for type-safe, compile-time mapping
-        - Show @Mapper interfaces with @Mapping annotations
-        - Include mapping for nested objects and collections
-        - Demonstrate bidirectional mapping (Entity→DTO and DTO→Entity)
-        
-        B. Structured Error Responses:
-        - NEVER return raw strings from GlobalExceptionHandler
-        - ALWAYS return structured JSON with consistent format
-        - Include: {"error": "message", "code": "ERROR_CODE", "timestamp": "...", "path": "...}
-        - Show proper HTTP status codes for different error types
-        - Include validation error details with field-specific messages
-        
-        C. Complete Security Implementation:
-        - ALWAYS include JwtAuthenticationFilter implementation
-        - Show complete JWT token validation and parsing
-        - Include proper exception handling in security filters
-        - Demonstrate SecurityContext population with user details
-        
-        D. Audit Trail Implementation:
-        - ALWAYS implement AuditorAware<String> for audit fields
-        - Show integration with JWT to extract current user for created_by/updated_by
-        - Include @EnableJpaAuditing configuration
-        - Demonstrate audit fields in base entities (createdBy, lastModifiedBy)
-
-        5. CODE QUALITY REQUIREMENTS:
-        - MapStruct mapping interfaces for all DTO conversions
-        - Structured error response DTOs with consistent format
-        - Complete JWT filter implementation with proper error handling
-        - AuditorAware implementation extracting user from SecurityContext
-        - Comprehensive validation with custom error messages
-        - Proper transaction boundaries and rollback scenarios
-        - Performance optimizations (pagination, projections, caching)
+        # Weighted keyword knowledge base for Java topics (shared with the topic classifier)
+        self.java_topics = TOPIC_CONFIG["keywords"]
 
-        6. COMPLETENESS REQUIREMENT:
-        - Never truncate or give partial code.
-        - Always provide working, runnable examples.
-        - Include ALL necessary methods, classes, and configurations.
-        - Show full configuration files when relevant.
-        - Provide comprehensive test examples.
-        - Include MapStruct configuration and dependencies.
-        - Show complete security filter chain configuration.
-        - Demonstrate audit configuration and implementation.
+    def create_system_prompt(self, route: Optional[Route] = None) -> str:
+        """Shared response-structure prefix plus the detailed enterprise requirements"""
+        return get_prompt(route.system_prompt if route else "system_enterprise").text
 
-        EXAMPLES TO ALWAYS INCLUDE:
-
-        ```java
-        // MapStruct Mapper Example
-        @Mapper(componentModel = "spring", unmappedTargetPolicy = ReportingPolicy.IGNORE)
-        public interface ProductMapper {
-            ProductResponseDto toDto(Product product);
-            Product toEntity(ProductRequestDto dto);
-            @Mapping(target = "id", ignore = true)
-            @Mapping(target = "createdAt", ignore = true)
-            Product toEntityForCreate(ProductRequestDto dto);
-        }
-
-        // Structured Error Response Example
-        @Data
-        @Builder
-        public class ErrorResponse {
-            private String error;
-            private String code;
-            private LocalDateTime timestamp;
-            private String path;
-            private Map<String, String> validationErrors;
-        }
-
-        // JWT Filter Implementation Example
-        @Component
-        public class JwtAuthenticationFilter extends OncePerRequestFilter {
-            // Complete implementation with error handling
-        }
-
-        // AuditorAware Implementation Example
-        @Component
-        public class AuditorAwareImpl implements AuditorAware<String> {
-            @Override
-            public Optional<String> getCurrentAuditor() {
-                Authentication auth = SecurityContextHolder.getContext().getAuthentication();
-                return Optional.ofNullable(auth)
-                    .filter(Authentication::isAuthenticated)
-                    .map(Authentication::getName);
-            }
-        }
-        """
+    def classify_java_topic(self, query: str) -> TopicMatch:
+        """Best topic for the query with a confidence score"""
+        return get_topic_classifier().classify(query)
 
     def detect_java_topic(self, query: str) -> str:
-        query_lower = query.lower()
-        
-        spring_keywords = [
-            "spring", "boot", "annotation", "controller", "service", "repository",
-            "autowired", "component", "restcontroller", "requestmapping",
-            "jpa", "hibernate", "entity", "configuration", "profile", "security",
-            "authentication", "authorization", "jwt", "oauth", "rest", "api"
-        ]
-        
-        core_keywords = [
-            "class", "object", "inheritance", "polymorphism", "interface",
-            "abstract", "exception", "collection", "arraylist", "hashmap",
-            "thread", "lambda", "stream", "generic", "enum", "serialization"
-        ]
-        
-        spring_matches = sum(1 for keyword in spring_keywords if keyword in query_lower)
-        core_matches = sum(1 for keyword in core_keywords if keyword in query_lower)
-        
-        if spring_matches > core_matches:
-            return "spring_boot"
-        else:
-            return "core_java"
+        return self.classify_java_topic(query).topic
     
-    def enhance_prompt_with_context(self, user_query: str) -> str:
-        topic = self.detect_java_topic(user_query)
-        
-        context = f"""
-        User Query: {user_query}
-        
-        Detected Topic: {topic.replace('_', ' ').title()}
-        
-        MANDATORY REQUIREMENTS for your response:
-        
-        1. SECURITY REQUIREMENTS:
-        - Include proper input validation (Bean Validation annotations)
-        - Show secure password handling (BCrypt encoding)
-        - Implement proper exception handling
-        - Include CSRF protection if web-related
-        - Show SQL injection prevention
-        - Include proper authentication/authorization if applicable
-        - Never expose sensitive data
-        - Add audit logging for security events
+    def enhance_prompt_with_context(self, user_query: str, route: Optional[Route] = None) -> str:
+        topic = route.features.topic if route else self.detect_java_topic(user_query)
         
-        2. MVC ARCHITECTURE REQUIREMENTS:
-        - Model: Entities with JPA annotations, validation, audit fields
-        - View: Separate DTOs for requests/responses
-        - Controller: HTTP handling, validation, proper status codes
-        - Service: Business logic with @Transactional
-        - Repository: Data access with proper query methods
-        - Show complete layer separation
+        context = get_prompt(route.user_prompt if route else "user_enhanced").render(
+            user_query=user_query,
+            topic=topic_label(topic)
+        )
         
-        3. ENTERPRISE PATTERNS (CRITICAL):
-        
-        A. DTO Mapping Requirements:
-        - MUST use MapStruct for all Entity ↔ DTO conversions
-        - NEVER write manual mapping code in services
-        - Show @Mapper interface with proper annotations
-        - Include bidirectional mapping methods
-        - Demonstrate nested object mapping
-        
-        B. Error Response Requirements:
-        - MUST return structured JSON error responses
-        - NEVER return raw strings from exception handlers
-        - Include error code, message, timestamp, and path
-        - Show validation error handling with field details
-        - Use consistent error response format across all endpoints
-        
-        C. Security Implementation Requirements:
-        - MUST include complete JwtAuthenticationFilter implementation
-        - Show JWT token parsing and validation logic
-        - Include proper security exception handling
-        - Demonstrate SecurityContext population
-        
-        D. Audit Trail Requirements:
-        - MUST implement AuditorAware<String> for audit fields
-        - Show integration with JWT to extract current user
-        - Include @EnableJpaAuditing configuration
-        - Demonstrate createdBy/lastModifiedBy field population
-        
-        4. CODE QUALITY REQUIREMENTS:
-        - Include all necessary imports and annotations
-        - Show proper package structure
-        - Add comprehensive error handling
-        - Include logging statements
-        - Follow Java naming conventions
-        - Use appropriate design patterns
-        - Show configuration examples (application.yml)
-        - Include MapStruct dependency configuration
+        return context
+    
+    def _request(self, user_query: str, route: Route) -> httpx.Response:
+        enhanced_query = self.enhance_prompt_with_context(user_query, route)
         
-        5. PROVIDE COMPLETE EXAMPLES:
-        - Entity classes with audit fields
-        - MapStruct mapper interfaces
-        - Structured error response DTOs
-        - Complete JWT filter implementation
-        - AuditorAware implementation
-        - Repository interfaces
-        - Service classes using MapStruct
-        - Controller classes with proper error handling
-        - Configuration classes
-        - Unit test examples
+        # History holds raw user text; only the current turn gets the enhanced prompt
+        messages = (
+            [{"role": "system", "content": self.create_system_prompt(route)}]
+            + self.context.fit_history(self.conversation_history)
+            + [{"role": "user", "content": enhanced_query}]
+        )
+        self.last_prompt_tokens = count_message_tokens(messages)
         
-        6. COMPLETENESS REQUIREMENT:
-        - Provide COMPLETE implementations without truncation
-        - Include all necessary methods and classes
-        - Show full configuration files (pom.xml, application.yml)
-        - Provide working, runnable code examples
-        - Include MapStruct configuration and usage
-        - Show complete security filter chain setup
-        - Demonstrate audit configuration
+        payload = {
+            "model": route.model,
+            "messages": messages,
+            "max_tokens": route.max_tokens,
+            "temperature": API_CONFIG["temperature"],
+            "top_p": API_CONFIG["top_p"],
+            "stream": False
+        }
         
-        Make sure your response is production-ready and follows enterprise-level standards.
-        Include everything needed to implement the solution completely with MapStruct, 
-        structured error responses, complete JWT implementation, and audit trail.
-        """
+        def send(backend: Backend) -> httpx.Response:
+            scheduler = backend.scheduler
+            estimate = self.last_prompt_tokens + min(route.max_tokens, scheduler.config["completion_token_estimate"])
+            return scheduler.request(
+                lambda: post_json(backend.base_url, backend.headers(), backend.prepare(payload),
+                                  timeout=API_CONFIG["request_timeout"]),
+                tokens=estimate
+            )
         
-        return context
+        return self.pool.call(send)
     
     def get_response(self, user_query: str) -> str:
         try:
-            enhanced_query = self.enhance_prompt_with_context(user_query)
-            self.conversation_history.append({"role": "user", "content": enhanced_query})
-            
-            if len(self.conversation_history) > 20:
-                self.conversation_history = self.conversation_history[-20:]
-            
-            messages = [
-                {"role": "system", "content": self.create_system_prompt()}
-            ] + self.conversation_history
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "moonshotai/kimi-k2-instruct",
-                "messages": messages,
-                "max_tokens": 8000,
-                "temperature": 0.1,
-                "top_p": 0.9,
-                "stream": False
-            }
-            
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                json=payload,
-                timeout=90
-            )
+            router = get_model_router()
+            route = router.route(user_query, "enterprise")
+            response = self._request(user_query, route)
+            fallback = router.fallback(route, "enterprise") if response.status_code != 200 else None
+            if fallback is not None:
+                route = fallback
+                response = self._request(user_query, route)
+            self.last_route = route
             
             if response.status_code == 200:
                 response_data = response.json()
                 bot_response = response_data['choices'][0]['message']['content']
+                self.conversation_history.append({"role": "user", "content": user_query})
                 self.conversation_history.append({"role": "assistant", "content": bot_response})
                 return bot_response
             else:
                 return f"API Error: {response.status_code} - {response.text}"
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return f"Network error: {str(e)}. Please check your internet connection."
         except json.JSONDecodeError as e:
             return f"JSON parsing error: {str(e)}. Please try again."
         except Exception as e:
             return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
     
-    def get_sample_questions(self) -> Dict[str, List[str]]:
+    @staticmethod
+    def get_sample_questions() -> Dict[str, List[str]]:
         return {
             "Core Java Security & Best Practices": [
                 "How to implement secure password validation in Java?",
@@ -383,158 +143,189 @@ class JavaChatbot:
 class GroqJavaChatbot:
     """Alternative implementation with streaming support and enhanced prompting"""
     
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
-        
-    def stream_response(self, user_query: str, print_to_terminal: bool = True, streamlit_container=None):
-        """Stream response from API with enhanced system prompt"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        enhanced_system_prompt = """
-        You are a highly skilled Java and Spring Boot mentor. 
-        Your task is to generate clear, structured, and enterprise-grade explanations 
-        for any question about Java, Core Java, or Spring Boot.
-
-        Follow this response structure every time:
-
-        🤖 Secure & MVC-Compliant Response:
-        -------------------------------------
-        # Concept Explanation
-        - Explain the concept in simple, beginner-friendly terms.
-        - Use short examples where necessary.
-
-        # Security Considerations
-        - Explain how the concept should be applied securely in enterprise systems.
-        - Cover validation, data protection, authentication, and safe coding practices.
-
-        # Full Code Example (Enterprise Package Structure)
-        - Provide a runnable Spring Boot example with correct package structure.
-        - Include DTOs, Service, Repository, Controller, Config, Exception handling.
-        - Ensure the code follows SOLID principles and is security-aware.
-        - Always show `application.yml` for relevant configs.
-
-        # Step-by-Step Explanation
-        - Walk through how each part of the code works and why it's important.
-
-        # Best Practices & Performance Tips
-        - List modern Java + Spring Boot best practices.
-        - Emphasize secure, scalable, and maintainable design.
-
-        # Common Mistakes to Avoid
-        - Show common pitfalls and why they should be avoided.
-
-        # Related Concepts
-        - Provide links to related Java/Spring Boot topics (conceptual references).
-
-        # Testing Example
-        - Provide JUnit/MockMvc/DataJpaTest snippets to validate correctness.
-
-        # Summary
-        - End with a short recap of what was explained.
-
-        REQUIREMENTS:
-        - Apply security best practices (validation, BCrypt, SQL injection prevention, CSRF, auth).
-        - Use full MVC separation (Entity, DTO, Repository, Service, Controller).
-        - Provide runnable, production-ready code with imports, configuration, and tests.
-        - Include explanations, best practices, and pitfalls to avoid.
-        - Never truncate responses. Always provide complete code and explanations.
-        - Ensure solutions follow enterprise-grade standards.
-        - ALWAYS use MapStruct for DTO mapping.
-        - ALWAYS return structured JSON error responses.
-        - ALWAYS include complete JWT filter implementation.
-        - ALWAYS implement AuditorAware for audit trails.
-
-        Tone: Professional, structured, and concise. Always prioritize security and enterprise-readiness.
-        """
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 pool: Optional[BackendPool] = None, engine: Optional[ChatEngine] = None):
+        # Pass the process-wide engine to share it; the rest of the state is per session
+        self.engine = engine or ChatEngine(api_key, base_url, pool)
+        self.pool = self.engine.pool
+        self.api_key = self.engine.api_key
+        self.base_url = self.engine.base_url
+        self.context = ConversationContext()
+        self.last_render_stats = {}
+        self.last_cache_hit = False
+        self.last_coalesced = False
+        self.last_cancelled = False
+        self.last_partial = None
+        self.last_progress = None
+        self.last_prompt_tokens = 0
+        self.last_route = None
+        
+    def build_payload(self, user_query: str, history: Optional[List[dict]] = None,
+                      route: Optional[Route] = None) -> dict:
+        """Build the streaming request payload for the routed model, prompt variant and fitted history"""
+        route = route or get_model_router().route(user_query)
+        self.last_route = route
+        system_prompt = get_prompt(route.system_prompt).text
+        user_prompt = get_prompt(route.user_prompt).render(
+            user_query=user_query,
+            topic=topic_label(route.features.topic)
+        )
 
         payload = {
-            "model": "moonshotai/kimi-k2-instruct",
+            "model": route.model,
             "messages": [
-                {"role": "system", "content": enhanced_system_prompt},
-                {"role": "user", "content": f"""
-                {user_query}
-                
-                Please provide a complete response following the structured format:
-                - Concept Explanation
-                - Security Considerations
-                - Full Code Example with Enterprise Package Structure
-                - Step-by-Step Explanation
-                - Best Practices & Performance Tips
-                - Common Mistakes to Avoid
-                - Related Concepts
-                - Testing Example
-                - Summary
-                
-                IMPORTANT: Use the full token limit to provide COMPLETE implementations.
-                Include ALL necessary code without truncation.
-                Use MapStruct for mapping, structured error responses, complete JWT filters, and audit implementation.
-                """}
+                {"role": "system", "content": system_prompt},
+                *(self.context.fit_history(history) if history else []),
+                {"role": "user", "content": user_prompt}
             ],
-            "max_tokens": 8000,
-            "temperature": 0.1,
+            "max_tokens": route.max_tokens,
+            "temperature": API_CONFIG["temperature"],
             "stream": True
         }
-        
+        self.last_prompt_tokens = count_message_tokens(payload["messages"])
+        return payload
+    
+    def _on_join(self, progress: Optional[StreamProgress] = None):
+        self.last_coalesced = True
+        if progress is not None:
+            progress.connected("shared")
+    
+    async def astream_response(self, user_query: str, history: Optional[List[dict]] = None,
+                               priority: int = INTERACTIVE, progress: Optional[StreamProgress] = None):
+        """Async generator yielding response deltas, served from cache when possible"""
+        router = get_model_router()
+        route = router.route(user_query)
+        while True:
+            payload = self.build_payload(user_query, history, route)
+            if progress is not None:
+                progress.max_tokens = payload["max_tokens"]
+            # Follow-ups depend on the conversation, so only standalone questions are cached
+            cache = get_response_cache() if not history else None
+            cache_args = (user_query, payload["model"], payload["messages"][0]["content"], payload["temperature"])
+            
+            cached = cache.get(*cache_args) if cache else None
+            self.last_cache_hit = cached is not None
+            self.last_coalesced = False
+            if cached is not None:
+                if progress is not None:
+                    progress.connected("cache")
+                for chunk in iter_cached_chunks(cached):
+                    yield chunk
+                return
+            
+            parts = []
+            try:
+                async for content in self.engine.astream_shared(
+                        payload, priority, lambda: self._on_join(progress), progress):
+                    parts.append(content)
+                    yield content
+            except ChatEngineError:
+                # Retry on the fallback route only if nothing was shown yet
+                route = router.fallback(route) if not parts else None
+                if route is None:
+                    raise
+                continue
+            
+            # Only completed streams reach this point; cancelled ones are not cached
+            if cache and parts:
+                cache.put(*cache_args, "".join(parts))
+            return
+    
+    def stream_response(self, user_query: str, print_to_terminal: bool = True, streamlit_container=None,
+                        history: Optional[List[dict]] = None, cancel_token: Optional[CancellationToken] = None,
+                        on_progress: Optional[Callable[[StreamProgress], None]] = None):
+        """
+        Stream response from API with enhanced system prompt and prior turns as context.
+        Cancelling `cancel_token` closes the upstream stream and returns the partial answer.
+        `on_progress` is called in this thread as the stream advances, without blocking it.
+        """
+        token = cancel_token or CancellationToken()
+        registry = get_stream_registry()
+        registry.register(token)
+        self.last_cancelled = False
         try:
             if print_to_terminal:
                 print(f"\n🤖 Generating response for: {user_query}")
                 print("=" * 80)
             
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                json=payload,
-                stream=True,
-                timeout=45
-            )
+            renderer = RenderScheduler(streamlit_container)
+            progress = StreamProgress()
+            self.last_partial = renderer
+            self.last_progress = progress
+            malformed_before = self.engine.malformed_events  # the engine is shared, so count the difference
+            report = (lambda: on_progress(progress)) if on_progress else None
+            stream = get_engine_loop().iterate(
+                self.astream_response(user_query, history, progress=progress), token=token, on_idle=report)
+            last_report = 0.0
+            try:
+                for content in stream:
+                    registry.record_tokens(token)
+                    progress.token()
+                    if report and time.monotonic() - last_report >= RENDER_CONFIG["idle_refresh"]:
+                        report()
+                        last_report = time.monotonic()
+                    if print_to_terminal:
+                        print(content, end='', flush=True)  # Terminal streaming
+                    
+                    # ✅ Streamlit UI streaming (throttled frames)
+                    renderer.push(content)
+            except StreamCancelled:
+                self.last_cancelled = True
+            finally:
+                # Closing the stream cancels the upstream request if we were interrupted
+                stream.close()
             
-            if response.status_code == 200:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith('data: '):
-                            data = line[6:]
-                            if data.strip() == '[DONE]':
-                                break
-                            try:
-                                json_data = json.loads(data)
-                                if 'choices' in json_data and len(json_data['choices']) > 0:
-                                    delta = json_data['choices'][0].get('delta', {})
-                                    if 'content' in delta:
-                                        content = delta['content']
-                                        if print_to_terminal:
-                                            print(content, end='', flush=True)  # Terminal streaming
-                                        
-                                        full_response += content
-                                        
-                                        # ✅ Streamlit UI streaming
-                                        if streamlit_container:
-                                            streamlit_container.markdown(full_response)
-                                        
-                            except json.JSONDecodeError:
-                                continue
-                
-                if print_to_terminal:
-                    print("\n" + "=" * 80)
+            full_response = renderer.finish()
+            progress.finish()
+            if report:
+                report()
+            self.last_render_stats = renderer.stats()
+            
+            if print_to_terminal:
+                print("\n" + "=" * 80)
+                if self.last_cancelled:
+                    print(f"⏹️ Generation cancelled ({token.reason}) after {renderer.tokens_received} tokens")
+                else:
                     print("✅ Response completed!")
-                
-                return full_response
-            else:
-                error_msg = f"API Error: {response.status_code} - {response.text}"
-                if print_to_terminal:
-                    print(f"❌ {error_msg}")
-                return error_msg
-                 
+                if len(self.pool) > 1:
+                    print(f"🔀 Backend: {progress.source}")
+                if self.last_route:
+                    print(f"🧭 Route: {self.last_route.name} ({self.last_route.model}, "
+                          f"topic {self.last_route.features.topic})")
+                if self.last_cache_hit:
+                    print("⚡ Served from response cache")
+                elif self.last_coalesced:
+                    print("🤝 Shared an identical in-flight request")
+                else:
+                    print(f"📨 Prompt tokens sent: {self.last_prompt_tokens}")
+                if progress.ttft is not None:
+                    print(f"⏱️ First token after {progress.ttft * 1000:.0f} ms, "
+                          f"{progress.tokens_per_second:.1f} tokens/s")
+                malformed = self.engine.malformed_events - malformed_before
+                if malformed:
+                    print(f"⚠️ Skipped {malformed} malformed stream events")
+                print(f"🖼️ Rendered {self.last_render_stats['frames_rendered']} frames "
+                      f"for {self.last_render_stats['tokens_received']} tokens")
+            
+            return full_response
+        
+        except ChatEngineError as e:
+            error_msg = str(e)
+            if print_to_terminal:
+                print(f"❌ {error_msg}")
+            return error_msg
         except Exception as e:
             error_msg = f"Error: {str(e)}"
             if print_to_terminal:
                 print(f"❌ {error_msg}")
             return error_msg
+        except BaseException:
+            # e.g. a Streamlit rerun/stop interrupting the script: count it as a cancellation
+            token.cancel("interrupted")
+            raise
+        finally:
+            token.finish()
+            registry.unregister(token)
 
 def load_api_key():
     """Load API key from environment variables"""
@@ -576,6 +367,8 @@ def main():
     chatbot = JavaChatbot(api_key)
     streaming_chatbot = GroqJavaChatbot(api_key)
     use_streaming = False
+    # One running conversation for both modes; earlier turns are sent as context
+    history = chatbot.conversation_history
     
     while True:
         user_input = input("\n💭 Your Question: ").strip()
@@ -607,7 +400,17 @@ def main():
         print("-" * 40)
         
         if use_streaming:
-            response = streaming_chatbot.stream_response(user_input)
+            streaming_chatbot.last_partial = None
+            try:
+                response = streaming_chatbot.stream_response(user_input, history=list(history))
+            except KeyboardInterrupt:
+                # Ctrl+C cancels the in-flight stream on the engine loop; keep what was generated
+                print("\n⏹️ Generation cancelled")
+                partial = streaming_chatbot.last_partial
+                response = partial.text if partial is not None else ""
+            if response:
+                history.append({"role": "user", "content": user_input})
+                history.append({"role": "assistant", "content": response})
         else:
             response = chatbot.get_response(user_input)
             print(response)
@@ -0,0 +1,128 @@
+"""
+Request coalescing for the Java Expert Chatbot
+Identical requests in flight at the same time share one upstream stream
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import AsyncIterator, Callable, Optional
+
+from core.cache import normalize_text
+from core.errors import ChatEngineError
+
+def request_key(payload: dict) -> str:
+    """Key of everything that determines the answer, with message text normalized like the cache key"""
+    normalized = {
+        "model": payload.get("model"),
+        "temperature": payload.get("temperature"),
+        "max_tokens": payload.get("max_tokens"),
+        "messages": [(m["role"], normalize_text(m["content"])) for m in payload["messages"]]
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+class Flight:
+    """One upstream stream, buffered so every subscriber can replay it from the start"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task = None
+
+    def _notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def produce(self, stream: AsyncIterator[str]):
+        try:
+            async for content in stream:
+                self.parts.append(content)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+class SingleFlight:
+    """Process-wide registry of in-flight streams, one namespace per event loop"""
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.counters = {"flights": 0, "joined": 0, "replayed_deltas": 0, "abandoned": 0}
+
+    async def subscribe(self, key: str, start: Callable[[], AsyncIterator[str]],
+                        on_join: Optional[Callable[[], None]] = None) -> AsyncIterator[str]:
+        """
+        Yield the deltas of the flight for `key`, starting it with `start()`
+        if none is running. Late joiners first get the buffered prefix. The
+        upstream stream is cancelled once the last subscriber goes away.
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self.lock:
+            flight = self.flights.get(loop_key)
+            if flight is None:
+                flight = Flight(key)
+                flight.task = asyncio.ensure_future(flight.produce(start()))
+                flight.task.add_done_callback(lambda _: self._forget(loop_key, flight))
+                self.flights[loop_key] = flight
+                self.counters["flights"] += 1
+            else:
+                self.counters["joined"] += 1
+                self.counters["replayed_deltas"] += len(flight.parts)
+                if on_join is not None:
+                    on_join()
+            flight.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                while index < len(flight.parts):
+                    yield flight.parts[index]
+                    index += 1
+                if flight.done:
+                    if isinstance(flight.error, asyncio.CancelledError):
+                        # The upstream stream was cut short (e.g. at shutdown): what we have is
+                        # truncated, so it must not look complete to the caller or the cache
+                        raise ChatEngineError("The shared upstream stream was cancelled")
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Unregister first so nobody joins a flight that is being cancelled
+                self._forget(loop_key, flight)
+                self.counters["abandoned"] += 1
+                flight.task.cancel()
+
+    def _forget(self, loop_key, flight: Flight):
+        with self.lock:
+            if self.flights.get(loop_key) is flight:
+                del self.flights[loop_key]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.counters, in_flight=len(self.flights))
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight registry"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
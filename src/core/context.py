@@ -0,0 +1,135 @@
+"""
+Conversation context management for the Java Expert Chatbot
+Fits prior turns into a token budget so follow-up questions keep their context
+"""
+
+import re
+from typing import List, Optional
+
+from utils.config import CONTEXT_CONFIG
+
+_CODE_FENCE_RE = re.compile(r"(```|~~~).*?(?:\1|$)", re.DOTALL)
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_encoding = None
+
+def _get_encoding():
+    """Load the optional tiktoken encoding once"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(CONTEXT_CONFIG["tokenizer_encoding"])
+        except Exception:
+            _encoding = False
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise a close local estimate"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(_APPROX_TOKEN_RE.findall(text))
+
+def count_message_tokens(messages: List[dict]) -> int:
+    # ~4 tokens of chat-format overhead per message
+    return sum(count_tokens(message["content"]) + 4 for message in messages)
+
+def compact_answer(content: str) -> str:
+    """Drop code blocks from an older answer; the prose keeps the thread of the conversation"""
+    return _CODE_FENCE_RE.sub("[code example omitted]", content)
+
+def truncate_answer(content: str, max_tokens: int) -> str:
+    """Cut an answer to at most max_tokens, at a line break where possible"""
+    marker = "\n[answer truncated]"
+    if count_tokens(content) <= max_tokens:
+        return content
+    limit = max_tokens - count_tokens(marker)
+    low, high = 0, len(content)
+    while low < high:  # longest prefix within the limit
+        middle = (low + high + 1) // 2
+        if count_tokens(content[:middle]) <= limit:
+            low = middle
+        else:
+            high = middle - 1
+    cut = content.rfind("\n", 0, low)
+    return content[:cut if cut > low // 2 else low].rstrip() + marker
+
+class ConversationContext:
+    """Select which prior turns are sent with the next request"""
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget or CONTEXT_CONFIG["history_token_budget"]
+        self.last_stats = {}
+
+    def fit_history(self, history: List[dict]) -> List[dict]:
+        """
+        Return the newest turns that fit the budget. Only raw user text is kept;
+        older answers lose their code blocks, a latest answer that is too long on
+        its own is truncated, and turns that still do not fit are folded into a
+        one-line summary of the earlier questions.
+        """
+        turns = [{"role": m["role"], "content": m["content"]} for m in history
+                 if m.get("role") in ("user", "assistant") and m.get("content")]
+        last_answer = max((i for i, m in enumerate(turns) if m["role"] == "assistant"), default=-1)
+        if CONTEXT_CONFIG["compact_older_answers"]:
+            for i, message in enumerate(turns):
+                if message["role"] == "assistant" and i != last_answer:
+                    message["content"] = compact_answer(message["content"])
+
+        # Room for the summary pair is set aside whenever anything will be dropped
+        budget = self.token_budget
+        reserve = 0
+        if count_message_tokens(turns) > budget:
+            reserve = min(CONTEXT_CONFIG["summary_token_budget"], budget // 4)
+            budget -= reserve
+
+        kept = []
+        used = 0
+        index = len(turns) - 1
+        while index >= 0:
+            cost = count_tokens(turns[index]["content"]) + 4
+            if used + cost > budget:
+                if index != last_answer:
+                    break
+                # Cut the latest answer down, leaving room for the question it answers
+                question = turns[index - 1] if index > 0 and turns[index - 1]["role"] == "user" else None
+                room = budget - used - 4 - (count_tokens(question["content"]) + 4 if question else 0)
+                if room < CONTEXT_CONFIG["min_truncated_answer_tokens"]:
+                    break
+                turns[index]["content"] = truncate_answer(turns[index]["content"], room)
+                cost = count_tokens(turns[index]["content"]) + 4
+            kept.append(turns[index])
+            used += cost
+            index -= 1
+        kept.reverse()
+
+        # Never start the window with a dangling answer
+        while kept and kept[0]["role"] == "assistant":
+            used -= count_tokens(kept[0]["content"]) + 4
+            kept.pop(0)
+            index += 1
+
+        dropped = turns[:index + 1]
+        earlier_questions = [m["content"][:CONTEXT_CONFIG["summary_question_chars"]]
+                             for m in dropped if m["role"] == "user"]
+        summary_pair = []
+        while earlier_questions:
+            summary_pair = [
+                {"role": "user", "content": "Earlier in this conversation the user asked about: "
+                                            + "; ".join(earlier_questions)},
+                {"role": "assistant", "content": "Understood, I will keep that context in mind."}
+            ]
+            if count_message_tokens(summary_pair) <= reserve:
+                break
+            earlier_questions.pop(0)  # the oldest questions go first
+            summary_pair = []
+        kept[:0] = summary_pair
+        used += count_message_tokens(summary_pair)
+
+        self.last_stats = {
+            "history_turns": len(turns),
+            "turns_sent": len(kept),
+            "turns_summarized": len(dropped),
+            "history_tokens": used
+        }
+        return kept
@@ -0,0 +1,295 @@
+"""
+Asyncio chat engine for the Java Expert Chatbot
+Many concurrent streams share one event loop and one pooled async client,
+spread over a pool of API backends
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+import httpx
+
+from core.backends import Backend, BackendPool, get_backend_pool, load_backend_specs
+from core.cancellation import CancellationToken, StreamCancelled
+from core.coalesce import get_single_flight, request_key
+from core.context import count_message_tokens
+from core.errors import ChatEngineError
+from core.lifecycle import on_shutdown
+from core.progress import StreamProgress
+from core.prompts import get_prompt
+from core.scheduler import INTERACTIVE, CircuitOpenError, QueueTimeoutError, RequestScheduler, get_scheduler
+from core.sse import DONE_MARKER, SSEDecoder, parse_delta
+from core.transport import build_timeout, close_async_client, get_async_client
+from utils.config import API_CONFIG, RENDER_CONFIG
+
+def continuation_payload(payload: dict, partial: str) -> dict:
+    """Ask another backend to pick up an answer that broke off part-way"""
+    messages = payload["messages"] + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": get_prompt("user_continue").text}
+    ]
+    return dict(payload, messages=messages)
+
+class ChatEngine:
+    """Stream completion deltas from a pool of OpenAI-compatible backends"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 pool: Optional[BackendPool] = None):
+        self.pool = pool or BackendPool.single(api_key, base_url)
+        self.api_key = self.pool.backends[0].api_key
+        self.base_url = self.pool.backends[0].base_url
+        self.malformed_events = 0  # running total across all streams
+        self.last_backend = None
+
+    def headers(self) -> dict:
+        return self.pool.backends[0].headers()
+
+    def estimate_tokens(self, payload: dict, scheduler: Optional[RequestScheduler] = None) -> int:
+        """Tokens reserved with the scheduler before the request is sent"""
+        scheduler = scheduler or get_scheduler()
+        completion = min(payload.get("max_tokens", 0), scheduler.config["completion_token_estimate"])
+        return count_message_tokens(payload["messages"]) + completion
+
+    async def astream(self, payload: dict, priority: int = INTERACTIVE,
+                      progress: Optional[StreamProgress] = None) -> AsyncIterator[str]:
+        """
+        Yield content deltas; cancelling the consumer closes the HTTP stream.
+
+        If a backend fails, the request moves to another one. When deltas were
+        already yielded, the next backend is asked to continue the partial
+        answer rather than start over.
+        """
+        tried = set()
+        parts = []
+        while True:
+            backend = self.pool.select(tried)
+            self.last_backend = backend.name
+            request = backend.prepare(continuation_payload(payload, "".join(parts)) if parts else payload)
+            started = time.monotonic()
+            first = True
+            stream = self._astream_backend(backend, request, priority, progress)
+            try:
+                async for content in stream:
+                    if first:
+                        self.pool.record_first_token(backend, time.monotonic() - started)
+                        first = False
+                    parts.append(content)
+                    yield content
+            except (ChatEngineError, httpx.TransportError, CircuitOpenError, QueueTimeoutError) as e:
+                status_code = getattr(e, "status_code", None)
+                self.pool.record_failure(backend, str(e) or type(e).__name__, status_code)
+                if not self.pool.failover(backend, tried, status_code):
+                    raise
+                continue
+            except BaseException:
+                self.pool.record_cancelled(backend)
+                raise
+            finally:
+                # Close the backend stream now rather than when it is garbage collected
+                await stream.aclose()
+            self.pool.record_success(backend, time.monotonic() - started)
+            return
+
+    async def astream_shared(self, payload: dict, priority: int = INTERACTIVE,
+                             on_join: Optional[Callable[[], None]] = None,
+                             progress: Optional[StreamProgress] = None) -> AsyncIterator[str]:
+        """
+        Like astream, but identical requests already in flight share its
+        upstream stream; a late joiner first receives the buffered prefix.
+        """
+        async for content in get_single_flight().subscribe(
+                request_key(payload), lambda: self.astream(payload, priority, progress), on_join):
+            yield content
+
+    async def _astream_backend(self, backend: Backend, payload: dict, priority: int,
+                               progress: Optional[StreamProgress] = None) -> AsyncIterator[str]:
+        """
+        Stream from one backend. Each attempt waits for a slot on the backend's
+        scheduler; rate limits, server errors and connection failures are
+        retried with backoff until the first delta has been yielded.
+        """
+        scheduler = backend.scheduler
+        prompt_tokens = count_message_tokens(payload["messages"])
+        attempt = 0
+        while True:
+            permit = await scheduler.aacquire(priority, self.estimate_tokens(payload, scheduler))
+            deltas = 0
+            retry_after = None
+            try:
+                client = get_async_client()
+                async with client.stream(
+                    "POST",
+                    backend.base_url,
+                    headers=backend.headers(),
+                    json=payload,
+                    timeout=build_timeout(API_CONFIG["stream_timeout"])
+                ) as response:
+                    retry_after = scheduler.observe(response.status_code, response.headers)
+                    if response.status_code != 200:
+                        await response.aread()
+                        if not scheduler.should_retry(response.status_code, attempt, retry_after):
+                            raise ChatEngineError(f"API Error: {response.status_code} - {response.text}",
+                                                  response.status_code)
+                    else:
+                        if progress is not None:
+                            progress.connected(backend.name)
+                        decoder = SSEDecoder()
+                        done = False
+                        async for chunk in response.aiter_bytes():
+                            if done:
+                                continue  # drain the body so the connection returns to the pool
+                            for event in decoder.feed(chunk):
+                                if event.data == DONE_MARKER:
+                                    done = True
+                                    break
+                                try:
+                                    content = parse_delta(event.data)
+                                except ValueError:
+                                    self.malformed_events += 1
+                                    continue
+                                if content:
+                                    deltas += 1
+                                    yield content
+                        return
+            except httpx.TransportError:
+                scheduler.record_failure()
+                if deltas or attempt >= scheduler.config["max_retries"]:
+                    raise
+            finally:
+                permit.release(prompt_tokens + deltas if deltas else 0)
+            await asyncio.sleep(scheduler.retry_delay(attempt, retry_after))
+            attempt += 1
+
+class EngineLoop:
+    """A background event loop thread that synchronous callers submit streams to"""
+
+    _SENTINEL = object()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="chat-engine-loop", daemon=True)
+        self.thread.start()
+
+    def iterate(self, stream: AsyncIterator[str], timeout: Optional[float] = None,
+                token: Optional[CancellationToken] = None,
+                on_idle: Optional[Callable[[], None]] = None) -> Iterator[str]:
+        """
+        Drive an async generator on the loop and yield its items in this thread.
+
+        Closing the returned iterator (e.g. a Streamlit rerun after Clear) or
+        cancelling the token cancels the task and with it the upstream HTTP
+        stream; a cancelled token raises StreamCancelled here. `on_idle` runs
+        in this thread while waiting for items (e.g. to refresh a status line).
+        """
+        items = queue.Queue()
+        timeout = API_CONFIG["stream_timeout"] if timeout is None else timeout
+
+        async def pump():
+            try:
+                async for item in stream:
+                    items.put((item, None))
+            except asyncio.CancelledError:
+                items.put((self._SENTINEL, StreamCancelled(token.reason if token else "cancelled")))
+                raise
+            except Exception as e:
+                items.put((self._SENTINEL, e))
+                return
+            items.put((self._SENTINEL, None))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        if token is not None:
+            def on_cancel():
+                # The sentinel also covers a task cancelled before pump() started
+                self.loop.call_soon_threadsafe(future.cancel)
+                items.put((self._SENTINEL, StreamCancelled(token.reason)))
+            token.on_cancel(on_cancel)
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                wait = deadline - time.monotonic()
+                if on_idle is not None:
+                    wait = min(wait, RENDER_CONFIG["idle_refresh"])
+                try:
+                    item, error = items.get(timeout=max(wait, 0))
+                except queue.Empty:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"No data received from the model for {timeout}s")
+                    on_idle()
+                    continue
+                deadline = time.monotonic() + timeout
+                if item is self._SENTINEL:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def stop(self, timeout: float = 5.0):
+        """Cancel running streams, close the loop's HTTP client and stop the thread"""
+        async def drain():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await close_async_client()
+
+        if not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), self.loop).result(timeout)
+        except Exception as e:
+            print(f"⚠️ Engine loop did not drain cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    def active_tasks(self) -> int:
+        """Number of streams currently running on the loop"""
+        return len(asyncio.all_tasks(self.loop))
+
+_engine_loop = None
+_engine_loop_lock = threading.Lock()
+
+def get_engine_loop() -> EngineLoop:
+    """Return the process-wide engine loop, starting it on first use"""
+    global _engine_loop
+    if _engine_loop is None:
+        with _engine_loop_lock:
+            if _engine_loop is None:
+                _engine_loop = EngineLoop()
+                on_shutdown("engine loop", _engine_loop.stop)
+    return _engine_loop
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_chat_engine() -> ChatEngine:
+    """Return the process-wide engine on the shared backend pool"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ChatEngine(pool=get_backend_pool())
+    return _engine
+
+def build_engine(mock: bool = False) -> ChatEngine:
+    """Engine on the configured backends, or on a local mock server for offline runs"""
+    if mock:
+        from core.mock_backend import SAMPLE_ANSWER, start_server
+
+        server = start_server(answer=SAMPLE_ANSWER, token_rate=API_CONFIG["mock_token_rate"])
+        print(f"🧪 Using the mock backend at {server.url}")
+        # The mock has no rate limits, so neither does its scheduler
+        scheduler = RequestScheduler({"requests_per_minute": 0, "tokens_per_minute": 0})
+        return ChatEngine(pool=BackendPool([Backend("mock", server.url, "mock", scheduler=scheduler)]))
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    specs = load_backend_specs()
+    if not specs:
+        raise SystemExit("❌ No API key configured (GROQ_API_KEY); use --mock to run offline")
+    return ChatEngine(pool=get_backend_pool(specs))
@@ -0,0 +1,12 @@
+"""
+Shared exceptions for the Java Expert Chatbot
+"""
+
+from typing import Optional
+
+class ChatEngineError(Exception):
+    """Raised when the completions API returns a non-200 response"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
@@ -0,0 +1,44 @@
+"""
+Process lifecycle for the Java Expert Chatbot
+Shared resources register a shutdown hook when they are created; the hooks
+run once, newest first, at interpreter exit or when shutdown() is called
+"""
+
+import atexit
+import threading
+from typing import Callable, List, Tuple
+
+_hooks: List[Tuple[str, Callable[[], None]]] = []
+_lock = threading.Lock()
+_registered = False
+_shut_down = False
+
+def on_shutdown(name: str, callback: Callable[[], None]):
+    """Run `callback` when the process shuts down"""
+    global _registered
+    with _lock:
+        _hooks.append((name, callback))
+        if not _registered:
+            atexit.register(shutdown)
+            _registered = True
+
+def shutdown() -> List[str]:
+    """Release shared resources in reverse creation order; returns the hooks that ran"""
+    global _shut_down
+    with _lock:
+        if _shut_down:
+            return []
+        _shut_down = True
+        hooks = list(reversed(_hooks))
+        _hooks.clear()
+    ran = []
+    for name, callback in hooks:
+        try:
+            callback()
+            ran.append(name)
+        except Exception as e:
+            print(f"⚠️ Shutdown of {name} failed: {e}")
+    return ran
+
+def is_shutting_down() -> bool:
+    return _shut_down
@@ -0,0 +1,215 @@
+"""
+Mock OpenAI-compatible chat completions backend for offline runs and benchmarks
+Streams SSE deltas (or a single JSON body) without calling any real API.
+Can enforce a requests-per-minute limit (429 + retry-after / x-ratelimit-*
+headers), inject 503 errors to exercise retries and the circuit breaker, and
+cut streams off half-way to exercise failover.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TOKENS = 200
+DEFAULT_TOKEN_TEXT = "token "
+
+# Canned answer for offline batch runs: prose plus a fenced code block
+SAMPLE_ANSWER = (
+    "Here is a minimal, secure example.\n\n```java\n@RestController\n@RequestMapping(\"/api/users\")\n"
+    "public class UserController {\n    private final UserService userService;\n\n"
+    "    public UserController(UserService userService) {\n        this.userService = userService;\n    }\n}\n```\n\n"
+    "Validate input, keep controllers thin and put business rules in the service layer.\n"
+)
+
+def split_tokens(text: str) -> list:
+    """Split text into word-sized deltas that keep their whitespace"""
+    return re.findall(r"\S+\s*|\s+", text)
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Request handler emulating /v1/chat/completions"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stats["connections"] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.stats["requests"] += 1
+
+        rejection = self.server.admit()
+        if rejection is not None:
+            self._send_error(*rejection)
+            return
+
+        if payload.get("stream"):
+            self._send_stream(payload)
+        else:
+            self._send_json(payload)
+
+    def _send_rate_limit_headers(self):
+        if self.server.rate_limit_rpm:
+            self.send_header("x-ratelimit-limit-requests", str(self.server.rate_limit_rpm))
+            self.send_header("x-ratelimit-remaining-requests",
+                             str(max(0, self.server.rate_limit_rpm - len(self.server.window))))
+
+    def _send_error(self, status: int, headers: dict):
+        body = json.dumps({"error": {"message": f"fake error {status}", "type": "fake"}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload):
+        content = "".join(self.server.deltas())
+        body = json.dumps({
+            "id": "fake-completion",
+            "model": payload.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_rate_limit_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, payload):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self._send_rate_limit_headers()
+        self.end_headers()
+
+        delay = 1.0 / self.server.token_rate if self.server.token_rate else 0
+        deltas = self.server.deltas()
+        cut = len(deltas) // 2 if self.server.drop() else None
+        if self.server.ttft:
+            time.sleep(self.server.ttft)
+        for i, delta in enumerate(deltas):
+            if i == cut:
+                # Close mid-stream without the terminating chunk, like a dropped connection
+                self.close_connection = True
+                return
+            event = {"choices": [{"index": 0, "delta": {"content": delta}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            if delay:
+                time.sleep(delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Threaded fake server keeping connection/request counters"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, tokens=DEFAULT_TOKENS, token_rate=0, rate_limit_rpm=0, error_rate=0.0,
+                 ttft=0.0, answer=None, token_chars=None, drop_rate=0.0):
+        super().__init__(address, FakeLLMHandler)
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.ttft = ttft  # seconds before the first delta
+        self.answer = answer  # stream this text instead of `tokens` filler deltas
+        self.token_chars = token_chars  # characters per filler delta (default: "token ")
+        self.drop_rate = drop_rate  # fraction of streams cut off half-way
+        self.rate_limit_rpm = rate_limit_rpm
+        self.error_rate = error_rate
+        self.window = []  # admission times within the last minute
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "rate_limited": 0, "errors": 0, "dropped": 0}
+
+    def deltas(self) -> list:
+        if self.answer is not None:
+            return split_tokens(self.answer)
+        if self.token_chars:
+            return ["x" * (self.token_chars - 1) + " "] * self.tokens
+        return [DEFAULT_TOKEN_TEXT] * self.tokens
+
+    def drop(self) -> bool:
+        """Whether to cut off the next stream"""
+        if self.drop_rate and random.random() < self.drop_rate:
+            self.stats["dropped"] += 1
+            return True
+        return False
+
+    def admit(self):
+        """Return (status, headers) to reject the request with, or None to serve it"""
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return 503, {}
+        if not self.rate_limit_rpm:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 60]
+            if len(self.window) >= self.rate_limit_rpm:
+                self.stats["rate_limited"] += 1
+                reset = 60 - (now - self.window[0])
+                return 429, {
+                    "retry-after": f"{reset:.2f}",
+                    "x-ratelimit-limit-requests": str(self.rate_limit_rpm),
+                    "x-ratelimit-remaining-requests": "0",
+                    "x-ratelimit-reset-requests": f"{reset:.2f}s"
+                }
+            self.window.append(now)
+            return None
+
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive connections is expected here
+        pass
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+def start_server(host="127.0.0.1", port=0, **kwargs) -> FakeLLMServer:
+    """Start a fake server on a background thread and return it"""
+    server = FakeLLMServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible SSE server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--tokens", type=int, default=DEFAULT_TOKENS, help="Tokens per response")
+    parser.add_argument("--token-chars", type=int, default=None, help="Characters per token")
+    parser.add_argument("--token-rate", type=float, default=0, help="Tokens per second (0 = unthrottled)")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0, help="Answer 429 above this many requests/min")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of streams cut off half-way")
+    parser.add_argument("--ttft", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--sample-answer", action="store_true", help="Stream a canned Java answer")
+    args = parser.parse_args()
+
+    server = FakeLLMServer((args.host, args.port), tokens=args.tokens, token_rate=args.token_rate,
+                           rate_limit_rpm=args.rate_limit_rpm, error_rate=args.error_rate, ttft=args.ttft,
+                           answer=SAMPLE_ANSWER if args.sample_answer else None,
+                           token_chars=args.token_chars, drop_rate=args.drop_rate)
+    print(f"🧪 Mock LLM server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
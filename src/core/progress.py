@@ -0,0 +1,95 @@
+"""
+Stream progress for the Java Expert Chatbot
+Real progress of one streamed answer, driven by the stream's own events
+"""
+
+import time
+from typing import Optional
+
+class StreamProgress:
+    """Timeline of one answer: connection, first token and token rate against max_tokens"""
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self.started = time.monotonic()
+        self.connected_at = None
+        self.first_token_at = None
+        self.finished_at = None
+        self.source = None  # backend name, "cache" or "shared"
+        self.tokens = 0
+
+    def connected(self, source: str):
+        """The response started: headers received, cache hit or joined a shared stream"""
+        self.source = source
+        if self.connected_at is None:
+            self.connected_at = time.monotonic()
+
+    def token(self, count: int = 1):
+        now = time.monotonic()
+        if self.first_token_at is None:
+            self.first_token_at = now
+            if self.connected_at is None:
+                self.connected_at = now
+        self.tokens += count
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+
+    @property
+    def stage(self) -> str:
+        if self.finished_at is not None:
+            return "done"
+        if self.first_token_at is not None:
+            return "streaming"
+        if self.connected_at is not None:
+            return "connected"
+        return "waiting"
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return self.first_token_at - self.started if self.first_token_at is not None else None
+
+    @property
+    def tokens_per_second(self) -> float:
+        if self.first_token_at is None or self.tokens < 2:
+            return 0.0
+        duration = (self.finished_at or time.monotonic()) - self.first_token_at
+        return (self.tokens - 1) / duration if duration > 0 else 0.0
+
+    @property
+    def remaining_tokens(self) -> Optional[int]:
+        """Upper bound on the tokens still to come (the answer may stop earlier)"""
+        if not self.max_tokens:
+            return None
+        return max(0, self.max_tokens - self.tokens)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.tokens_per_second
+        remaining = self.remaining_tokens
+        if not rate or remaining is None:
+            return None
+        return remaining / rate
+
+    @property
+    def fraction(self) -> float:
+        if self.finished_at is not None:
+            return 1.0
+        if not self.max_tokens:
+            return 0.0
+        return min(1.0, self.tokens / self.max_tokens)
+
+    def snapshot(self) -> dict:
+        return {
+            "stage": self.stage,
+            "source": self.source,
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "ttft_ms": round(self.ttft * 1000) if self.ttft is not None else None,
+            "tokens_per_second": round(self.tokens_per_second, 1),
+            "elapsed_seconds": round(self.elapsed, 2)
+        }
@@ -0,0 +1,87 @@
+"""
+Throttled rendering of streamed answers
+Coalesces token deltas and only repaints the UI on a time or byte budget;
+finished text and code segments are drawn once, only the open one is repainted
+"""
+
+import time
+from typing import Optional
+
+from core.segments import Segment, StreamingSegmenter
+from utils.config import RENDER_CONFIG
+
+def render_segment(slot, segment: Segment):
+    """Draw a segment into a Streamlit placeholder"""
+    if segment.kind == "code":
+        slot.code(segment.text, language=segment.highlight_language)
+    else:
+        slot.markdown(segment.text)
+
+class RenderScheduler:
+    """Buffer streamed deltas and flush them to a Streamlit container in frames"""
+
+    def __init__(self, container=None, flush_interval: Optional[float] = None,
+                 flush_bytes: Optional[int] = None):
+        self.container = container
+        self.flush_interval = RENDER_CONFIG["flush_interval"] if flush_interval is None else flush_interval
+        self.flush_bytes = RENDER_CONFIG["flush_bytes"] if flush_bytes is None else flush_bytes
+        self.parts = []
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+        self.tokens_received = 0
+        self.frames_rendered = 0
+        self.segmenter = StreamingSegmenter()
+        self.completed = []  # finished segments not drawn yet
+        self.body = None  # holds one placeholder per segment
+        self.tail = None  # placeholder of the segment still being written
+
+    def push(self, delta: str):
+        """Add a delta and repaint if the time or byte budget is exhausted"""
+        self.parts.append(delta)
+        if self.container is not None:
+            self.completed.extend(self.segmenter.feed(delta))
+        self.tokens_received += 1
+        self.pending_bytes += len(delta)
+
+        if (self.pending_bytes >= self.flush_bytes or
+                time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Draw newly finished segments, then repaint the open one"""
+        if self.container is not None and self.pending_bytes:
+            if self.body is None:
+                self.body = self.container.container()
+            for segment in self.completed:
+                render_segment(self.tail or self.body.empty(), segment)
+                self.tail = None
+            self.completed = []
+            segment = self.segmenter.open_segment()
+            if segment is not None:
+                if self.tail is None:
+                    self.tail = self.body.empty()
+                render_segment(self.tail, segment)
+            self.frames_rendered += 1
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def finish(self) -> str:
+        """Final flush; returns the complete text"""
+        if self.container is not None:
+            self.completed.extend(self.segmenter.close())
+            if self.completed:
+                self.pending_bytes = max(self.pending_bytes, 1)
+        self.flush()
+        return self.text
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def stats(self) -> dict:
+        """Frames rendered versus tokens received, for tuning the budgets"""
+        return {
+            "tokens_received": self.tokens_received,
+            "frames_rendered": self.frames_rendered,
+            "tokens_per_frame": round(self.tokens_received / self.frames_rendered, 2) if self.frames_rendered else 0.0
+        }
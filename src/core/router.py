@@ -0,0 +1,92 @@
+"""
+Model router for the Java Expert Chatbot
+Picks the model, max_tokens and prompt variant from simple query features
+"""
+
+import re
+import threading
+from typing import List, NamedTuple, Optional
+
+from core.topics import get_topic_classifier
+from utils.config import ROUTING_CONFIG
+
+class QueryFeatures(NamedTuple):
+    topic: str
+    confidence: float
+    words: int
+    wants_code: bool
+
+class Route(NamedTuple):
+    name: str
+    model: str
+    max_tokens: int
+    system_prompt: str
+    user_prompt: str
+    fallback: Optional[str]
+    features: QueryFeatures
+
+def _marker_pattern(markers: List[str]):
+    alternation = "|".join(r"\s+".join(re.escape(w) for w in m.split())
+                           for m in sorted(markers, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+class ModelRouter:
+    """Match query features against ordered rules from ROUTING_CONFIG"""
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or ROUTING_CONFIG
+        self.code_pattern = _marker_pattern(self.config["code_markers"])
+        self.counts = dict.fromkeys(self.config["routes"], 0)
+
+    def features(self, query: str) -> QueryFeatures:
+        match = get_topic_classifier().classify(query)
+        wants_code = "```" in query or self.code_pattern.search(query) is not None
+        return QueryFeatures(match.topic, match.confidence, len(query.split()), wants_code)
+
+    def _matches(self, rule: dict, features: QueryFeatures) -> bool:
+        if "max_words" in rule and features.words > rule["max_words"]:
+            return False
+        if "min_words" in rule and features.words < rule["min_words"]:
+            return False
+        if "wants_code" in rule and features.wants_code != rule["wants_code"]:
+            return False
+        if "topics" in rule and features.topic not in rule["topics"]:
+            return False
+        return features.confidence >= rule.get("min_confidence", 0.0)
+
+    def route_named(self, name: str, persona: str, features: QueryFeatures) -> Route:
+        settings = self.config["routes"][name]
+        system_prompt, user_prompt = settings["prompts"][persona]
+        return Route(name, settings["model"], settings["max_tokens"], system_prompt, user_prompt,
+                     settings.get("fallback"), features)
+
+    def route(self, query: str, persona: str = "streaming") -> Route:
+        """Choose a route for the query; persona selects the prompt variant"""
+        features = self.features(query)
+        name = self.config["default_route"]
+        if self.config["enabled"]:
+            for rule in self.config["rules"]:
+                if self._matches(rule, features):
+                    name = rule["route"]
+                    break
+        self.counts[name] += 1
+        return self.route_named(name, persona, features)
+
+    def fallback(self, route: Route, persona: str = "streaming") -> Optional[Route]:
+        """The route to retry with after the given route failed, if any"""
+        if not route.fallback:
+            return None
+        self.counts[route.fallback] += 1
+        return self.route_named(route.fallback, persona, route.features)
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
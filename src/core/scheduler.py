@@ -0,0 +1,426 @@
+"""
+Request scheduler for the Java Expert Chatbot
+Shared rate limits, priority queueing, retries and a circuit breaker for every
+API call in the process, whether it comes from a thread or an event loop
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import httpx
+
+from utils.config import SCHEDULER_CONFIG
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+class CircuitOpenError(Exception):
+    """Raised when the API has failed repeatedly and requests are short-circuited"""
+
+class QueueTimeoutError(Exception):
+    """Raised when a request waited too long for a scheduler slot"""
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse '20', '1.5s', '250ms' or '2m59.56s' into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given as a delay or an HTTP date"""
+    seconds = parse_duration(value)
+    if seconds is not None or not value:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Continuously refilling bucket; capacity is one minute's allowance"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)"""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+    def adopt(self, per_minute: int):
+        """Take on a limit the server advertised when none is configured locally"""
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def clamp(self, remaining: float):
+        """Never believe we have more left than the server says we do"""
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.level, remaining)
+
+class CircuitBreaker:
+    """Open after N consecutive failures; allow one trial request after the reset period"""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+class Permit:
+    """A granted scheduler slot; release it with the tokens actually used"""
+
+    def __init__(self, scheduler, priority: int, tokens: int):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tokens = tokens
+        self.granted_at = None
+        self.released = False
+
+    def release(self, used_tokens: Optional[int] = None):
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self, used_tokens)
+
+class _Waiter:
+    __slots__ = ("permit", "event", "loop", "future", "cancelled", "enqueued_at")
+
+    def __init__(self, permit: Permit, loop=None, future=None):
+        self.permit = permit
+        self.event = threading.Event() if loop is None else None
+        self.loop = loop
+        self.future = future
+        self.cancelled = False
+        self.enqueued_at = time.monotonic()
+
+    def grant(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(self.permit)
+        else:
+            # The waiting coroutine was cancelled after we granted the slot
+            self.permit.release(0)
+
+class RequestScheduler:
+    """
+    Process-wide gate in front of the completions API.
+
+    Requests wait in a priority queue (interactive before background) until a
+    concurrency slot and request/token budget are available. Rate-limit
+    headers from the server tighten the local buckets or pause dispatch, and
+    consecutive failures open a circuit breaker that fails requests fast.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = dict(SCHEDULER_CONFIG, **(config or {}))
+        self.requests = TokenBucket(self.config["requests_per_minute"])
+        self.tokens = TokenBucket(self.config["tokens_per_minute"])
+        self.breaker = CircuitBreaker(self.config["breaker_failure_threshold"],
+                                      self.config["breaker_reset_seconds"])
+        self.lock = threading.Lock()
+        self.queue = []
+        self.sequence = itertools.count()
+        self.active = 0
+        self.paused_until = 0.0
+        self.timer = None
+        self.counters = {"granted": 0, "completed": 0, "retries": 0, "rate_limited": 0,
+                         "failures": 0, "short_circuited": 0, "queue_timeouts": 0}
+        self.wait_totals = {name: [0, 0.0] for name in PRIORITY_NAMES.values()}
+
+    # --- queueing ---------------------------------------------------------
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self.counters["short_circuited"] += 1
+            raise CircuitOpenError("The model API is failing repeatedly; please try again shortly")
+
+    def _enqueue(self, waiter: _Waiter):
+        heapq.heappush(self.queue, (waiter.permit.priority, next(self.sequence), waiter))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant queued requests while slots and budget allow (call with the lock held)"""
+        while self.queue:
+            _, _, waiter = self.queue[0]
+            if waiter.cancelled:
+                heapq.heappop(self.queue)
+                continue
+            if self.active >= self.config["max_concurrent"]:
+                return
+            wait = max(self.paused_until - time.monotonic(),
+                       self.requests.wait_time(1),
+                       self.tokens.wait_time(waiter.permit.tokens))
+            if wait > 0:
+                self._schedule_dispatch(wait)
+                return
+            heapq.heappop(self.queue)
+            self.requests.take(1)
+            self.tokens.take(waiter.permit.tokens)
+            self.active += 1
+            self.counters["granted"] += 1
+            totals = self.wait_totals[PRIORITY_NAMES[waiter.permit.priority]]
+            totals[0] += 1
+            totals[1] += time.monotonic() - waiter.enqueued_at
+            waiter.permit.granted_at = time.monotonic()
+            waiter.grant()
+
+    def _schedule_dispatch(self, delay: float):
+        if self.timer is not None and self.timer.is_alive():
+            return
+        self.timer = threading.Timer(delay, self._on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            self._dispatch()
+
+    def _release(self, permit: Permit, used_tokens: Optional[int]):
+        with self.lock:
+            self.active -= 1
+            self.breaker.trial_in_flight = False
+            self.counters["completed"] += 1
+            if used_tokens is not None and used_tokens < permit.tokens:
+                self.tokens.give_back(permit.tokens - used_tokens)
+            elif used_tokens is not None:
+                self.tokens.take(used_tokens - permit.tokens)
+            self._dispatch()
+
+    def acquire(self, priority: int = INTERACTIVE, tokens: int = 0,
+                timeout: Optional[float] = None) -> Permit:
+        """Block the calling thread until a slot is granted"""
+        permit = Permit(self, priority, tokens)
+        waiter = _Waiter(permit)
+        with self.lock:
+            self._check_breaker()
+            self._enqueue(waiter)
+        if not waiter.event.wait(self.config["queue_timeout"] if timeout is None else timeout):
+            with self.lock:
+                if not waiter.event.is_set():
+                    waiter.cancelled = True
+                    self.counters["queue_timeouts"] += 1
+                    raise QueueTimeoutError("Too many requests are queued; please try again")
+        return permit
+
+    async def aacquire(self, priority: int = INTERACTIVE, tokens: int = 0,
+                       timeout: Optional[float] = None) -> Permit:
+        """Wait on the running event loop until a slot is granted"""
+        loop = asyncio.get_running_loop()
+        permit = Permit(self, priority, tokens)
+        waiter = _Waiter(permit, loop, loop.create_future())
+        with self.lock:
+            self._check_breaker()
+            self._enqueue(waiter)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future),
+                                          self.config["queue_timeout"] if timeout is None else timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self.lock:
+                waiter.cancelled = True
+            if waiter.future.done() and not waiter.future.cancelled():
+                permit.release(0)  # granted while we were giving up
+            else:
+                waiter.future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.counters["queue_timeouts"] += 1
+                raise QueueTimeoutError("Too many requests are queued; please try again") from None
+            raise
+
+    # --- server feedback --------------------------------------------------
+
+    def observe(self, status_code: int, headers) -> Optional[float]:
+        """
+        Update limits from a response's rate-limit headers and record the
+        outcome with the circuit breaker. Returns the server's retry-after
+        delay in seconds, if it sent one.
+        """
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        with self.lock:
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                # Without a local limit the queue would release everything at once after
+                # a pause and leave the order to the server, so priority would not count
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                if bucket.unlimited and limit is not None and limit.isdigit() and int(limit) > 0:
+                    bucket.adopt(int(limit))
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is not None and remaining.isdigit():
+                    bucket.clamp(int(remaining))
+                    if int(remaining) == 0:
+                        self._pause(parse_duration(headers.get(f"x-ratelimit-reset-{kind}")))
+
+            if status_code in self.config["retry_statuses"]:
+                # Hold the whole queue (not just this caller) until the server is ready
+                self._pause(retry_after)
+            if status_code == 429:
+                self.counters["rate_limited"] += 1
+                self.breaker.trial_in_flight = False  # rate limits are not outages
+            elif status_code >= 500:
+                self.record_failure(locked=True)
+            else:
+                self.breaker.record_success()
+        return retry_after
+
+    def _pause(self, seconds: Optional[float]):
+        if seconds:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def record_failure(self, locked: bool = False):
+        """Count a server or transport failure toward opening the circuit"""
+        if not locked:
+            with self.lock:
+                return self.record_failure(locked=True)
+        self.counters["failures"] += 1
+        self.breaker.record_failure()
+
+    # --- retries ----------------------------------------------------------
+
+    def should_retry(self, status_code: int, attempt: int, retry_after: Optional[float] = None) -> bool:
+        """Retry listed statuses unless out of attempts or asked to wait longer than a user would"""
+        if retry_after is not None and retry_after > self.config["queue_timeout"]:
+            return False
+        return status_code in self.config["retry_statuses"] and attempt < self.config["max_retries"]
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Exponential backoff with full jitter. A server-requested delay has
+        already paused dispatch, so the retry simply re-queues by priority.
+        """
+        self.counters["retries"] += 1
+        if retry_after is not None:
+            return 0.0
+        ceiling = min(self.config["backoff_max"], self.config["backoff_base"] * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def request(self, send: Callable[[], httpx.Response], priority: int = INTERACTIVE,
+                tokens: int = 0) -> httpx.Response:
+        """Run a blocking request through the queue, retrying rate limits and server errors"""
+        attempt = 0
+        while True:
+            permit = self.acquire(priority, tokens)
+            try:
+                response = send()
+            except httpx.TransportError:
+                permit.release(0)
+                self.record_failure()
+                if attempt >= self.config["max_retries"]:
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                attempt += 1
+                continue
+            retry_after = self.observe(response.status_code, response.headers)
+            permit.release(None if response.status_code == 200 else 0)
+            if not self.should_retry(response.status_code, attempt, retry_after):
+                return response
+            time.sleep(self.retry_delay(attempt, retry_after))
+            attempt += 1
+
+    # --- metrics ----------------------------------------------------------
+
+    def metrics(self) -> dict:
+        with self.lock:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, waiter in self.queue:
+                if not waiter.cancelled:
+                    depth[PRIORITY_NAMES[priority]] += 1
+            return dict(
+                self.counters,
+                queue_depth=depth,
+                active=self.active,
+                circuit=self.breaker.state,
+                paused_for=round(max(0.0, self.paused_until - time.monotonic()), 2),
+                avg_wait_seconds={name: round(total / count, 3) if count else 0.0
+                                  for name, (count, total) in self.wait_totals.items()}
+            )
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """Return the process-wide request scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
@@ -0,0 +1,194 @@
+"""
+Message segments for the Java Expert Chatbot
+Answers split in one pass into ordered text and code segments, incrementally
+while streaming and cached by content hash for rendering the history
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from utils.config import RENDER_CONFIG
+
+# Opening/closing fence: ``` or ~~~ (three or more), optionally indented (e.g. inside a list)
+_FENCE_RE = re.compile(r"([ \t]*)(`{3,}|~{3,})(.*)")
+
+# Info-string spellings mapped to the names the syntax highlighter knows
+_LANGUAGE_ALIASES = {"c++": "cpp", "c#": "csharp", "f#": "fsharp", "sh": "bash", "shell": "bash",
+                     "zsh": "bash", "yml": "yaml", "kt": "kotlin", "js": "javascript", "ts": "typescript"}
+
+def highlight_language(language: Optional[str]) -> str:
+    """Language to highlight a code block as (Java unless tagged otherwise)"""
+    if not language:
+        return "java"
+    language = language.lower()
+    return _LANGUAGE_ALIASES.get(language, language)
+
+class Segment(NamedTuple):
+    kind: str  # "text" or "code"
+    text: str
+    language: Optional[str] = None
+
+    @property
+    def highlight_language(self) -> str:
+        return highlight_language(self.language)
+
+class StreamingSegmenter:
+    """
+    Single-pass, incremental splitter of markdown into text and code segments.
+
+    Feed it the whole answer or streamed deltas: complete lines are consumed
+    as they arrive, so finished segments are available while the answer is
+    still streaming and nothing is scanned twice. Fences follow CommonMark:
+    ``` or ~~~ with an optional info string (``c++``, ``java title="A"``),
+    closed by the same character at least as long; an unclosed block runs
+    to the end of the answer.
+    """
+
+    def __init__(self):
+        self.segments: List[Segment] = []
+        self._partial = ""  # last line, not yet terminated
+        self._lines: List[str] = []  # lines of the open segment
+        self._fence = None  # (char, length, indent) while inside a code block
+        self._language = None
+
+    def feed(self, delta: str) -> List[Segment]:
+        """Consume streamed text; returns the segments it completed"""
+        if "\n" not in delta:
+            self._partial += delta
+            return []
+        lines = (self._partial + delta).split("\n")
+        self._partial = lines.pop()
+        completed = len(self.segments)
+        for line in lines:
+            self._consume(line)
+        return self.segments[completed:]
+
+    def close(self) -> List[Segment]:
+        """End of the answer: the last line may close a fence without a trailing newline"""
+        completed = len(self.segments)
+        if self._partial:
+            self._consume(self._partial)
+            self._partial = ""
+        if self._fence is not None:
+            self._emit_code()
+        else:
+            self._emit_text()
+        return self.segments[completed:]
+
+    def open_segment(self) -> Optional[Segment]:
+        """The segment still being written, including the unterminated line"""
+        lines = self._lines
+        partial = self._partial
+        if self._fence is not None:
+            if partial and not partial.strip(" \t").startswith(self._fence[0]):
+                lines = lines + [self._dedent(partial)]
+            return Segment("code", "\n".join(lines), self._language) if lines else None
+        # Hold back a line that may turn out to be an opening fence
+        if partial and partial.lstrip(" \t")[:1] not in ("`", "~"):
+            lines = lines + [partial]
+        text = "\n".join(lines)
+        return Segment("text", text) if text.strip() else None
+
+    def _consume(self, line: str):
+        if self._fence is None:
+            # Same whitespace as _FENCE_RE: "\xa0```" is text, not a fence
+            if line.lstrip(" \t")[:3] in ("```", "~~~"):
+                match = _FENCE_RE.fullmatch(line)
+                info = match.group(3)
+                # A backtick fence's info string cannot contain backticks (that is inline code)
+                if not (match.group(2)[0] == "`" and "`" in info):
+                    self._emit_text()
+                    self._fence = (match.group(2)[0], len(match.group(2)), len(match.group(1)))
+                    words = info.split()
+                    self._language = (words[0].strip("{}.") or None) if words else None
+                    return
+            self._lines.append(line)
+            return
+
+        char, length, _ = self._fence
+        stripped = line.strip(" \t\r")
+        if len(stripped) >= length and stripped[0] == char and stripped.count(char) == len(stripped):
+            self._emit_code()
+            return
+        self._lines.append(self._dedent(line))
+
+    def _dedent(self, line: str) -> str:
+        """Drop up to the fence's own indentation from a code line"""
+        indent = self._fence[2]
+        if not indent:
+            return line
+        leading = len(line) - len(line.lstrip(" \t"))
+        return line[min(indent, leading):]
+
+    def _emit_text(self):
+        text = "\n".join(self._lines)
+        if text.strip():
+            self.segments.append(Segment("text", text))
+        self._lines = []
+
+    def _emit_code(self):
+        if self._lines:
+            self.segments.append(Segment("code", "\n".join(self._lines), self._language))
+        self._lines = []
+        self._fence = None
+        self._language = None
+
+def parse_segments(content: str) -> Tuple[Segment, ...]:
+    """Split a message into text and code segments, in order"""
+    segmenter = StreamingSegmenter()
+    segmenter.feed(content)
+    segmenter.close()
+    return tuple(segmenter.segments)
+
+class SegmentCache:
+    """LRU of parsed messages keyed by a hash of their content"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or RENDER_CONFIG["segment_cache_entries"]
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(content: str) -> str:
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, content: str) -> Tuple[Segment, ...]:
+        key = self.key(content)
+        with self.lock:
+            segments = self.entries.get(key)
+            if segments is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return segments
+        segments = parse_segments(content)
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = segments
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return segments
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+_segment_cache = None
+_segment_cache_lock = threading.Lock()
+
+def get_segment_cache() -> SegmentCache:
+    """Return the process-wide segment cache"""
+    global _segment_cache
+    if _segment_cache is None:
+        with _segment_cache_lock:
+            if _segment_cache is None:
+                _segment_cache = SegmentCache()
+    return _segment_cache
+
+def get_message_segments(content: str) -> Tuple[Segment, ...]:
+    """Segments of a message, parsed on first use only"""
+    return get_segment_cache().get(content)
@@ -0,0 +1,126 @@
+"""
+Incremental Server-Sent Events decoder for streamed chat completions
+Parses raw response bytes in linear time, across arbitrary chunk boundaries
+"""
+
+import json
+from json.decoder import scanstring
+from typing import List, NamedTuple, Optional
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSON_ERRORS = (ValueError,)
+except ImportError:
+    _json_loads = json.loads
+    _JSON_ERRORS = (json.JSONDecodeError,)
+
+DONE_MARKER = "[DONE]"
+_CONTENT_KEY = '"content":"'
+
+class SSEEvent(NamedTuple):
+    """A single dispatched SSE event"""
+    event: str
+    data: str
+    id: Optional[str]
+
+class SSEDecoder:
+    """
+    Feed raw bytes, get complete events back.
+
+    Supports multi-line ``data:`` fields, ``event:``/``id:``/``retry:`` fields,
+    ``:`` keep-alive comments and LF or CRLF line endings.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._data = []
+        self._event = ""
+        self.last_event_id = None
+        self.retry = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Consume a chunk and return every event completed by it"""
+        events = []
+        buffer = self._buffer + chunk if self._buffer else chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                break
+            line = buffer[start:end]
+            start = end + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            event = self._process_line(line.decode("utf-8"))
+            if event is not None:
+                events.append(event)
+        self._buffer = buffer[start:]
+        return events
+
+    def finish(self) -> List[SSEEvent]:
+        """Flush a trailing line/event left when the stream closes"""
+        events = []
+        if self._buffer:
+            event = self._process_line(self._buffer.rstrip(b"\r").decode("utf-8"))
+            self._buffer = b""
+            if event is not None:
+                events.append(event)
+        event = self._process_line("")
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        if not line:
+            return self._dispatch()
+        if line[0] == ":":
+            return None  # keep-alive comment
+
+        field, sep, value = line.partition(":")
+        if sep and value.startswith(" "):
+            value = value[1:]
+
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            if "\0" not in value:
+                self.last_event_id = value
+        elif field == "retry":
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if not self._data:
+            self._event = ""
+            return None
+        event = SSEEvent(self._event or "message", "\n".join(self._data), self.last_event_id)
+        self._data = []
+        self._event = ""
+        return event
+
+def parse_delta(data: str) -> Optional[str]:
+    """
+    Extract ``choices[0].delta.content`` from a completion chunk.
+
+    Fast path: when the chunk has the fixed OpenAI delta shape, only the
+    content string literal is decoded instead of the whole object.
+    Raises ValueError on malformed JSON.
+    """
+    index = data.find(_CONTENT_KEY)
+    if index != -1 and data.find('"delta"', 0, index) != -1 and data.find(_CONTENT_KEY, index + 1) == -1:
+        content, _ = scanstring(data, index + len(_CONTENT_KEY))
+        return content
+
+    try:
+        json_data = _json_loads(data)
+    except _JSON_ERRORS as e:
+        raise ValueError(f"Malformed stream event: {e}") from e
+
+    choices = json_data.get("choices") if isinstance(json_data, dict) else None
+    if not choices:
+        return None
+    return choices[0].get("delta", {}).get("content")
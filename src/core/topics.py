@@ -0,0 +1,101 @@
+"""
+Topic classifier for the Java Expert Chatbot
+Weighted whole-word keyword matching, scored per topic
+"""
+
+import re
+import threading
+from typing import Dict, NamedTuple, Optional, Union
+
+from utils.config import TOPIC_CONFIG
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_PLURAL_SUFFIXES = ("s", "es")
+
+class TopicMatch(NamedTuple):
+    topic: str
+    confidence: float
+    scores: Dict[str, float]
+
+class TopicClassifier:
+    """
+    Score a query against weighted topic keywords.
+
+    Keywords are compiled into a phrase table keyed by their word sequence
+    (plural forms included), so a query is classified in one pass over its
+    words with dictionary lookups; multi-word phrases are only tried after a
+    word that can start one. Matching is on whole words, so "rest" no longer
+    fires inside "interest".
+    """
+
+    def __init__(self, topics: Dict[str, Union[Dict[str, float], list]],
+                 default_topic: Optional[str] = None, saturation_weight: Optional[float] = None):
+        self.default_topic = default_topic or TOPIC_CONFIG["default_topic"]
+        self.saturation_weight = saturation_weight or TOPIC_CONFIG["saturation_weight"]
+        self.topics = list(topics)
+        self.phrases = {}  # surface form -> (keyword, [(topic, weight), ...])
+        self.phrase_starts = {}  # first word -> longest phrase length starting with it
+        for topic, keywords in topics.items():
+            weighted = keywords if isinstance(keywords, dict) else dict.fromkeys(keywords, 1.0)
+            for keyword, weight in weighted.items():
+                words = tuple(_WORD_RE.findall(keyword.lower()))
+                for form in self._surface_forms(words):
+                    entry = self.phrases.setdefault(form, (" ".join(words), []))
+                    if (topic, float(weight)) not in entry[1]:
+                        entry[1].append((topic, float(weight)))
+                if len(words) > 1:
+                    self.phrase_starts[words[0]] = max(self.phrase_starts.get(words[0], 1), len(words))
+
+    @staticmethod
+    def _surface_forms(words: tuple):
+        yield words
+        for suffix in _PLURAL_SUFFIXES:
+            yield words[:-1] + (words[-1] + suffix,)
+
+    def classify(self, query: str) -> TopicMatch:
+        """Return the best topic, a 0-1 confidence and the raw per-topic scores"""
+        scores = dict.fromkeys(self.topics, 0.0)
+        seen = set()
+        words = _WORD_RE.findall(query.lower())
+        phrases = self.phrases
+        index, count = 0, len(words)
+        while index < count:
+            word = words[index]
+            entry, length = None, 1
+            # Longest phrase first so "spring boot" wins over "spring"
+            for n in range(min(self.phrase_starts.get(word, 1), count - index), 1, -1):
+                entry = phrases.get(tuple(words[index:index + n]))
+                if entry is not None:
+                    length = n
+                    break
+            if entry is None:
+                entry = phrases.get((word,))
+            index += length
+            if entry is None or entry[0] in seen:
+                continue  # each keyword counts once per query
+            seen.add(entry[0])
+            for topic, weight in entry[1]:
+                scores[topic] += weight
+
+        total = sum(scores.values())
+        if not total:
+            return TopicMatch(self.default_topic, 0.0, scores)
+        topic = max(self.topics, key=scores.__getitem__)
+        share = scores[topic] / total
+        evidence = scores[topic] / (scores[topic] + self.saturation_weight)
+        return TopicMatch(topic, round(share * evidence, 3), scores)
+
+def topic_label(topic: str) -> str:
+    return TOPIC_CONFIG["labels"].get(topic, topic.replace("_", " ").title())
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_topic_classifier() -> TopicClassifier:
+    """Return the process-wide classifier built from TOPIC_CONFIG"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = TopicClassifier(TOPIC_CONFIG["keywords"])
+    return _classifier
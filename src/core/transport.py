@@ -0,0 +1,119 @@
+"""
+Shared HTTP transport for the Java Expert Chatbot
+Pooled, keep-alive connections reused by every chatbot instance and session
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.lifecycle import on_shutdown
+from utils.config import TRANSPORT_CONFIG
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = {}
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def http2_available() -> bool:
+    """Check whether the optional h2 package is installed"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def build_limits() -> httpx.Limits:
+    """Build connection pool limits from TRANSPORT_CONFIG"""
+    return httpx.Limits(
+        max_connections=TRANSPORT_CONFIG["max_connections"],
+        max_keepalive_connections=TRANSPORT_CONFIG["max_keepalive_connections"],
+        keepalive_expiry=TRANSPORT_CONFIG["keepalive_expiry"]
+    )
+
+def build_timeout(read_timeout: float) -> httpx.Timeout:
+    """Build a timeout with the configured connect/pool limits"""
+    return httpx.Timeout(
+        read_timeout,
+        connect=TRANSPORT_CONFIG["connect_timeout"],
+        pool=TRANSPORT_CONFIG["pool_timeout"]
+    )
+
+def get_client() -> httpx.Client:
+    """Return the process-wide pooled HTTP client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=TRANSPORT_CONFIG["http2"] and http2_available(),
+                    limits=build_limits(),
+                    timeout=build_timeout(TRANSPORT_CONFIG["default_timeout"])
+                )
+                on_shutdown("http client", close_client)
+    return _client
+
+def close_client():
+    """Close the shared client and drop all pooled connections"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=TRANSPORT_CONFIG["http2"] and http2_available(),
+            limits=build_limits(),
+            timeout=build_timeout(TRANSPORT_CONFIG["default_timeout"])
+        )
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the async client bound to the running event loop"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def _get_host_slot(url: str) -> threading.BoundedSemaphore:
+    """Get the per-host semaphore limiting concurrent requests to one host"""
+    host = urlsplit(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(TRANSPORT_CONFIG["max_connections_per_host"])
+            _host_slots[host] = slot
+    return slot
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the per-host request slots for the duration of a request"""
+    slot = _get_host_slot(url)
+    if not slot.acquire(timeout=TRANSPORT_CONFIG["pool_timeout"]):
+        raise httpx.PoolTimeout(f"Too many concurrent requests to {urlsplit(url).netloc}")
+    try:
+        yield
+    finally:
+        slot.release()
+
+def post_json(url: str, headers: dict, payload: dict, timeout: float) -> httpx.Response:
+    """POST a JSON payload through the shared pool and return the full response"""
+    with host_slot(url):
+        return get_client().post(url, headers=headers, json=payload, timeout=build_timeout(timeout))
+
+@contextmanager
+def stream_post(url: str, headers: dict, payload: dict, timeout: float):
+    """POST a JSON payload through the shared pool and yield the streaming response"""
+    with host_slot(url):
+        with get_client().stream("POST", url, headers=headers, json=payload,
+                                 timeout=build_timeout(timeout)) as response:
+            yield response
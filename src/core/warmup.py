@@ -0,0 +1,140 @@
+"""
+Warm-up job for the built-in sample questions
+Pre-generates their answers into the response cache so sidebar clicks are instant
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import List
+
+from core.cache import cache_scope, get_response_cache, prompt_hash
+from core.router import get_model_router
+from core.scheduler import BACKGROUND
+from core.transport import close_async_client
+from utils.config import ROUTING_CONFIG, SAMPLE_QUESTIONS, WARMUP_CONFIG
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+def collect_sample_questions() -> List[str]:
+    """All sample questions shown anywhere in the app, de-duplicated in order"""
+    from core.chat import JavaChatbot
+
+    questions = list(SAMPLE_QUESTIONS)
+    for category_questions in JavaChatbot.get_sample_questions().values():
+        questions.extend(category_questions)
+    return list(dict.fromkeys(questions))
+
+def route_scopes(chatbot) -> List[str]:
+    """Cache scope of every route; a scope changes when its model or system prompt changes"""
+    router = get_model_router()
+    features = router.features("")
+    scopes = []
+    for name in ROUTING_CONFIG["routes"]:
+        payload = chatbot.build_payload("", route=router.route_named(name, "streaming", features))
+        scopes.append(cache_scope(payload["model"], payload["messages"][0]["content"], payload["temperature"]))
+    return scopes
+
+def prompt_fingerprint(chatbot) -> str:
+    """Fingerprint of all route scopes the cached answers may live under"""
+    return prompt_hash("\n".join(route_scopes(chatbot)))
+
+def _load_manifest() -> dict:
+    try:
+        with open(WARMUP_CONFIG["manifest_path"], "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(manifest: dict):
+    os.makedirs(os.path.dirname(WARMUP_CONFIG["manifest_path"]), exist_ok=True)
+    tmp_path = WARMUP_CONFIG["manifest_path"] + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, WARMUP_CONFIG["manifest_path"])
+
+async def _warm_all(chatbot, questions: List[str]) -> dict:
+    semaphore = asyncio.Semaphore(WARMUP_CONFIG["concurrency"])
+    results = {"warmed": 0, "failed": 0}
+
+    async def warm(question):
+        async with semaphore:
+            try:
+                async for _ in chatbot.astream_response(question, priority=BACKGROUND):
+                    pass
+                results["warmed"] += 1
+            except Exception as e:
+                results["failed"] += 1
+                print(f"❌ Warm-up failed for '{question[:40]}': {e}")
+
+    try:
+        await asyncio.gather(*(warm(q) for q in questions))
+    finally:
+        await close_async_client()
+    return results
+
+def warm_sample_questions(chatbot) -> dict:
+    """Generate and persist answers for every sample question"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"skipped": "response cache disabled"}
+
+    scopes = route_scopes(chatbot)
+    fingerprint = prompt_fingerprint(chatbot)
+    manifest = _load_manifest()
+    if manifest.get("fingerprint") and manifest["fingerprint"] != fingerprint:
+        # A system prompt or model changed: drop answers cached under the old scopes
+        for scope in manifest.get("scopes", [manifest["fingerprint"]]):
+            if scope not in scopes:
+                cache.invalidate(scope)
+
+    questions = collect_sample_questions()
+    started = time.time()
+    results = asyncio.run(_warm_all(chatbot, questions))
+
+    _save_manifest({
+        "fingerprint": fingerprint,
+        "scopes": scopes,
+        "questions": questions,
+        "warmed_at": time.time(),
+        "duration_seconds": round(time.time() - started, 2),
+        "results": results
+    })
+    return results
+
+def _warmup_loop(chatbot):
+    while True:
+        results = warm_sample_questions(chatbot)
+        print(f"🔥 Sample question warm-up finished: {results}")
+        if not WARMUP_CONFIG["refresh_interval"]:
+            return
+        time.sleep(WARMUP_CONFIG["refresh_interval"])
+
+def start_background_warmup(chatbot) -> bool:
+    """Start the warm-up job once per process; returns True if it was started now"""
+    global _warmup_thread
+    if not WARMUP_CONFIG["enabled"]:
+        return False
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return False
+        _warmup_thread = threading.Thread(target=_warmup_loop, args=(chatbot,),
+                                          name="sample-warmup", daemon=True)
+        _warmup_thread.start()
+    return True
+
+def main():
+    """Run the warm-up once, e.g. from a deploy hook: cd src && python -m core.warmup"""
+    from core.chat import GroqJavaChatbot, load_api_key
+
+    api_key = load_api_key()
+    if not api_key:
+        return
+    results = warm_sample_questions(GroqJavaChatbot(api_key))
+    print(f"🔥 Warm-up finished: {results}")
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,11 @@ import sys
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+from core.backends import get_backend_pool, load_backend_specs
+from core.cancellation import start_stream_reaper
 from core.chat import GroqJavaChatbot
+from core.engine import get_chat_engine
+from core.warmup import start_background_warmup
 from ui.styles import load_styles
 from ui.components import render_header, render_footer
 from ui.sidebar import render_sidebar
@@ -25,24 +29,52 @@ def configure_page():
         initial_sidebar_state="expanded"
     )
 
-def initialize_chatbot():
-    """Initialize the GroqJavaChatbot with API key"""
+def _secret(name: str):
     try:
-        # Try to get API key from secrets first, then from environment
-        try:
-            api_key = st.secrets["GROQ_API_KEY"]
-        except:
-            from dotenv import load_dotenv
-            load_dotenv()
-            api_key = os.getenv("GROQ_API_KEY")
-            
-        if not api_key:
-            raise Exception("API key not found")
-            
-        return GroqJavaChatbot(api_key)
-    except Exception as e:
+        return st.secrets[name]
+    except Exception:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def load_backend_settings():
+    """Read .env and Streamlit secrets once per process, not on every rerun"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return load_backend_specs(_secret)
+
+def _session_alive(session_id: str) -> bool:
+    from streamlit.runtime import Runtime
+    return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+@st.cache_resource(show_spinner=False)
+def start_background_services():
+    """Sample-question warm-up and the orphaned-stream reaper, once per process"""
+    # The warm-up gets its own chatbot so it never touches a session's per-request state
+    start_background_warmup(GroqJavaChatbot(engine=get_chat_engine()))
+    # Cancel streams of sessions that disconnected mid-answer
+    start_stream_reaper(_session_alive)
+    return True
+
+def initialize_chatbot():
+    """
+    Return this session's chatbot. The engine, backend pool, HTTP clients,
+    prompt registry and history index are process-wide and shared by all
+    sessions; only the light per-request state lives in the session.
+    """
+    chatbot = st.session_state.get("chatbot")
+    if chatbot is not None:
+        return chatbot
+    
+    # Secrets first, then environment (.env); several keys and endpoints may be configured
+    specs = load_backend_settings()
+    if not specs:
         st.error("❌ API key not found. Please configure GROQ_API_KEY in Streamlit secrets or .env file.")
         st.stop()
+    
+    get_backend_pool(specs)
+    chatbot = GroqJavaChatbot(engine=get_chat_engine())
+    st.session_state.chatbot = chatbot
+    return chatbot
 
 def main():
     """Main application function"""
@@ -61,6 +93,9 @@ def main():
     # Initialize chatbot
     chatbot = initialize_chatbot()
     
+    # Warm-up and stream reaper (once per process)
+    start_background_services()
+    
     # Render main chat interface
     render_chat_interface(chatbot)
     
@@ -3,13 +3,15 @@ Chat interface for the Java Expert Chatbot Application
 """
 
 import streamlit as st
-import re
 import json
 import os
-from utils.chat_utils import extract_code_blocks, save_chat_history
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from core.cancellation import CancellationToken
+from core.segments import get_message_segments
+from utils.chat_utils import save_chat_history
 from ui.components import (
     render_user_input_section, render_action_center, render_user_message,
-    render_assistant_response_header, render_loading_indicator, 
+    render_assistant_response_header, render_stream_progress, 
     render_chat_history_header, render_code_block_with_copy
 )
 
@@ -23,8 +25,14 @@ def initialize_session_state():
         st.session_state.copied_code = {}
     if "current_query" not in st.session_state:
         st.session_state.current_query = ""
+    if "user_input" not in st.session_state:
+        st.session_state.user_input = ""
     if "current_chat_saved" not in st.session_state:
         st.session_state.current_chat_saved = False
+    if "current_history_file" not in st.session_state:
+        st.session_state.current_history_file = None
+    if "active_stream_token" not in st.session_state:
+        st.session_state.active_stream_token = None
 
 def auto_save_current_chat():
     """Automatically save current chat if it exists"""
@@ -39,8 +47,10 @@ def auto_save_current_chat():
                 break
         
         if first_question:
-            saved_file = save_chat_history(first_question, st.session_state.chat_history)
+            saved_file = save_chat_history(first_question, st.session_state.chat_history,
+                                           st.session_state.get("current_history_file"))
             if saved_file:
+                st.session_state.current_history_file = saved_file
                 # Mark current chat as saved
                 st.session_state.current_chat_saved = True
                 # Show notification
@@ -48,6 +58,11 @@ def auto_save_current_chat():
                 return True
     return False
 
+def clear_query():
+    """Empty the question and its text box (applied before the box is drawn on the next run)"""
+    st.session_state.current_query = ""
+    st.session_state.pending_input = ""
+
 def handle_sample_question():
     """Handle selected question from sidebar"""
     if st.session_state.selected_question:
@@ -57,21 +72,27 @@ def handle_sample_question():
         
         # Clear current chat and set new question
         st.session_state.chat_history = []
+        st.session_state.current_history_file = None
         st.session_state.current_query = st.session_state.selected_question
+        st.session_state.user_input = st.session_state.selected_question
         st.session_state.selected_question = ""
         st.session_state.current_chat_saved = False
         st.session_state.copied_code = {}
+        st.session_state.auto_submit = True
 
 def render_input_section():
     """Render the user input section"""
     render_user_input_section()
     
+    # A widget's state can only be set before it is drawn in a run
+    if "pending_input" in st.session_state:
+        st.session_state.user_input = st.session_state.pop("pending_input")
+    
     col1, col2 = st.columns([4, 1])
     
     with col1:
         user_query = st.text_area(
             "Your Question:",
-            value=st.session_state.current_query,
             height=120,
             placeholder="🚀 Example: How to implement JWT authentication in Spring Boot?\n💡 Or: Best practices for RESTful API design?\n🔒 Or: How to secure a Spring Boot application?",
             key="user_input",
@@ -89,7 +110,7 @@ def render_input_section():
         submit_button = st.button("🚀 Ask Expert", type="primary", use_container_width=True)
         
         # Action buttons with enhanced styling
-        st.markdown('<div style="margin-top: 1rem;">', unsafe_allow_html=True)
+        st.markdown('<div class="action-buttons">', unsafe_allow_html=True)
         col2a, col2b = st.columns(2)
         with col2a:
             clear_button = st.button("🗑️ Clear", use_container_width=True, help="Clear current conversation")
@@ -113,8 +134,10 @@ def handle_manual_save():
                 break
         
         if first_question:
-            saved_file = save_chat_history(first_question, st.session_state.chat_history)
+            saved_file = save_chat_history(first_question, st.session_state.chat_history,
+                                           st.session_state.get("current_history_file"))
             if saved_file:
+                st.session_state.current_history_file = saved_file
                 st.session_state.current_chat_saved = True
                 st.success(f"✅ History saved as: {os.path.basename(saved_file)}")
                 st.rerun()
@@ -129,46 +152,36 @@ def handle_clear_chat():
     # Clear everything
     st.session_state.chat_history = []
     st.session_state.copied_code = {}
-    st.session_state.current_query = ""
+    clear_query()
     st.session_state.current_chat_saved = False
+    st.session_state.current_history_file = None
     st.rerun()
 
-def stream_with_progress(chatbot, streaming_container):
-    """Handle streaming response with progress indicators"""
-    # Create streaming container
-    progress_container = st.container()
-    with progress_container:
-        render_loading_indicator()
-    
-    progress_bar = st.progress(0)
+def stop_active_stream(reason: str = "stopped"):
+    """Cancel the stream this session is still running, if any"""
+    token = st.session_state.get("active_stream_token")
+    if token is not None:
+        token.cancel(reason)
+        st.session_state.active_stream_token = None
+
+def stream_with_progress(chatbot, streaming_container, history=None, cancel_token=None):
+    """Handle streaming response with progress driven by the stream's own events"""
     status_text = st.empty()
+    progress_bar = st.empty()
     
-    # Progress updates
-    status_text.text("🔍 Analyzing your question...")
-    progress_bar.progress(10)
+    def show_progress(progress):
+        render_stream_progress(status_text, progress_bar, progress)
     
-    status_text.text("🧠 Generating enterprise-grade solution...")
-    progress_bar.progress(30)
-    
-    status_text.text("🔒 Adding security best practices...")
-    progress_bar.progress(50)
-    
-    status_text.text("📝 Creating complete code examples...")
-    progress_bar.progress(70)
-    
-    # Get the actual response
     response = chatbot.stream_response(
         st.session_state.current_query, 
         print_to_terminal=True,
-        streamlit_container=streaming_container
+        streamlit_container=streaming_container,
+        history=history,
+        cancel_token=cancel_token,
+        on_progress=show_progress
     )
     
-    progress_bar.progress(100)
-    status_text.text("✅ Response completed!")
-    
-    # Clean up progress indicators after a short delay
-    import time
-    time.sleep(1)
+    # The rerun that follows shows the answer, so clear the indicators right away
     progress_bar.empty()
     status_text.empty()
     
@@ -180,17 +193,9 @@ def process_user_query(chatbot):
         st.warning("⚠️ Please enter a question.")
         return
     
-    # Check if this is a new question when there's already a chat history
-    if (len(st.session_state.chat_history) > 0 and 
-        not st.session_state.current_chat_saved and
-        st.session_state.current_query not in [msg["content"] for msg in st.session_state.chat_history if msg["role"] == "user"]):
-        
-        # Auto-save current chat before starting new question
-        auto_save_current_chat()
-        
-        # Clear chat for new question
-        st.session_state.chat_history = []
-        st.session_state.current_chat_saved = False
+    # Follow-up questions continue the current conversation (Clear starts a new one);
+    # earlier turns are sent as context, fitted to the token budget by the chatbot
+    history = list(st.session_state.chat_history)
     
     # Add user message to history
     st.session_state.chat_history.append({"role": "user", "content": st.session_state.current_query})
@@ -203,18 +208,57 @@ def process_user_query(chatbot):
     # Create streaming container
     streaming_container = st.empty()
     
-    # Get streaming response
-    response = stream_with_progress(chatbot, streaming_container)
+    # Stop cancels the upstream stream; the click reruns the script, which interrupts this run
+    ctx = get_script_run_ctx()
+    token = CancellationToken(ctx.session_id if ctx else None)
+    st.session_state.active_stream_token = token
+    st.button("⏹️ Stop", key="stop_stream", on_click=stop_active_stream, help="Stop generating this answer")
+    
+    # Get streaming response (reset first: a rerun may interrupt us before the stream starts)
+    chatbot.last_partial = None
+    try:
+        response = stream_with_progress(chatbot, streaming_container, history, token)
+    except BaseException:
+        # Interrupted by a rerun (Stop, Clear, ...): keep what was generated so far
+        partial = chatbot.last_partial.text if chatbot.last_partial is not None else ""
+        st.session_state.chat_history.append(
+            {"role": "assistant", "content": partial + "\n\n*⏹️ Generation stopped.*"})
+        st.session_state.current_chat_saved = False
+        clear_query()
+        st.session_state.active_stream_token = None
+        raise
+    st.session_state.active_stream_token = None
+    if chatbot.last_cancelled:
+        response += "\n\n*⏹️ Generation stopped.*"
     
-    # Add bot response to history
+    # Add bot response to history (new turns are appended on the next save)
     st.session_state.chat_history.append({"role": "assistant", "content": response})
+    st.session_state.current_chat_saved = False
     
     # Clear the current query after processing
-    st.session_state.current_query = ""
+    clear_query()
     
     # Rerun to show the new response in proper format
     st.rerun()
 
+@st.fragment
+def render_assistant_message(message_index, content):
+    """
+    Render one answer from its cached segments. As a fragment, clicking a
+    copy button reruns only this message instead of the whole page.
+    """
+    render_assistant_response_header()
+    
+    block_index = 0
+    for segment in get_message_segments(content):
+        if segment.kind == "code":
+            render_code_block_with_copy(segment.text, segment.language, message_index, block_index)
+            block_index += 1
+        else:
+            st.markdown(segment.text)
+    
+    st.markdown("---")
+
 def display_chat_history():
     """Display the chat history with enhanced styling"""
     if not st.session_state.chat_history:
@@ -226,35 +270,17 @@ def display_chat_history():
     for i, message in enumerate(st.session_state.chat_history):
         if message["role"] == "user":
             render_user_message(message["content"])
-        
         else:  # assistant
-            render_assistant_response_header()
-            
-            # Display the response with code highlighting
-            response_content = message["content"]
-            
-            # Extract and display code blocks separately for copy functionality
-            code_blocks = extract_code_blocks(response_content)
-            
-            if code_blocks:
-                # Display response without code blocks first
-                text_without_code = re.sub(r'```(\w+)?\n(.*?)```', '\n[CODE BLOCK BELOW]\n', response_content, flags=re.DOTALL)
-                st.markdown(text_without_code)
-                
-                # Display each code block with copy functionality
-                for j, (language, code) in enumerate(code_blocks):
-                    render_code_block_with_copy(code, language, i, j)
-            else:
-                # No code blocks, display normally
-                st.markdown(response_content)
-            
-            st.markdown("---")
+            render_assistant_message(i, message["content"])
 
 def render_chat_interface(chatbot):
     """Render the complete chat interface"""
     # Initialize session state
     initialize_session_state()
     
+    # A stream left over from an interrupted run must not keep the connection open
+    stop_active_stream("rerun")
+    
     # Handle sample question selection
     handle_sample_question()
     
@@ -268,7 +294,7 @@ def render_chat_interface(chatbot):
     if clear_button:
         handle_clear_chat()
     
-    if submit_button:
+    if submit_button or st.session_state.pop("auto_submit", False):
         process_user_query(chatbot)
     
     # Display chat history
@@ -4,55 +4,41 @@ Sidebar functionality for the Java Expert Chatbot Application
 
 import streamlit as st
 import os
-import json
+from ui.chat_interface import clear_query
 from ui.components import render_empty_history_state, render_sample_question_item
+from utils.config import FILE_CONFIG, SAMPLE_QUESTIONS
+from utils.history_store import get_history_store
 
-def load_saved_histories():
-    """Load all saved chat histories"""
+def load_saved_histories(offset=0, limit=None):
+    """Load one page of saved chat history metadata (newest first)"""
     try:
-        history_dir = "chat_history"
-        if not os.path.exists(history_dir):
-            return []
-        
-        histories = []
-        for filename in os.listdir(history_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(history_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        histories.append({
-                            "filename": filename,
-                            "filepath": filepath,
-                            "question": data.get("question", "Unknown Question"),
-                            "display_name": data.get("display_name", data.get("question", "Unknown Question")),
-                            "timestamp": data.get("timestamp", ""),
-                            "chat_history": data.get("chat_history", [])
-                        })
-                except Exception as e:
-                    continue
-        
-        # Sort by timestamp (newest first)
-        histories.sort(key=lambda x: x["timestamp"], reverse=True)
-        return histories
+        return get_history_store().list_page(offset, limit)
     except Exception as e:
         st.error(f"Error loading histories: {e}")
         return []
 
+def search_saved_histories(text, limit=20):
+    """Full-text search over saved histories, best matches first"""
+    try:
+        return get_history_store().search(text, limit)
+    except Exception as e:
+        st.error(f"Error searching histories: {e}")
+        return []
+
+def load_history_transcript(filepath):
+    """Load the full transcript of a saved history"""
+    try:
+        return get_history_store().load_transcript(filepath)
+    except Exception as e:
+        st.error(f"Error loading history: {e}")
+        return None
+
 def update_history_name(filepath, new_name):
-    """Update the display name of a saved history"""
+    """Update the display name of a saved history (a meta line appended to its journal)"""
     try:
-        # Read existing data
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Update display name
-        data["display_name"] = new_name
-        
-        # Save back to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
+        new_path = get_history_store().rename(filepath, new_name)
+        if st.session_state.get("current_history_file") == filepath:
+            st.session_state.current_history_file = new_path  # legacy .json became a journal
         return True
     except Exception as e:
         st.error(f"Error updating history name: {e}")
@@ -61,7 +47,11 @@ def update_history_name(filepath, new_name):
 def delete_history_file(filepath):
     """Delete a saved history file"""
     try:
-        os.remove(filepath)
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass  # already gone: still drop it from the index
+        get_history_store().remove(filepath)
         return True
     except Exception as e:
         st.error(f"Error deleting history: {e}")
@@ -82,8 +72,10 @@ def auto_save_current_chat():
                 break
         
         if first_question:
-            saved_file = save_chat_history(first_question, st.session_state.chat_history)
+            saved_file = save_chat_history(first_question, st.session_state.chat_history,
+                                           st.session_state.get("current_history_file"))
             if saved_file:
+                st.session_state.current_history_file = saved_file
                 # Mark current chat as saved
                 st.session_state.current_chat_saved = True
                 # Show notification
@@ -93,21 +85,30 @@ def auto_save_current_chat():
 
 def render_sidebar_header():
     """Render the sidebar header"""
-    st.markdown("""
-    <div style="background: var(--primary-gradient); padding: 1.5rem; border-radius: var(--border-radius); margin-bottom: 1.5rem; text-align: center; color: white; box-shadow: var(--shadow-medium);">
-        <h2 style="margin: 0; font-size: 1.5rem; text-shadow: 1px 1px 2px rgba(0,0,0,0.3);">🎛️ Control Panel</h2>
-        <p style="margin: 0.5rem 0 0 0; opacity: 0.9; font-size: 0.9rem;">Manage your Java learning journey</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown('<div class="sidebar-banner"><h2>🎛️ Control Panel</h2>'
+                '<p>Manage your Java learning journey</p></div>', unsafe_allow_html=True)
 
 def render_saved_histories_section():
     """Render the saved histories section in sidebar"""
     st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
     st.subheader("📚 Saved Histories")
-    saved_histories = load_saved_histories()
+    search_text = st.text_input(
+        "Search histories",
+        key="history_search",
+        placeholder="🔍 Search questions, answers and code...",
+        label_visibility="collapsed"
+    ).strip()
+    
+    page_size = FILE_CONFIG["max_histories_display"]
+    page = min(st.session_state.get("history_page", 0), max(get_history_store().count() - 1, 0) // page_size)
+    if search_text:
+        saved_histories = search_saved_histories(search_text)
+        st.caption(f"{len(saved_histories)} matching chats")
+    else:
+        saved_histories = load_saved_histories(page * page_size, page_size)
     
     if saved_histories:
-        for i, history in enumerate(saved_histories[:10]):  # Show last 10
+        for i, history in enumerate(saved_histories):
             # Create a container for each history item
             with st.container():
                 # Create columns for buttons
@@ -118,14 +119,19 @@ def render_saved_histories_section():
                     display_name = history.get("display_name", history["question"])
                     display_text = display_name[:32] + "..." if len(display_name) > 32 else display_name
                     
-                    if st.button(f"📄 {display_text}", key=f"load_history_{i}", help=f"Load: {display_name}"):
+                    if st.button(f"📄 {display_text}", key=f"load_history_{i}",
+                                 help=history.get("snippet") or f"Load: {display_name}"):
                         # Auto-save current chat before loading new one
                         auto_save_current_chat()
                         
-                        # Load selected history
-                        st.session_state.chat_history = history["chat_history"]
-                        st.session_state.current_query = ""
+                        # Load selected history (transcript is read only now)
+                        transcript = load_history_transcript(history["filepath"])
+                        if transcript is None:
+                            st.stop()
+                        st.session_state.chat_history = transcript
+                        clear_query()
                         st.session_state.current_chat_saved = True  # Mark as already saved
+                        st.session_state.current_history_file = history["filepath"]
                         st.success("✅ History loaded!")
                         st.rerun()
                 
@@ -178,27 +184,44 @@ def render_saved_histories_section():
             # Add separator between items (only if not editing)
             if not st.session_state.get(f"editing_history_{i}", False):
                 st.markdown("")
+        
+        if not search_text:
+            render_history_pagination(page, page_size)
     else:
         render_empty_history_state()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+def render_history_pagination(page, page_size):
+    """Render previous/next controls for the saved histories list"""
+    total = get_history_store().count()
+    if total <= page_size:
+        return
+    
+    last_page = (total - 1) // page_size
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("◀", key="history_prev", disabled=page == 0, help="Newer histories"):
+            st.session_state.history_page = page - 1
+            st.rerun()
+    with info_col:
+        st.caption(f"Page {page + 1} of {last_page + 1} · {total} chats")
+    with next_col:
+        if st.button("▶", key="history_next", disabled=page >= last_page, help="Older histories"):
+            st.session_state.history_page = page + 1
+            st.rerun()
+
 def render_sample_questions_section():
     """Render the sample questions section in sidebar"""
     st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
     st.subheader("💡 Sample Questions")
-    sample_questions = [
-        "How to implement pagination in Spring Boot?",
-        "Create a secure REST API with JWT authentication",
-        "How to use MapStruct for entity-DTO mapping?",
-        "Implement global exception handling in Spring Boot",
-        "Create a complete CRUD operation with security",
-        "How to implement audit trail in Spring Boot?",
-        "Best practices for Spring Boot validation"
-    ]
     
-    for i, question in enumerate(sample_questions):
+    for i, question in enumerate(SAMPLE_QUESTIONS):
         render_sample_question_item(question, i)
+        # Answers are pre-warmed into the response cache, so asking is instant
+        if st.button("⚡ Ask this", key=f"ask_sample_{i}", use_container_width=True):
+            st.session_state.selected_question = question
+            st.rerun()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1,358 +1,87 @@
 """
 CSS Styles for the Java Expert Chatbot Application
+The stylesheet lives in styles.css; it is minified once per process and
+served as a static asset when Streamlit static serving is enabled
 """
 
+import hashlib
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Tuple
+
 import streamlit as st
 
+STYLES_PATH = os.path.join(os.path.dirname(__file__), "styles.css")
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_SPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"\s*([{};:,>])\s*")
+
+_published = {}  # static dir -> bundle file name
+_publish_lock = threading.Lock()
+
+def minify_css(css: str) -> str:
+    """Drop comments and whitespace that do not change the meaning of the stylesheet"""
+    css = _COMMENT_RE.sub("", css)
+    css = _SPACE_RE.sub(" ", css)
+    css = _PUNCTUATION_RE.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+@lru_cache(maxsize=1)
+def get_css_bundle() -> Tuple[str, str]:
+    """Minified stylesheet and its content hash, built once per process"""
+    with open(STYLES_PATH, "r", encoding="utf-8") as f:
+        css = minify_css(f.read())
+    return css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+
+def publish_css_bundle(static_dir: str) -> str:
+    """Write the bundle into the app's static folder (once); returns its file name"""
+    with _publish_lock:
+        name = _published.get(static_dir)
+        if name is None:
+            css, digest = get_css_bundle()
+            name = f"styles.{digest}.min.css"
+            path = os.path.join(static_dir, name)
+            if not os.path.exists(path):
+                os.makedirs(static_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(css)
+                os.replace(tmp_path, path)
+            _published[static_dir] = name
+    return name
+
+def _static_dir():
+    """The static folder Streamlit serves, or None if static serving is off"""
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None or not ctx.main_script_path:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(ctx.main_script_path)), "static")
+
 def load_styles():
     """Load all CSS styles for the application"""
-    st.markdown("""
-    <style>
-    /* Global Variables */
-    :root {
-        --primary-color: #667eea;
-        --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        --secondary-gradient: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-        --success-gradient: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-        --dark-gradient: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
-        --glass-bg: rgba(255, 255, 255, 0.1);
-        --glass-border: rgba(255, 255, 255, 0.2);
-        --shadow-light: 0 8px 32px rgba(102, 126, 234, 0.1);
-        --shadow-medium: 0 8px 32px rgba(102, 126, 234, 0.2);
-        --shadow-heavy: 0 16px 48px rgba(102, 126, 234, 0.3);
-        --border-radius: 16px;
-        --transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-    }
-
-    /* Main App Styling */
-    .stApp {
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-        min-height: 100vh;
-    }
-
-    /* Sidebar Modern Styling */
-    .css-1d391kg, .css-1cypcdb {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        border-right: 1px solid var(--glass-border);
-    }
-
-    /* Header with Glass Morphism */
-    .main-header {
-        background: var(--primary-gradient);
-        padding: 2rem;
-        border-radius: var(--border-radius);
-        margin-bottom: 2rem;
-        box-shadow: var(--shadow-heavy);
-        backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .main-header::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%);
-        animation: shimmer 3s ease-in-out infinite;
-    }
-
-    @keyframes shimmer {
-        0%, 100% { transform: rotate(0deg); }
-        50% { transform: rotate(180deg); }
-    }
-
-    .main-header h1 {
-        color: white;
-        text-align: center;
-        margin: 0;
-        font-weight: 700;
-        font-size: 2.5rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        position: relative;
-        z-index: 1;
-    }
-
-    .main-header p {
-        position: relative;
-        z-index: 1;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.3);
-    }
-
-    /* Response Container with Glass Effect */
-    .response-container {
-        background: rgba(255, 255, 255, 0.8);
-        backdrop-filter: blur(20px);
-        padding: 2rem;
-        border-radius: var(--border-radius);
-        border: 1px solid var(--glass-border);
-        margin: 1.5rem 0;
-        box-shadow: var(--shadow-medium);
-        position: relative;
-        overflow: hidden;
-        transition: var(--transition);
-    }
-
-    .response-container:hover {
-        transform: translateY(-2px);
-        box-shadow: var(--shadow-heavy);
-    }
-
-    .response-container::before {
-        content: '';
-        position: absolute;
-        left: 0;
-        top: 0;
-        height: 100%;
-        width: 4px;
-        background: var(--primary-gradient);
-        border-radius: 0 4px 4px 0;
-    }
-
-    /* User Message Styling */
-    .user-message {
-        background: var(--success-gradient);
-        padding: 1.5rem;
-        border-radius: var(--border-radius);
-        margin: 1.5rem 0;
-        box-shadow: var(--shadow-light);
-        border: 1px solid var(--glass-border);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .user-message strong {
-        color: white;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.3);
-    }
-
-    /* Code Block Modern Styling */
-    .stCodeBlock {
-        background: var(--dark-gradient) !important;
-        border-radius: var(--border-radius) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        box-shadow: var(--shadow-medium) !important;
-        margin: 1rem 0 !important;
-    }
-
-    /* Button Styling */
-    .stButton > button {
-        background: var(--primary-gradient);
-        border: none;
-        border-radius: var(--border-radius);
-        padding: 0.75rem 1.5rem;
-        color: white;
-        font-weight: 600;
-        box-shadow: var(--shadow-light);
-        transition: var(--transition);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: var(--shadow-heavy);
-    }
-
-    .stButton > button:active {
-        transform: translateY(0);
-    }
-
-    /* Special Button Types */
-    .stButton > button[data-testid*="clear"] {
-        background: var(--secondary-gradient);
-    }
-
-    .stButton > button[data-testid*="save"] {
-        background: var(--success-gradient);
-    }
-
-    /* Input Styling */
-    .stTextArea textarea {
-        background: rgba(255, 255, 255, 0.8);
-        backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: var(--border-radius);
-        padding: 1rem;
-        transition: var(--transition);
-    }
-
-    .stTextArea textarea:focus {
-        border-color: var(--primary-color);
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-    }
-
-    /* Progress Bar Styling */
-    .stProgress .st-bo {
-        background: var(--primary-gradient);
-        border-radius: 10px;
-    }
-
-    /* Sidebar Elements */
-    .sidebar-section {
-        background: rgba(255, 255, 255, 0.8);
-        backdrop-filter: blur(20px);
-        padding: 1.5rem;
-        border-radius: var(--border-radius);
-        margin-bottom: 1.5rem;
-        border: 1px solid var(--glass-border);
-        box-shadow: var(--shadow-light);
-    }
-
-    /* History Item Styling */
-    .history-item {
-        background: rgba(255, 255, 255, 0.9);
-        backdrop-filter: blur(10px);
-        padding: 1rem;
-        border-radius: 12px;
-        margin-bottom: 0.75rem;
-        border: 1px solid var(--glass-border);
-        box-shadow: var(--shadow-light);
-        transition: var(--transition);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .history-item::before {
-        content: '';
-        position: absolute;
-        left: 0;
-        top: 0;
-        height: 100%;
-        width: 3px;
-        background: var(--primary-gradient);
-        border-radius: 0 3px 3px 0;
-    }
-
-    .history-item:hover {
-        transform: translateX(5px);
-        box-shadow: var(--shadow-medium);
-    }
-
-    /* Toast/Alert Styling */
-    .stAlert {
-        border-radius: var(--border-radius);
-        border: none;
-        box-shadow: var(--shadow-light);
-    }
-
-    /* Success Messages */
-    .stSuccess {
-        background: var(--success-gradient);
-        color: white;
-    }
-
-    /* Warning Messages */
-    .stWarning {
-        background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
-        color: #8b4513;
-    }
-
-    /* Error Messages */
-    .stError {
-        background: var(--secondary-gradient);
-        color: white;
-    }
-
-    /* Footer Styling */
-    .footer {
-        text-align: center;
-        margin-top: 3rem;
-        padding: 2rem;
-        background: rgba(255, 255, 255, 0.8);
-        backdrop-filter: blur(20px);
-        border-radius: var(--border-radius);
-        border: 1px solid var(--glass-border);
-        box-shadow: var(--shadow-light);
-    }
-
-    /* Metrics and Stats */
-    .metric-card {
-        background: rgba(255, 255, 255, 0.8);
-        backdrop-filter: blur(20px);
-        padding: 1.5rem;
-        border-radius: var(--border-radius);
-        border: 1px solid var(--glass-border);
-        box-shadow: var(--shadow-light);
-        text-align: center;
-        transition: var(--transition);
-    }
-
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: var(--shadow-heavy);
-    }
-
-    /* Copy Button Enhancement */
-    .copy-button-modern {
-        background: var(--primary-gradient);
-        border: none;
-        border-radius: 8px;
-        padding: 8px 12px;
-        color: white;
-        cursor: pointer;
-        transition: var(--transition);
-        box-shadow: var(--shadow-light);
-    }
-
-    .copy-button-modern:hover {
-        transform: scale(1.05);
-        box-shadow: var(--shadow-medium);
-    }
-
-    /* Scrollbar Styling */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-
-    ::-webkit-scrollbar-track {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 4px;
-    }
-
-    ::-webkit-scrollbar-thumb {
-        background: var(--primary-gradient);
-        border-radius: 4px;
-    }
-
-    ::-webkit-scrollbar-thumb:hover {
-        background: var(--secondary-gradient);
-    }
-
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 2rem;
-        }
-        
-        .response-container, .user-message {
-            padding: 1rem;
-        }
-    }
-
-    /* Loading Animation */
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.6; }
-    }
-
-    .loading {
-        animation: pulse 2s infinite;
-    }
-
-    /* Floating Action Style */
-    .floating-element {
-        position: relative;
-        animation: float 3s ease-in-out infinite;
-    }
-
-    @keyframes float {
-        0%, 100% { transform: translateY(0px); }
-        50% { transform: translateY(-10px); }
-    }
-    </style>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    static_dir = _static_dir()
+    if static_dir is not None:
+        try:
+            # A ~100 byte link per rerun instead of the whole stylesheet; the browser caches it
+            name = publish_css_bundle(static_dir)
+            st.markdown(f'<link rel="stylesheet" href="app/static/{name}">', unsafe_allow_html=True)
+            return
+        except OSError as e:
+            print(f"⚠️ Could not publish the stylesheet, inlining it: {e}")
+    st.markdown(f"<style>{get_css_bundle()[0]}</style>", unsafe_allow_html=True)
+
+def main():
+    """Prebuild the bundle next to run_app.py: cd src && python -m ui.styles"""
+    app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    name = publish_css_bundle(os.path.join(app_dir, "static"))
+    css, _ = get_css_bundle()
+    print(f"🎨 static/{name}: {len(css)} bytes")
+
+if __name__ == "__main__":
+    main()
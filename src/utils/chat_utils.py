@@ -2,46 +2,28 @@
 Chat utilities for the Java Expert Chatbot Application
 """
 
-import re
-import json
-import os
 from datetime import datetime
 import streamlit as st
+from core.segments import get_message_segments
+from utils.history_store import get_history_store, new_history_path
 
 def extract_code_blocks(response):
-    """Extract code blocks from the response"""
-    code_pattern = r'```(\w+)?\n(.*?)```'
-    code_blocks = re.findall(code_pattern, response, re.DOTALL)
-    return code_blocks
+    """Extract (language, code) pairs from the response, in order"""
+    return [(segment.language or "", segment.text)
+            for segment in get_message_segments(response) if segment.kind == "code"]
 
-def save_chat_history(question, chat_history):
-    """Save chat history to a JSON file"""
+def save_chat_history(question, chat_history, filepath=None):
+    """
+    Save chat history as an append-only JSON Lines journal.
+    If filepath points to an already saved conversation, only new turns are appended.
+    """
     try:
-        # Create history directory if it doesn't exist
-        history_dir = "chat_history"
-        if not os.path.exists(history_dir):
-            os.makedirs(history_dir)
+        store = get_history_store()
+        if filepath and store.get(filepath) is not None:
+            return store.append_turns(filepath, chat_history)
         
-        # Create filename from question (first 50 chars, safe characters only)
-        safe_question = re.sub(r'[^\w\s-]', '', question.strip())[:50]
-        safe_question = re.sub(r'[-\s]+', '_', safe_question)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_question}_{timestamp}.json"
-        filepath = os.path.join(history_dir, filename)
-        
-        # Prepare data to save
-        save_data = {
-            "question": question,
-            "display_name": question,  # Add display_name field (same as question initially)
-            "timestamp": datetime.now().isoformat(),
-            "chat_history": chat_history
-        }
-        
-        # Save to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(save_data, f, indent=2, ensure_ascii=False)
-        
-        return filepath
+        # Write a new journal and register it in the metadata index
+        return store.create(new_history_path(question), question, datetime.now().isoformat(), chat_history)
     except Exception as e:
         st.error(f"Error saving history: {e}")
-        return None
\ No newline at end of file
+        return None
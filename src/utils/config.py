@@ -2,6 +2,8 @@
 Configuration file for the Java Expert Chatbot Application
 """
 
+import os
+
 # Application Settings
 APP_CONFIG = {
     "page_title": "Java Expert Chatbot",
@@ -10,6 +12,223 @@ APP_CONFIG = {
     "initial_sidebar_state": "expanded"
 }
 
+# API Settings
+API_CONFIG = {
+    "base_url": os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1/chat/completions"),
+    "model": "moonshotai/kimi-k2-instruct",
+    "max_tokens": 8000,
+    "temperature": 0.1,
+    "top_p": 0.9,
+    "request_timeout": 90,
+    "stream_timeout": 45,
+    "mock_token_rate": 200  # tokens/sec streamed by the --mock backend (batch mode and API server)
+}
+
+# HTTP Transport Settings (shared connection pool)
+TRANSPORT_CONFIG = {
+    "max_connections": int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    "max_keepalive_connections": int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+    "max_connections_per_host": int(os.getenv("HTTP_MAX_PER_HOST", "50")),
+    "keepalive_expiry": 60,
+    "http2": True,
+    "connect_timeout": 10,
+    "pool_timeout": 30,
+    "default_timeout": 90
+}
+
+# Request Scheduler Settings (shared rate limits, retries and circuit breaker)
+SCHEDULER_CONFIG = {
+    "requests_per_minute": int(os.getenv("RATE_LIMIT_RPM", "30")),  # 0 = unlimited
+    "tokens_per_minute": int(os.getenv("RATE_LIMIT_TPM", "0")),  # 0 = unlimited
+    "max_concurrent": int(os.getenv("MAX_CONCURRENT_REQUESTS", "16")),
+    "completion_token_estimate": 1000,  # reserved per request, reconciled when it finishes
+    "queue_timeout": 60,  # seconds a request may wait for a slot
+    "max_retries": 4,
+    "backoff_base": 0.5,
+    "backoff_max": 20,
+    "retry_statuses": [429, 500, 502, 503, 504],
+    "breaker_failure_threshold": 5,  # consecutive failures that open the circuit
+    "breaker_reset_seconds": 30
+}
+
+# Backend Pool Settings (several keys / OpenAI-compatible endpoints)
+# Keys: GROQ_API_KEYS="k1,k2" or GROQ_API_KEY, GROQ_API_KEY_2, ... GROQ_API_KEY_9
+# Local server: LOCAL_LLM_URL (+ LOCAL_LLM_MODEL, LOCAL_LLM_WEIGHT)
+# Anything else: LLM_BACKENDS='[{"name": ..., "base_url": ..., "api_key_env": ..., "weight": 1, "model": ...}]'
+BACKEND_CONFIG = {
+    "strategy": os.getenv("BACKEND_STRATEGY", "least_loaded"),  # or "weighted_round_robin"
+    "max_failovers": 2,  # other backends tried after the first one fails
+    "retries_per_backend": 1,  # scheduler retries before failing over (pools of 2+)
+    "failure_cooldown": 5,  # seconds a failing backend is skipped; doubles per failure
+    "max_cooldown": 120,
+    "auth_failure_cooldown": 600,  # 401/403: the key is probably wrong
+    "latency_ewma_alpha": 0.2,
+    "local_api_key": "local"
+}
+
+# Stream Cancellation Settings (UI stop/clear and the orphaned-stream reaper)
+CANCEL_CONFIG = {
+    "reaper_interval": 5,  # seconds between checks for streams whose session is gone
+    "max_stream_age": 600,  # streams older than this are cancelled regardless
+    "default_expected_tokens": 1000,  # savings estimate until real completions are seen
+    "expected_tokens_window": 100
+}
+
+# Streaming Render Settings (coalesce deltas into frames)
+RENDER_CONFIG = {
+    "flush_interval": 0.15,  # seconds between repaints
+    "flush_bytes": 2048,  # repaint early once this many new bytes are pending
+    "idle_refresh": 0.25,  # seconds between status refreshes while no tokens arrive
+    "segment_cache_entries": 512  # parsed chat messages kept for rendering history
+}
+
+# Response Cache Settings
+CACHE_CONFIG = {
+    "enabled": os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true",
+    "memory_max_entries": 256,
+    "disk_dir": os.path.join(".cache", "responses"),
+    "ttl_seconds": 7 * 24 * 3600,
+    "disk_max_bytes": 200 * 1024 * 1024,
+    "semantic_enabled": os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+    "semantic_num_perm": 64,
+    "semantic_threshold": 0.85,  # estimated Jaccard similarity of question keywords
+    "replay_chunk_chars": 256
+}
+
+# Sample Question Warm-up Settings
+WARMUP_CONFIG = {
+    "enabled": os.getenv("WARMUP_ENABLED", "true").lower() == "true",
+    "concurrency": 2,
+    "refresh_interval": int(os.getenv("WARMUP_REFRESH_SECONDS", "0")),  # 0 = only at startup
+    "manifest_path": os.path.join(".cache", "warmup.json")
+}
+
+# Batch Mode Settings (python -m core.batch)
+BATCH_CONFIG = {
+    "concurrency": int(os.getenv("BATCH_CONCURRENCY", "4")),
+    "progress_every": 10  # print a progress line every N answers
+}
+
+# API Server Settings (python -m api.server)
+SERVER_CONFIG = {
+    "host": os.getenv("API_SERVER_HOST", "127.0.0.1"),
+    "port": int(os.getenv("API_SERVER_PORT", "8080")),
+    "api_key": os.getenv("API_SERVER_KEY"),  # when set, clients send "Authorization: Bearer <key>"
+    "keepalive_interval": float(os.getenv("API_SERVER_KEEPALIVE", "15")),  # seconds between SSE comments on idle streams
+    "backlog": 4096,  # pending connections the listening socket accepts
+    "max_page_size": 100  # histories per page in GET /v1/histories
+}
+
+# Conversation Context Settings (multi-turn history sent with each request)
+CONTEXT_CONFIG = {
+    "history_token_budget": int(os.getenv("HISTORY_TOKEN_BUDGET", "3000")),
+    "compact_older_answers": True,  # drop code blocks from all but the latest answer
+    "summary_question_chars": 160,
+    "summary_token_budget": 300,  # reserved for the summary of dropped turns
+    "min_truncated_answer_tokens": 64,  # below this the latest answer is dropped, not cut
+    "tokenizer_encoding": "cl100k_base"  # used when tiktoken is installed
+}
+
+# Topic Classifier Settings (weighted keywords; plurals match automatically)
+TOPIC_CONFIG = {
+    "default_topic": "core_java",
+    "saturation_weight": 3.0,  # matched weight at which confidence is half the winning share
+    "labels": {
+        "core_java": "Core Java",
+        "spring_boot": "Spring Boot",
+        "concurrency": "Concurrency",
+        "jvm_tuning": "JVM Tuning",
+        "testing": "Testing",
+        "persistence": "Persistence"
+    },
+    "keywords": {
+        "core_java": {
+            "variable": 1.0, "data type": 1.5, "primitive": 1.5, "operator": 1.0,
+            "control structure": 1.5, "loop": 1.0, "array": 1.0, "method": 0.5,
+            "class": 0.5, "object": 0.5, "inheritance": 2.0, "polymorphism": 2.0,
+            "encapsulation": 2.0, "abstraction": 2.0, "abstract": 1.0, "interface": 1.0,
+            "exception": 1.5, "collection": 1.5, "arraylist": 2.0, "hashmap": 2.0,
+            "generic": 1.5, "lambda": 1.5, "lambda expression": 2.0, "stream api": 2.0,
+            "stream": 1.0, "optional": 1.0, "enum": 1.5, "record": 1.0,
+            "serialization": 1.5, "string": 0.5, "java": 0.25
+        },
+        "spring_boot": {
+            "spring": 2.0, "spring boot": 3.0, "boot": 0.5, "annotation": 1.0,
+            "dependency injection": 2.0, "bean": 1.5, "autowired": 2.5, "component": 1.0,
+            "controller": 1.5, "rest controller": 2.5, "restcontroller": 2.5,
+            "requestmapping": 2.5, "service": 0.5, "configuration": 1.0, "profile": 1.0,
+            "actuator": 2.5, "security": 1.0, "authentication": 1.5, "authorization": 1.5,
+            "jwt": 2.0, "oauth": 2.0, "oauth2": 2.0, "rest": 1.5, "rest api": 2.0, "api": 0.5,
+            "microservice": 2.0, "web mvc": 2.0, "mvc": 1.0, "webflux": 2.5
+        },
+        "concurrency": {
+            "thread": 2.0, "multithreading": 2.5, "concurrency": 2.5, "concurrent": 2.0,
+            "synchronized": 2.5, "volatile": 2.5, "lock": 1.5, "reentrantlock": 3.0,
+            "deadlock": 3.0, "race condition": 3.0, "executor": 2.5, "executorservice": 3.0,
+            "thread pool": 3.0, "completablefuture": 3.0, "future": 1.0, "atomic": 1.5,
+            "virtual thread": 3.0, "parallel stream": 2.5, "async": 1.5, "fork join": 2.5
+        },
+        "jvm_tuning": {
+            "jvm": 2.0, "garbage collection": 3.0, "garbage collector": 3.0, "gc": 2.0,
+            "g1": 2.5, "zgc": 3.0, "shenandoah": 3.0, "heap": 2.0, "heap dump": 3.0,
+            "metaspace": 3.0, "memory leak": 2.5, "outofmemoryerror": 3.0, "xmx": 3.0,
+            "jit": 2.5, "classloader": 2.0, "profiling": 2.0, "profiler": 2.0,
+            "jfr": 3.0, "flight recorder": 3.0, "performance tuning": 2.5, "latency": 1.0
+        },
+        "testing": {
+            "test": 1.5, "testing": 2.0, "unit test": 3.0, "integration test": 3.0,
+            "junit": 3.0, "junit5": 3.0, "mockito": 3.0, "mock": 2.0, "mockbean": 3.0,
+            "assertj": 3.0, "assertion": 1.5, "testcontainers": 3.0, "tdd": 2.5,
+            "springboottest": 3.0, "webmvctest": 3.0, "test coverage": 2.5
+        },
+        "persistence": {
+            "jpa": 2.5, "hibernate": 2.5, "entity": 1.5, "repository": 1.5,
+            "database": 2.0, "sql": 2.0, "jdbc": 2.5, "transaction": 2.0,
+            "transactional": 2.5, "orm": 2.0, "query": 0.5, "jpql": 3.0,
+            "lazy loading": 2.5, "n+1": 3.0, "flyway": 3.0, "liquibase": 3.0,
+            "postgresql": 2.0, "mysql": 2.0, "data access": 2.0, "spring data": 2.5
+        }
+    }
+}
+
+# Model Routing Settings (first matching rule wins; prompts are per chatbot persona)
+ROUTING_CONFIG = {
+    "enabled": os.getenv("ROUTING_ENABLED", "true").lower() == "true",
+    "default_route": "standard",
+    "routes": {
+        "quick": {
+            "model": os.getenv("ROUTER_FAST_MODEL", "llama-3.1-8b-instant"),
+            "max_tokens": 1024,
+            "prompts": {
+                "streaming": ["system_concise", "user_concise"],
+                "enterprise": ["system_concise", "user_concise"]
+            },
+            "fallback": "standard"  # retried when the model fails before the first token
+        },
+        "standard": {
+            "model": API_CONFIG["model"],
+            "max_tokens": API_CONFIG["max_tokens"],
+            "prompts": {
+                "streaming": ["system_streaming", "user_streaming"],
+                "enterprise": ["system_enterprise", "user_enhanced"]
+            },
+            "fallback": None
+        }
+    },
+    "rules": [
+        # Short conceptual questions without a request for code, on topics the small model
+        # answers well; concurrency, JVM tuning and persistence need the full model.
+        # min_confidence keeps unclassified queries (default topic, confidence 0) off this route
+        {"route": "quick", "max_words": 20, "wants_code": False, "min_confidence": 0.25,
+         "topics": ["core_java", "spring_boot", "testing"]},
+    ],
+    "code_markers": [
+        "code", "example", "examples", "implement", "implementation", "write", "create", "build",
+        "snippet", "sample", "crud", "configure", "setup", "set up", "show me", "step by step",
+        "project", "application", "endpoint", "api"
+    ]
+}
+
 # UI Settings
 UI_CONFIG = {
     "header_title": "☕ Java Expert Chatbot - Enterprise Ready",
@@ -34,6 +253,8 @@ SAMPLE_QUESTIONS = [
 # File Settings
 FILE_CONFIG = {
     "history_dir": "chat_history",
+    "history_index": "index.sqlite3",
+    "fsync": True,
     "max_filename_length": 50,
     "max_histories_display": 10,
     "max_display_name_length": 32
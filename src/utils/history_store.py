@@ -0,0 +1,402 @@
+"""
+Indexed chat-history store for the Java Expert Chatbot Application
+Keeps history metadata in SQLite so listing never re-reads transcripts,
+and transcripts in append-only JSON Lines journals (one turn per line)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from core.lifecycle import on_shutdown
+from core.segments import parse_segments
+from utils.config import FILE_CONFIG
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS histories (
+    id TEXT PRIMARY KEY,
+    filepath TEXT NOT NULL,
+    question TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    turns INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_histories_timestamp ON histories (timestamp DESC);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    id UNINDEXED, display_name, questions, answers, code,
+    tokenize = 'porter unicode61'
+);
+"""
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def _document_fields(chat_history: list) -> Tuple[str, str, str]:
+    """Split a transcript into the questions, answer prose and code block fields"""
+    questions, answers, code = [], [], []
+    for message in chat_history:
+        content = message.get("content", "")
+        if message.get("role") == "user":
+            questions.append(content)
+            continue
+        for segment in parse_segments(content):
+            (code if segment.kind == "code" else answers).append(segment.text)
+    return "\n".join(questions), "\n".join(answers), "\n".join(code)
+
+def _encode_line(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+def _fsync_dir(path: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def _write_atomic(path: str, data: bytes):
+    """Write a whole file via temp file + fsync + rename"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        if FILE_CONFIG["fsync"]:
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if FILE_CONFIG["fsync"]:
+        _fsync_dir(path)
+
+def _truncate_torn_tail(f):
+    """Drop a partial last line left by a crash so appends start on a fresh line"""
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return
+    block = 4096
+    position = end
+    while position > 0:
+        start = max(0, position - block)
+        f.seek(start)
+        newline = f.read(position - start).rfind(b"\n")
+        if newline != -1:
+            f.truncate(start + newline + 1)
+            return
+        position = start
+    f.truncate(0)
+
+def _append_durable(path: str, data: bytes):
+    """Append a batch of lines with a single fsync"""
+    with open(path, "r+b") as f:
+        _truncate_torn_tail(f)
+        f.seek(0, os.SEEK_END)
+        f.write(data)
+        f.flush()
+        if FILE_CONFIG["fsync"]:
+            os.fsync(f.fileno())
+
+def new_history_path(question: str) -> str:
+    """Path for a new journal, named after the question and the current time"""
+    history_dir = FILE_CONFIG["history_dir"]
+    os.makedirs(history_dir, exist_ok=True)
+    # First characters of the question, safe characters only
+    safe_question = re.sub(r'[^\w\s-]', '', question.strip())[:FILE_CONFIG["max_filename_length"]]
+    safe_question = re.sub(r'[-\s]+', '_', safe_question)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(history_dir, f"{safe_question}_{timestamp}.jsonl")
+
+def read_journal(filepath: str) -> Tuple[dict, list]:
+    """Read a .jsonl journal (or a legacy .json file) into (meta, turns)"""
+    if filepath.endswith(".json"):
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        meta = {key: data.get(key) for key in ("question", "display_name", "timestamp")}
+        return meta, data.get("chat_history", [])
+
+    meta, turns = {}, []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write at the tail after a crash
+            if record.get("type") == "meta":
+                meta.update(record)  # later meta lines (e.g. renames) override earlier fields
+            else:
+                turns.append(record)
+    return meta, turns
+
+def _fts_query(text: str) -> str:
+    """Turn free text into a safe FTS5 query; the last word matches as a prefix"""
+    tokens = _SEARCH_TOKEN_RE.findall(text)
+    if not tokens:
+        return ""
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+class HistoryStore:
+    """Metadata index over the saved chat histories directory"""
+
+    def __init__(self, history_dir: Optional[str] = None):
+        self.history_dir = history_dir or FILE_CONFIG["history_dir"]
+        os.makedirs(self.history_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(self.history_dir, FILE_CONFIG["history_index"]),
+            check_same_thread=False
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.bytes_written = 0
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(histories)")}
+            if "turns" not in columns:
+                self.conn.execute("ALTER TABLE histories ADD COLUMN turns INTEGER NOT NULL DEFAULT 0")
+            try:
+                self.conn.executescript(_FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: search falls back to LIKE on names
+                self.fts_enabled = False
+        self.migrate()
+
+    def migrate(self) -> int:
+        """Index saved JSON histories that are not in the index yet"""
+        with self.lock:
+            known = {row["id"] for row in self.conn.execute("SELECT id FROM histories")}
+        filenames = [name for name in os.listdir(self.history_dir) if name.endswith((".json", ".jsonl"))]
+        stale = known.difference(filenames)
+        if stale:
+            with self.lock, self.conn:
+                self.conn.executemany("DELETE FROM histories WHERE id = ?", [(name,) for name in stale])
+                if self.fts_enabled:
+                    self.conn.executemany("DELETE FROM history_fts WHERE id = ?", [(name,) for name in stale])
+
+        added = 0
+        for filename in filenames:
+            if filename in known:
+                continue
+            filepath = os.path.join(self.history_dir, filename)
+            try:
+                meta, turns = read_journal(filepath)
+            except (OSError, ValueError):
+                continue
+            question = meta.get("question") or "Unknown Question"
+            self.add(filepath, question, meta.get("display_name") or question,
+                     meta.get("timestamp") or "", os.path.getsize(filepath), turns)
+            added += 1
+
+        if self.fts_enabled:
+            self._backfill_search_index()
+        return added
+
+    def _backfill_search_index(self):
+        """Index transcripts that were added before full-text search existed"""
+        with self.lock:
+            missing = self.conn.execute(
+                "SELECT id, filepath, display_name FROM histories "
+                "WHERE id NOT IN (SELECT id FROM history_fts)"
+            ).fetchall()
+        for row in missing:
+            try:
+                chat_history = self.load_transcript(row["filepath"])
+            except (OSError, ValueError):
+                continue
+            with self.lock, self.conn:
+                self._index_document(row["id"], row["display_name"], chat_history)
+
+    def _index_document(self, history_id: str, display_name: str, chat_history: list):
+        questions, answers, code = _document_fields(chat_history)
+        self.conn.execute("DELETE FROM history_fts WHERE id = ?", (history_id,))
+        self.conn.execute(
+            "INSERT INTO history_fts (id, display_name, questions, answers, code) VALUES (?, ?, ?, ?, ?)",
+            (history_id, display_name, questions, answers, code)
+        )
+
+    def add(self, filepath: str, question: str, display_name: str, timestamp: str, size: int,
+            chat_history: Optional[list] = None):
+        """Insert or replace the index entry (and search document) of a saved history"""
+        history_id = os.path.basename(filepath)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO histories (id, filepath, question, display_name, timestamp, size, turns) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (history_id, filepath, question, display_name, timestamp, size, len(chat_history or []))
+            )
+            if self.fts_enabled and chat_history is not None:
+                self._index_document(history_id, display_name, chat_history)
+
+    def get(self, filepath: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM histories WHERE id = ?",
+                                    (os.path.basename(filepath),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def create(self, filepath: str, question: str, timestamp: str, chat_history: list) -> str:
+        """Start a new journal with a meta header and the turns so far"""
+        meta = {"type": "meta", "question": question, "timestamp": timestamp}
+        data = _encode_line(meta) + b"".join(_encode_line(turn) for turn in chat_history)
+        _write_atomic(filepath, data)
+        self.bytes_written += len(data)
+        self.add(filepath, question, question, timestamp, len(data), chat_history)
+        return filepath
+
+    def append_turns(self, filepath: str, chat_history: list) -> str:
+        """Append only the turns not yet persisted; returns the journal path"""
+        entry = self.get(filepath)
+        if entry is None:
+            raise KeyError(filepath)
+        if filepath.endswith(".json"):
+            # Legacy file: convert to a journal first so later saves can append
+            filepath = self.compact(filepath)
+            entry = self.get(filepath)
+
+        new_turns = chat_history[entry["turns"]:]
+        if not new_turns:
+            return filepath
+        data = b"".join(_encode_line(turn) for turn in new_turns)
+        _append_durable(filepath, data)
+        self.bytes_written += len(data)
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE histories SET size = ?, turns = ? WHERE id = ?",
+                              (os.path.getsize(filepath), len(chat_history), entry["id"]))
+            if self.fts_enabled:
+                self._index_document(entry["id"], entry["display_name"], chat_history)
+        return filepath
+
+    def compact(self, filepath: str) -> str:
+        """
+        Rewrite one history as a clean journal: drops torn lines, converts
+        legacy .json files and folds the current display name into the header.
+        Returns the (possibly new) file path.
+        """
+        entry = self.get(filepath)
+        meta, turns = read_journal(filepath)
+        question = meta.get("question") or (entry or {}).get("question") or "Unknown Question"
+        header = {
+            "type": "meta",
+            "question": question,
+            "display_name": (entry or {}).get("display_name") or meta.get("display_name") or question,
+            "timestamp": meta.get("timestamp") or (entry or {}).get("timestamp") or ""
+        }
+        new_path = filepath[:-len(".json")] + ".jsonl" if filepath.endswith(".json") else filepath
+        data = _encode_line(header) + b"".join(_encode_line(turn) for turn in turns)
+        _write_atomic(new_path, data)
+        self.bytes_written += len(data)
+
+        if new_path != filepath:
+            os.remove(filepath)
+            self.remove(filepath)
+        self.add(new_path, question, header["display_name"], header["timestamp"], len(data), turns)
+        return new_path
+
+    def compact_all(self) -> int:
+        """Compact every indexed history; returns the number of files rewritten"""
+        with self.lock:
+            paths = [row["filepath"] for row in self.conn.execute("SELECT filepath FROM histories")]
+        for path in paths:
+            self.compact(path)
+        return len(paths)
+
+    def list_page(self, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Newest-first page of history metadata"""
+        limit = limit or FILE_CONFIG["max_histories_display"]
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM histories ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [dict(row, filename=row["id"]) for row in rows]
+
+    def search(self, text: str, limit: int = 20) -> List[dict]:
+        """Ranked full-text search over names, questions, answers and code"""
+        query = _fts_query(text)
+        if not query:
+            return []
+        with self.lock:
+            if self.fts_enabled:
+                rows = self.conn.execute(
+                    "SELECT h.*, snippet(history_fts, -1, '**', '**', '…', 12) AS snippet "
+                    "FROM history_fts JOIN histories h ON h.id = history_fts.id "
+                    "WHERE history_fts MATCH ? "
+                    "ORDER BY bm25(history_fts, 0.0, 10.0, 5.0, 1.0, 2.0) LIMIT ?",
+                    (query, limit)
+                ).fetchall()
+            else:
+                pattern = f"%{text.strip()}%"
+                rows = self.conn.execute(
+                    "SELECT *, '' AS snippet FROM histories WHERE display_name LIKE ? OR question LIKE ? "
+                    "ORDER BY timestamp DESC LIMIT ?",
+                    (pattern, pattern, limit)
+                ).fetchall()
+        return [dict(row, filename=row["id"]) for row in rows]
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM histories").fetchone()[0]
+
+    def load_transcript(self, filepath: str) -> list:
+        """Read the full transcript of one history, only when it is opened"""
+        return read_journal(filepath)[1]
+
+    def rename(self, filepath: str, display_name: str) -> str:
+        """
+        Record a new display name in the journal (a meta line, so the name
+        survives an index rebuild), then in the index. Returns the journal path.
+        """
+        if filepath.endswith(".json"):
+            filepath = self.compact(filepath)
+        data = _encode_line({"type": "meta", "display_name": display_name})
+        _append_durable(filepath, data)
+        self.bytes_written += len(data)
+        history_id = os.path.basename(filepath)
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE histories SET display_name = ?, size = ? WHERE id = ?",
+                              (display_name, os.path.getsize(filepath), history_id))
+            if self.fts_enabled:
+                self.conn.execute("UPDATE history_fts SET display_name = ? WHERE id = ?",
+                                  (display_name, history_id))
+        return filepath
+
+    def remove(self, filepath: str):
+        history_id = os.path.basename(filepath)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM histories WHERE id = ?", (history_id,))
+            if self.fts_enabled:
+                self.conn.execute("DELETE FROM history_fts WHERE id = ?", (history_id,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_history_store() -> HistoryStore:
+    """Return the process-wide history store, migrating existing files on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore()
+                on_shutdown("history store", _store.close)
+    return _store
+
+
+def main():
+    """Compact all saved histories: cd src && python -m utils.history_store"""
+    store = get_history_store()
+    print(f"🗜️ Compacted {store.compact_all()} histories ({store.bytes_written} bytes written)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Test configuration: make the app packages under src importable
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,161 @@
+"""
+Request scheduler against the mock backend: retries, circuit breaker and priority
+"""
+
+import threading
+import time
+
+import pytest
+
+from core.mock_backend import start_server
+from core.scheduler import BACKGROUND, INTERACTIVE, CircuitOpenError, RequestScheduler
+from core.transport import post_json
+
+PAYLOAD = {"model": "mock", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 5}
+
+@pytest.fixture
+def server():
+    server = start_server(tokens=3)
+    yield server
+    server.shutdown()
+
+def make_scheduler(**config) -> RequestScheduler:
+    return RequestScheduler(dict({"requests_per_minute": 0, "tokens_per_minute": 0,
+                                  "backoff_base": 0.01, "queue_timeout": 10}, **config))
+
+def send_to(server, on_response=None):
+    def send():
+        response = post_json(server.url, {}, PAYLOAD, timeout=10)
+        if on_response:
+            on_response(response)
+        return response
+    return send
+
+def wait_for_queue(scheduler: RequestScheduler, depth: int, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while sum(scheduler.metrics()["queue_depth"].values()) < depth:
+        assert time.monotonic() < deadline, f"queue never reached {depth} waiting requests"
+        time.sleep(0.005)
+
+def test_429_is_retried_after_the_server_delay(server):
+    # A full window that frees up in 0.2s: the first attempt is rate limited
+    server.rate_limit_rpm = 600
+    server.window = [time.monotonic() - 59.8] * 600
+    scheduler = make_scheduler()
+
+    response = scheduler.request(send_to(server))
+
+    assert response.status_code == 200
+    assert server.stats["rate_limited"] == 1
+    assert server.stats["requests"] == 2
+    metrics = scheduler.metrics()
+    assert metrics["rate_limited"] == 1
+    assert metrics["retries"] == 1
+    assert metrics["circuit"] == "closed"
+
+def test_503_is_retried_until_it_succeeds(server):
+    server.error_rate = 1.0
+    scheduler = make_scheduler()
+
+    def recover(response):
+        server.error_rate = 0.0
+
+    response = scheduler.request(send_to(server, recover))
+
+    assert response.status_code == 200
+    assert server.stats["errors"] == 1
+    assert scheduler.metrics()["retries"] == 1
+    assert scheduler.metrics()["failures"] == 1
+
+def test_503_gives_up_after_max_retries(server):
+    server.error_rate = 1.0
+    scheduler = make_scheduler(max_retries=2, breaker_failure_threshold=10)
+
+    response = scheduler.request(send_to(server))
+
+    assert response.status_code == 503
+    assert server.stats["errors"] == 3
+    assert scheduler.metrics()["retries"] == 2
+
+def test_breaker_opens_and_short_circuits(server):
+    server.error_rate = 1.0
+    scheduler = make_scheduler(max_retries=5, breaker_failure_threshold=3, breaker_reset_seconds=60)
+
+    with pytest.raises(CircuitOpenError):
+        scheduler.request(send_to(server))
+
+    assert server.stats["errors"] == 3  # no request reached the server once the circuit opened
+    metrics = scheduler.metrics()
+    assert metrics["circuit"] == "open"
+    assert metrics["short_circuited"] == 1
+    with pytest.raises(CircuitOpenError):
+        scheduler.request(send_to(server))
+    assert server.stats["requests"] == 3
+
+def test_breaker_half_open_trial_closes_it(server):
+    server.error_rate = 1.0
+    scheduler = make_scheduler(max_retries=0, breaker_failure_threshold=1, breaker_reset_seconds=0.1)
+    assert scheduler.request(send_to(server)).status_code == 503
+    assert scheduler.metrics()["circuit"] == "open"
+
+    server.error_rate = 0.0
+    time.sleep(0.15)
+    assert scheduler.request(send_to(server)).status_code == 200
+    assert scheduler.metrics()["circuit"] == "closed"
+
+def test_interactive_requests_are_dispatched_before_background(server):
+    scheduler = make_scheduler(max_concurrent=1)
+    order = []
+    blocker = scheduler.acquire()  # hold the only slot while the queue fills
+
+    def submit(name, priority):
+        scheduler.request(send_to(server, lambda response: order.append(name)), priority=priority)
+
+    submitted = [("background-1", BACKGROUND), ("background-2", BACKGROUND),
+                 ("interactive-1", INTERACTIVE), ("interactive-2", INTERACTIVE)]
+    threads = []
+    for name, priority in submitted:
+        thread = threading.Thread(target=submit, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        # Enqueue in a known order: the sequence number breaks ties within a priority
+        wait_for_queue(scheduler, len(threads))
+
+    blocker.release(0)
+    for thread in threads:
+        thread.join(10)
+
+    assert order == ["interactive-1", "interactive-2", "background-1", "background-2"]
+
+def test_unlimited_scheduler_learns_the_server_limit(server):
+    server.rate_limit_rpm = 120
+    scheduler = make_scheduler()
+
+    assert scheduler.request(send_to(server)).status_code == 200
+
+    # Dispatch is now paced locally, so the queue order decides who goes first
+    assert scheduler.requests.capacity == 120
+    assert scheduler.requests.wait_time(120) > 0
+
+def test_priority_under_a_server_rate_limit(server):
+    # One request per 0.5s: everything queued behind the first is paced by the learned limit
+    server.rate_limit_rpm = 120
+    scheduler = make_scheduler()
+    scheduler.request(send_to(server))
+    scheduler.requests.clamp(0)
+    order = []
+
+    def submit(name, priority):
+        scheduler.request(send_to(server, lambda response: order.append(name)), priority=priority)
+
+    threads = [threading.Thread(target=submit, args=(f"background-{i}", BACKGROUND)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for_queue(scheduler, len(threads))
+    interactive = threading.Thread(target=submit, args=("interactive", INTERACTIVE))
+    interactive.start()
+    for thread in threads + [interactive]:
+        thread.join(10)
+
+    assert order[0] == "interactive"
+    assert server.stats["rate_limited"] == 0
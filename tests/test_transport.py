@@ -0,0 +1,40 @@
+"""
+Shared HTTP transport against the mock backend: one pooled client, reused connections
+"""
+
+import pytest
+
+from core.mock_backend import start_server
+from core.transport import close_client, get_client, post_json, stream_post
+
+PAYLOAD = {"model": "mock", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 5}
+
+@pytest.fixture
+def server():
+    close_client()  # start from an empty pool
+    server = start_server(tokens=3)
+    yield server
+    close_client()
+    server.shutdown()
+
+def test_requests_share_the_pooled_client(server):
+    assert get_client() is get_client()
+
+def test_sequential_requests_reuse_one_connection(server):
+    for _ in range(5):
+        assert post_json(server.url, {}, PAYLOAD, timeout=10).status_code == 200
+    with stream_post(server.url, {}, dict(PAYLOAD, stream=True), timeout=10) as response:
+        assert response.status_code == 200
+        assert any(line.startswith("data:") for line in response.iter_lines())
+
+    assert server.stats["requests"] == 6
+    assert server.stats["connections"] == 1
+
+def test_closing_the_client_drops_its_connections(server):
+    first = get_client()
+    post_json(server.url, {}, PAYLOAD, timeout=10)
+    close_client()
+
+    assert get_client() is not first
+    post_json(server.url, {}, PAYLOAD, timeout=10)
+    assert server.stats["connections"] == 2